@@ -1,8 +1,9 @@
 from django.contrib import admin
 from import_export import resources
-from import_export.admin import ImportExportModelAdmin
-from .models import Client, Pool, WaterReading, Organization, PoolAccess, OrganizationAccess
+from import_export.admin import ExportMixin, ImportExportModelAdmin
+from .models import ArchivedWaterReading, Client, Pool, WaterReading, Organization, PoolAccess, OrganizationAccess, RequestProfile
 from django.utils.html import format_html
+from .services.request_profiler import PROFILE_PARAM, profile_token
 
 # Inline classes
 class PoolAccessInline(admin.TabularInline):
@@ -23,6 +24,22 @@ class WaterReadingResource(resources.ModelResource):
 class WaterReadingAdmin(ImportExportModelAdmin):
     resource_class = WaterReadingResource
 
+# Archived readings are moved by the archive_readings command; export only
+class ArchivedWaterReadingResource(resources.ModelResource):
+    class Meta:
+        model = ArchivedWaterReading
+
+@admin.register(ArchivedWaterReading)
+class ArchivedWaterReadingAdmin(ExportMixin, admin.ModelAdmin):
+    resource_class = ArchivedWaterReadingResource
+    list_display = ("pool", "date", "added_by", "archived_at")
+    list_select_related = ("pool", "added_by")
+    raw_id_fields = ("pool", "added_by")
+    readonly_fields = [field.name for field in ArchivedWaterReading._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
 # Organization admin
 @admin.register(Organization)
 class OrganizationAdmin(admin.ModelAdmin):
@@ -47,3 +64,38 @@ class PoolAdmin(admin.ModelAdmin):
 @admin.register(Client)
 class ClientAdmin(admin.ModelAdmin):
     list_display = ('name',)
+
+# Request profiles are taken by RequestProfileMiddleware; view and delete only
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "method", "path", "status_code", "duration_ms", "queries", "sql_ms", "user", "files")
+    list_filter = ("view_name",)
+    list_select_related = ("user",)
+    search_fields = ("path", "view_name")
+    readonly_fields = [field.name for field in RequestProfile._meta.fields] + ["files"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_view_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+    def has_delete_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+    def files(self, obj):
+        links = format_html('<a href="{}">.prof</a>', obj.stats_file.url)
+        if obj.flamegraph_file:
+            links += format_html(' <a href="{}">flamegraph</a>', obj.flamegraph_file.url)
+        return links
+
+    def changelist_view(self, request, extra_context=None):
+        self.message_user(
+            request,
+            f"To profile a request, send it with the header X-Profile-Request: 1 "
+            f"or add ?{PROFILE_PARAM}={profile_token(request.user)} to its URL.",
+        )
+        return super().changelist_view(request, extra_context)
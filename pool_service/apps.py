@@ -7,4 +7,5 @@ class PoolServiceConfig(AppConfig):
 
     def ready(self):
         # Импортируем модуль с сигналами, чтобы он был зарегистрирован при запуске приложения
+        import pool_service.checks
         import pool_service.signals
\ No newline at end of file
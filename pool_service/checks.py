@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if settings.CACHE_IS_SHARED:
+        return []
+    return [
+        Warning(
+            "The default cache is not shared between worker processes.",
+            hint=(
+                "Set CACHE_BACKEND and CACHE_LOCATION to redis or memcached so calendars and access "
+                "snapshots can be cached across requests."
+            ),
+            id="pool_service.W001",
+        )
+    ]
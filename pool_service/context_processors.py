@@ -56,24 +56,20 @@ def plan_status_context(request):
 
     from django.utils import timezone
     from django.urls import reverse
-    from pool_service.models import OrganizationAccess
     from pool_service.services.permissions import (
         company_has_access,
         company_trial_days_left,
-        is_personal_user,
-        is_personal_free,
-        is_org_access_blocked,
-        organization_for_user,
-        personal_pool,
+        request_access,
         trial_ends_at,
     )
 
-    personal_user = is_personal_user(user)
-    org_roles = list(OrganizationAccess.objects.filter(user=user).values_list("role", flat=True))
-    is_org_admin = "admin" in org_roles or "owner" in org_roles or user.is_superuser
+    access = request_access(request)
+    personal_user = access.is_personal_user
+    org_roles = access.org_roles
+    is_org_admin = access.is_org_admin
     can_access_crm = is_org_admin or "service" in org_roles or user.is_superuser
-    is_org_staff = bool(org_roles)
-    personal_free = is_personal_free(user)
+    is_org_staff = access.is_org_staff
+    personal_free = access.is_personal_free
     context = {
         "is_personal_user": personal_user,
         "is_personal_free": personal_free,
@@ -88,18 +84,18 @@ def plan_status_context(request):
     if personal_free:
         context["plan_badge"] = {"type": "personal_free"}
     if personal_user:
-        pool = personal_pool(user)
+        pool = access.personal_pool
         if pool:
             context["personal_pool_url"] = reverse("pool_detail", kwargs={"pool_uuid": pool.uuid})
         else:
             context["personal_pool_url"] = reverse("pool_create")
 
-    org = organization_for_user(user)
+    org = access.organization
     if not org:
         return context
 
     now = timezone.now()
-    context["access_blocked"] = is_org_access_blocked(user, now=now)
+    context["access_blocked"] = access.is_access_blocked(now=now)
 
     if org.paid_until and org.paid_until >= now:
         context["plan_badge"] = {"type": "company_paid", "paid_until": org.paid_until}
@@ -129,14 +125,11 @@ def notifications_context(request):
     if not user or not user.is_authenticated:
         return {}
 
-    from pool_service.models import Notification
+    from django.utils.functional import SimpleLazyObject
+    from pool_service.services.notification_counters import unread_counts
 
-    unread_count = Notification.objects.filter(
-        user=user,
-        is_read=False,
-        is_resolved=False,
-    ).count()
-    return {"notifications_unread_count": unread_count}
+    # Read the counter row only when a template shows the badge.
+    return {"notifications_unread_count": SimpleLazyObject(lambda: unread_counts(user)["total"])}
 
 
 def push_context(request):
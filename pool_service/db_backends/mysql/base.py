@@ -0,0 +1,12 @@
+from django.db.backends.mysql import base
+
+from pool_service.db_backends.pooling import PooledConnectionMixin
+
+
+class DatabaseWrapper(PooledConnectionMixin, base.DatabaseWrapper):
+    def raw_connection_is_usable(self, raw):
+        try:
+            raw.ping()
+        except base.Database.Error:
+            return False
+        return True
@@ -0,0 +1,237 @@
+"""Per-process pool of warm database connections for the stock Django backends.
+
+Django opens a connection on the first query of a request and closes it when the
+request finishes (``CONN_MAX_AGE = 0``). The pooled wrappers keep that lifecycle
+but hand the raw connection back to a process-wide pool on close and take it out
+again on the next connect, so a request skips the TCP/TLS handshake and the
+MySQL authentication round trips.
+
+Settings come from ``DATABASES[alias]["POOL"]``:
+
+``MAX_SIZE``
+    idle connections kept per process; extra connections are closed on release.
+``MAX_LIFETIME``
+    seconds after which a connection is closed instead of reused (keep it below
+    the server's ``wait_timeout``); 0 disables recycling.
+``HEALTH_CHECK_INTERVAL``
+    a connection idle for longer than this is pinged before it is handed out.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_OPTIONS = {
+    "MAX_SIZE": 4,
+    "MAX_LIFETIME": 1800,
+    "HEALTH_CHECK_INTERVAL": 30,
+}
+
+
+class ConnectionPool:
+    def __init__(self, name, max_size, max_lifetime, health_check_interval):
+        self.name = name
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        self.pid = os.getpid()
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+        self.failed_checks = 0
+        self.discarded = 0
+
+    def _expired(self, created_at, now):
+        return bool(self.max_lifetime) and now - created_at >= self.max_lifetime
+
+    def acquire(self, create, is_usable):
+        """Return ``(raw_connection, created_at, reused)``, creating a connection if none is idle."""
+        while True:
+            with self._lock:
+                # LIFO: the most recently used connection is the likeliest to be alive.
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                break
+            raw, created_at, released_at = entry
+            now = time.monotonic()
+            if self._expired(created_at, now):
+                self._close_raw(raw)
+                with self._lock:
+                    self.recycled += 1
+                continue
+            if now - released_at >= self.health_check_interval and not is_usable(raw):
+                self._close_raw(raw)
+                with self._lock:
+                    self.failed_checks += 1
+                continue
+            with self._lock:
+                self.in_use += 1
+                self.reused += 1
+            return raw, created_at, True
+
+        raw = create()
+        with self._lock:
+            self.in_use += 1
+            self.created += 1
+        return raw, time.monotonic(), False
+
+    def release(self, raw, created_at):
+        now = time.monotonic()
+        with self._lock:
+            self.in_use -= 1
+            if len(self._idle) < self.max_size and not self._expired(created_at, now):
+                self._idle.append((raw, created_at, now))
+                return
+            self.discarded += 1
+        self._close_raw(raw)
+
+    def discard(self, raw):
+        with self._lock:
+            self.in_use -= 1
+            self.discarded += 1
+        self._close_raw(raw)
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for raw, _, _ in idle:
+            self._close_raw(raw)
+
+    def _close_raw(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            logger.debug("Closing pooled connection of %s failed", self.name, exc_info=True)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "idle": len(self._idle),
+                "in_use": self.in_use,
+                "created": self.created,
+                "reused": self.reused,
+                "recycled": self.recycled,
+                "failed_checks": self.failed_checks,
+                "discarded": self.discarded,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, name, options):
+    pid = os.getpid()
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None and pool.pid != pid:
+            # Connections inherited over fork() share their socket with the parent; never reuse them.
+            pool = None
+        if pool is None:
+            pool = ConnectionPool(
+                name,
+                max_size=options["MAX_SIZE"],
+                max_lifetime=options["MAX_LIFETIME"],
+                health_check_interval=options["HEALTH_CHECK_INTERVAL"],
+            )
+            _pools[key] = pool
+        return pool
+
+
+def pool_metrics():
+    """Counters of every pool of this process."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.metrics() for pool in pools if pool.pid == os.getpid()]
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        if pool.pid == os.getpid():
+            pool.clear()
+
+
+class PooledConnectionMixin:
+    """Mixin for a backend ``DatabaseWrapper`` that takes raw connections from a ``ConnectionPool``."""
+
+    _pool_created_at = None
+    _pool_reused = False
+
+    def pool_options(self):
+        return {**DEFAULT_POOL_OPTIONS, **(self.settings_dict.get("POOL") or {})}
+
+    def pooling_enabled(self):
+        return self.pool_options()["MAX_SIZE"] > 0
+
+    def connection_pool(self):
+        settings_dict = self.settings_dict
+        key = (
+            self.vendor,
+            self.alias,
+            settings_dict.get("NAME"),
+            settings_dict.get("HOST"),
+            settings_dict.get("PORT"),
+            settings_dict.get("USER"),
+        )
+        return get_pool(key, f"{self.alias}:{self.vendor}", self.pool_options())
+
+    def raw_connection_is_usable(self, raw):
+        """Ping ``raw`` with ``SELECT 1``; backends with a cheaper check override this."""
+        try:
+            cursor = raw.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            finally:
+                cursor.close()
+        except self.Database.Error:
+            return False
+        return True
+
+    def get_new_connection(self, conn_params):
+        create = super().get_new_connection
+        if not self.pooling_enabled():
+            return create(conn_params)
+        raw, self._pool_created_at, self._pool_reused = self.connection_pool().acquire(
+            lambda: create(conn_params),
+            self.raw_connection_is_usable,
+        )
+        return raw
+
+    def init_connection_state(self):
+        # Session settings survive on a reused connection.
+        if not self._pool_reused:
+            super().init_connection_state()
+
+    def _close(self):
+        raw = self.connection
+        if raw is None or not self.pooling_enabled() or self._pool_created_at is None:
+            return super()._close()
+        pool = self.connection_pool()
+        self._pool_reused = False
+        created_at, self._pool_created_at = self._pool_created_at, None
+        if self.in_atomic_block or not self._reset_for_pool(raw):
+            pool.discard(raw)
+        else:
+            pool.release(raw, created_at)
+
+    def _reset_for_pool(self, raw):
+        """Leave no transaction open on a connection going back to the pool."""
+        if not self.autocommit:
+            try:
+                raw.rollback()
+            except self.Database.Error:
+                return False
+        return not self.errors_occurred or self.raw_connection_is_usable(raw)
@@ -0,0 +1,9 @@
+from django.db.backends.sqlite3 import base
+
+from pool_service.db_backends.pooling import PooledConnectionMixin
+
+
+class DatabaseWrapper(PooledConnectionMixin, base.DatabaseWrapper):
+    def pooling_enabled(self):
+        # Closing an in-memory database destroys it; the stock backend already keeps it open.
+        return not self.is_in_memory_db() and super().pooling_enabled()
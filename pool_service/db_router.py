@@ -0,0 +1,71 @@
+"""Send the reads of read-only views and reports to a database replica.
+
+The replica is the ``replica`` entry of ``DATABASES`` (configured with the
+``DB_REPLICA_*`` settings); without it every query goes to ``default`` as before.
+
+Reads go to the replica only inside ``replica_reads()``, which ``read_from_replica``
+opens around GET/HEAD requests to the views it decorates. Writes always go to the
+primary. After an unsafe request ``middleware.ReplicaPinMiddleware`` sets a
+short-lived cookie that keeps the browser on the primary for
+``DB_REPLICA_PIN_SECONDS``, so a user reads their own writes while the replica
+catches up.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_ALIAS = "replica"
+PIN_COOKIE = "db_primary_pin"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Route the reads made inside the block to the replica (or, with ``enabled=False``, back to the primary)."""
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def is_pinned_to_primary(request):
+    return PIN_COOKIE in request.COOKIES
+
+
+def read_from_replica(view):
+    """Serve safe requests to ``view`` from the replica unless the browser is pinned to the primary."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS or is_pinned_to_primary(request):
+            return view(request, *args, **kwargs)
+        with replica_reads():
+            return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and replica_configured():
+            return REPLICA_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary.
+        return True
+
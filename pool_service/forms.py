@@ -833,6 +833,24 @@ class OrganizationWaterNormsForm(forms.ModelForm):
         }
 
 
+class ReadingImportForm(forms.Form):
+    file = forms.FileField(
+        label="Файл CSV или XLSX",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control rounded-3", "accept": ".csv,.xlsx"}),
+    )
+    dry_run = forms.BooleanField(
+        label="Только проверить, ничего не сохранять",
+        required=False,
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+    )
+
+    def clean_file(self):
+        upload = self.cleaned_data["file"]
+        if Path(upload.name or "").suffix.lower() not in {".csv", ".txt", ".xlsx"}:
+            raise forms.ValidationError("Поддерживаются файлы CSV и XLSX.")
+        return upload
+
+
 class EmailOrUsernameAuthenticationForm(AuthenticationForm):
     def clean(self):
         username = (self.cleaned_data.get("username") or "").strip()
@@ -965,7 +983,7 @@ class CrmItemForm(forms.ModelForm):
             self.fields["client"].queryset = Client.objects.filter(organization=organization).order_by("name")
             self.fields["pool"].queryset = Pool.objects.filter(
                 models.Q(organization=organization) | models.Q(client__organization=organization)
-            ).order_by("client__name")
+            ).select_related("organization").order_by("client__name")
             self.fields["responsible"].queryset = User.objects.filter(
                 organizationaccess__organization=organization
             ).distinct().order_by("last_name", "first_name")
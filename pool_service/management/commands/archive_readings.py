@@ -0,0 +1,41 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from pool_service.services.reading_archive import archive_readings
+from pool_service.services.schedule_store import schedule_horizon
+
+
+class Command(BaseCommand):
+    help = "Move water readings older than the retention period to the archive table in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=settings.READING_ARCHIVE_AFTER_DAYS,
+            help="Archive readings of days before today minus this many days.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Only count the readings that would be moved.")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate() if settings.USE_TZ else date.today()
+        before = today - timedelta(days=options["older_than_days"])
+        horizon_start, _ = schedule_horizon(today)
+        if before > horizon_start:
+            # Stored schedule occurrences link to readings inside the horizon and must keep them.
+            raise CommandError(
+                f"Readings after {horizon_start.isoformat()} are inside the service schedule horizon; "
+                "use a longer --older-than-days."
+            )
+
+        readings, pools = archive_readings(
+            before,
+            batch_size=max(1, options["batch_size"]),
+            dry_run=options["dry_run"],
+        )
+        verb = "Would archive" if options["dry_run"] else "Archived"
+        self.stdout.write(f"{verb} {readings} readings of {pools} pools dated before {before.isoformat()}.")
@@ -0,0 +1,189 @@
+import json
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client as TestClient
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from pool_service.db_backends.pooling import pool_metrics
+from pool_service.management.commands.generate_notifications import Command as NotificationsCommand
+from pool_service.models import OrganizationAccess, Pool
+
+
+DEFAULT_TARGETS = [
+    "readings_all",
+    "pool_list",
+    "pool_detail",
+    "crm_list",
+    "clients_list",
+    "users",
+    "generate_notifications",
+]
+
+
+class _QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure wall time, SQL queries, SQL time and peak memory of the heavy views; write results as JSON. "
+        "Memory is traced with tracemalloc, so absolute timings are inflated: compare runs with each other."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", required=True, help="Username the views are requested as.")
+        parser.add_argument("--target", action="append", dest="targets", help=f"Repeatable; default: {', '.join(DEFAULT_TARGETS)}.")
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--output", help="JSON file to write the results to.")
+        parser.add_argument("--compare", help="Earlier results JSON to print deltas against.")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options["user"]).first()
+        if not user:
+            raise CommandError(f"User '{options['user']}' not found.")
+        targets = options["targets"] or DEFAULT_TARGETS
+        unknown = set(targets) - set(DEFAULT_TARGETS)
+        if unknown:
+            raise CommandError(f"Unknown targets: {', '.join(sorted(unknown))}.")
+
+        client = TestClient()
+        client.force_login(user)
+        results = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            for target in targets:
+                runner = self._runner(target, client, user)
+                if runner is None:
+                    self.stderr.write(f"{target}: skipped, nothing to request for this user")
+                    continue
+                runs = [self._measure(runner) for _ in range(max(1, options["repeat"]))]
+                results[target] = self._summary(runs)
+                self.stdout.write(self._format_line(target, results[target]))
+
+        payload = {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "commit": self._commit(),
+            "database": connection.vendor,
+            "user": user.username,
+            "repeat": options["repeat"],
+            "results": results,
+            "connection_pools": pool_metrics(),
+        }
+        if options.get("output"):
+            Path(options["output"]).write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+            self.stdout.write(f"Results written to {options['output']}")
+        if options.get("compare"):
+            self._compare(json.loads(Path(options["compare"]).read_text(encoding="utf-8")), payload)
+
+    def _runner(self, target, client, user):
+        if target == "generate_notifications":
+            return self._notifications_runner()
+        if target == "pool_detail":
+            pool = self._busiest_pool(user)
+            if not pool:
+                return None
+            url = reverse("pool_detail", kwargs={"pool_uuid": pool.uuid})
+        elif target == "crm_list":
+            url = reverse("crm_list", kwargs={"direction": "service"})
+        else:
+            url = reverse(target)
+
+        def run():
+            response = client.get(url)
+            if response.status_code >= 400:
+                raise CommandError(f"{url} answered {response.status_code}")
+            if getattr(response, "streaming", False):
+                b"".join(response.streaming_content)
+
+        return run
+
+    def _notifications_runner(self):
+        command = NotificationsCommand(stdout=StringIO())
+        now = timezone.localtime() if settings.USE_TZ else datetime.now()
+        friday_noon = (now - timedelta(days=(now.weekday() - 4) % 7)).replace(hour=12, minute=30)
+
+        def run():
+            # Force the Friday branch and keep the database untouched.
+            with transaction.atomic():
+                command._generate_missed_visits(friday_noon, friday_noon.date())
+                command._generate_daily_missing(now.date())
+                transaction.set_rollback(True)
+
+        return run
+
+    def _busiest_pool(self, user):
+        pools = Pool.objects.all()
+        if not user.is_superuser:
+            org_ids = OrganizationAccess.objects.filter(user=user).values_list("organization_id", flat=True)
+            pools = pools.filter(organization_id__in=org_ids)
+        return pools.order_by("-readings_count").first()
+
+    def _measure(self, run):
+        timer = _QueryTimer()
+        tracemalloc.start()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            run()
+        wall = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {"wall_ms": wall * 1000, "queries": timer.count, "sql_ms": timer.seconds * 1000, "peak_kb": peak / 1024}
+
+    def _summary(self, runs):
+        summary = {}
+        for key in ("wall_ms", "queries", "sql_ms", "peak_kb"):
+            values = [run[key] for run in runs]
+            summary[key] = round(statistics.median(values), 2)
+            summary[f"{key}_max"] = round(max(values), 2)
+        return summary
+
+    def _format_line(self, target, result):
+        return (
+            f"{target:<24} {result['wall_ms']:>10.1f} ms  {result['queries']:>6.0f} queries  "
+            f"{result['sql_ms']:>10.1f} ms sql  {result['peak_kb']:>10.0f} KB peak"
+        )
+
+    def _compare(self, baseline, current):
+        self.stdout.write(f"Compared with {baseline.get('commit') or 'unknown commit'}:")
+        for target, result in current["results"].items():
+            before = baseline.get("results", {}).get(target)
+            if not before:
+                continue
+            deltas = []
+            for key in ("wall_ms", "queries", "sql_ms", "peak_kb"):
+                if before.get(key):
+                    deltas.append(f"{key} {(result[key] - before[key]) / before[key] * 100:+.0f}%")
+            self.stdout.write(f"{target:<24} " + ", ".join(deltas))
+
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+                timeout=5,
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ""
@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from pool_service.services.push_notifications import deliver_pending, purge_outbox
+
+# How often a running worker purges old outbox rows.
+PURGE_INTERVAL_SECONDS = 3600
+
+
+class Command(BaseCommand):
+    help = "Send the queued web push messages; runs until stopped unless --once is given."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Send the messages due now and exit.")
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--workers", type=int, default=settings.PUSH_WORKERS, help="Concurrent sends.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds to sleep when nothing is due.")
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            default=settings.PUSH_OUTBOX_KEEP_DAYS,
+            help="Delete sent, failed and expired messages queued more than this many days ago.",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.VAPID_PUBLIC_KEY or not settings.VAPID_PRIVATE_KEY:
+            raise CommandError("VAPID_PUBLIC_KEY and VAPID_PRIVATE_KEY are not set.")
+        batch_size = max(1, options["batch_size"])
+        workers = max(1, options["workers"])
+        purged_at = 0.0
+        try:
+            while True:
+                if time.monotonic() - purged_at >= PURGE_INTERVAL_SECONDS:
+                    purged = purge_outbox(options["keep_days"])
+                    purged_at = time.monotonic()
+                    if purged:
+                        self.stdout.write(f"Purged {purged} old messages.")
+                stats = deliver_pending(batch_size=batch_size, workers=workers)
+                if stats["claimed"]:
+                    self.stdout.write(
+                        "Claimed {claimed}: sent {sent}, retried {retried}, failed {failed}, "
+                        "expired {expired}, gone {gone}.".format(**stats)
+                    )
+                if options["once"]:
+                    if stats["claimed"] < batch_size:
+                        break
+                elif stats["claimed"] < batch_size:
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,269 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from pool_service.models import (
+    Client,
+    CrmItem,
+    NotificationCounter,
+    Organization,
+    OrganizationAccess,
+    Pool,
+    PoolAccess,
+    Profile,
+    ServiceTask,
+    ServiceVisitPlan,
+    WaterReading,
+)
+from pool_service.services.schedule import frequency_days, frequency_months, week_start
+
+
+FREQUENCY_WEIGHTS = [
+    (Pool.SERVICE_FREQ_WEEKLY, 40),
+    (Pool.SERVICE_FREQ_TWICE_MONTHLY, 20),
+    (Pool.SERVICE_FREQ_MONTHLY, 20),
+    (Pool.SERVICE_FREQ_QUARTERLY, 5),
+    (None, 15),
+]
+STREETS = ["Лесная", "Садовая", "Центральная", "Озерная", "Школьная", "Парковая", "Речная", "Молодежная"]
+SURNAMES = ["Иванов", "Петров", "Сидоров", "Смирнов", "Кузнецов", "Попов", "Васильев", "Соколов"]
+STAFF_ROLES = ["owner", "admin", "service", "service", "service", "manager"]
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic organizations, clients, pools, staff, readings, plans, tasks and CRM items."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--organizations", type=int, default=2)
+        parser.add_argument("--staff", type=int, default=6, help="Staff members per organization.")
+        parser.add_argument("--clients", type=int, default=50, help="Clients per organization.")
+        parser.add_argument("--pools", type=int, default=2, help="Pools per client.")
+        parser.add_argument("--months", type=int, default=12, help="Months of reading history per pool.")
+        parser.add_argument("--tasks", type=int, default=100, help="Tasks per organization.")
+        parser.add_argument("--crm", type=int, default=100, help="CRM items per organization.")
+        parser.add_argument("--prefix", default="demo", help="Prefix for generated names and usernames.")
+        parser.add_argument("--password", default="demo12345", help="Password of every generated user.")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--skip-rebuild", action="store_true", help="Do not rebuild pool statistics, reading rollups, search index, visit state and schedules.")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = max(1, options["batch_size"])
+        prefix = options["prefix"]
+        if Organization.objects.filter(name__startswith=f"{prefix} ").exists():
+            raise CommandError(f"Data with prefix '{prefix}' already exists, pick another --prefix.")
+
+        now = timezone.now()
+        history_start = now - timedelta(days=options["months"] * 30)
+        password_hash = make_password(options["password"])
+        totals = {"organizations": 0, "users": 0, "clients": 0, "pools": 0, "readings": 0, "plans": 0, "tasks": 0, "crm": 0}
+
+        for org_index in range(options["organizations"]):
+            org = Organization.objects.create(
+                name=f"{prefix} {org_index + 1}",
+                city="Москва",
+                plan_type=Organization.PLAN_COMPANY_PAID,
+                trial_started_at=now,
+                paid_until=now + timedelta(days=365),
+            )
+            staff = self._create_staff(org, prefix, org_index, options["staff"], password_hash)
+            service_staff = [user for user, role in staff if role in {"service", "owner", "admin"}] or [staff[0][0]]
+            clients = self._with_ids(
+                Client.objects.bulk_create(
+                    [
+                        Client(
+                            name=f"{self.rng.choice(SURNAMES)} {prefix}-{org_index + 1}-{client_index + 1}",
+                            phone=f"+7900{self.rng.randint(1000000, 9999999)}",
+                            organization=org,
+                        )
+                        for client_index in range(options["clients"])
+                    ],
+                    batch_size=self.batch_size,
+                ),
+                Client.objects.filter(organization=org),
+            )
+            pools = self._create_pools(org, clients, options["pools"], history_start)
+            self._create_pool_accesses(pools, service_staff)
+            totals["readings"] += self._create_readings(pools, service_staff, history_start, now)
+            totals["plans"] += self._create_plans(pools, service_staff, now.date())
+            totals["tasks"] += self._create_tasks(org, service_staff, options["tasks"], now.date())
+            totals["crm"] += self._create_crm(org, clients, pools, service_staff, options["crm"])
+            totals["organizations"] += 1
+            totals["users"] += len(staff)
+            totals["clients"] += len(clients)
+            totals["pools"] += len(pools)
+            self.stdout.write(f"{org.name}: {len(clients)} clients, {len(pools)} pools")
+
+        if not options["skip_rebuild"] and totals["pools"]:
+            call_command("rebuild_pool_stats", stdout=self.stdout)
+            call_command("rebuild_reading_rollups", stdout=self.stdout)
+            call_command("rebuild_search_index", stdout=self.stdout)
+            call_command("rebuild_service_schedule", stdout=self.stdout)
+        self.stdout.write(", ".join(f"{key}: {value}" for key, value in totals.items()))
+
+    def _with_ids(self, objects, queryset):
+        # Backends without RETURNING (MySQL) leave primary keys unset after bulk_create.
+        if objects and objects[0].pk is None:
+            return list(queryset.order_by("id"))
+        return objects
+
+    def _create_staff(self, org, prefix, org_index, count, password_hash):
+        usernames = [f"{prefix}{org_index + 1}_staff{staff_index + 1}" for staff_index in range(max(1, count))]
+        users = self._with_ids(
+            User.objects.bulk_create(
+                [
+                    User(
+                        username=username,
+                        first_name=f"Сотрудник {staff_index + 1}",
+                        last_name=self.rng.choice(SURNAMES),
+                        password=password_hash,
+                    )
+                    for staff_index, username in enumerate(usernames)
+                ]
+            ),
+            User.objects.filter(username__in=usernames),
+        )
+        Profile.objects.bulk_create([Profile(user=user) for user in users])
+        NotificationCounter.objects.bulk_create([NotificationCounter(user=user) for user in users])
+        roles = ["owner"] + [self.rng.choice(STAFF_ROLES[1:]) for _ in users[1:]]
+        OrganizationAccess.objects.bulk_create(
+            [OrganizationAccess(user=user, organization=org, role=role) for user, role in zip(users, roles)]
+        )
+        return list(zip(users, roles))
+
+    def _create_pools(self, org, clients, per_client, history_start):
+        frequencies, weights = zip(*FREQUENCY_WEIGHTS)
+        pools = []
+        for client in clients:
+            for pool_index in range(per_client):
+                frequency = self.rng.choices(frequencies, weights)[0]
+                pools.append(
+                    Pool(
+                        client=client,
+                        organization=org,
+                        address=f"ул. {self.rng.choice(STREETS)}, {self.rng.randint(1, 200)}",
+                        object_type=Pool.OBJECT_TYPE_WATER if self.rng.random() < 0.1 else Pool.OBJECT_TYPE_POOL,
+                        service_frequency=frequency,
+                        service_interval_days=None if frequency else self.rng.choice([None, 10, 21]),
+                        service_suspended=self.rng.random() < 0.03,
+                        daily_readings_required=self.rng.random() < 0.05,
+                        volume=round(self.rng.uniform(20, 400), 1),
+                        created_at=history_start,
+                    )
+                )
+        return self._with_ids(
+            Pool.objects.bulk_create(pools, batch_size=self.batch_size),
+            Pool.objects.filter(organization=org).select_related("client"),
+        )
+
+    def _create_pool_accesses(self, pools, staff):
+        PoolAccess.objects.bulk_create(
+            [PoolAccess(user=self.rng.choice(staff), pool=pool, role="editor") for pool in pools],
+            batch_size=self.batch_size,
+        )
+
+    def _create_readings(self, pools, staff, history_start, history_end):
+        total = 0
+        batch = []
+        for pool in pools:
+            step = frequency_days(pool) or 30 * (frequency_months(pool) or 1)
+            cursor = history_start + timedelta(days=self.rng.randint(0, step))
+            while cursor < history_end:
+                visit_at = cursor.replace(hour=self.rng.randint(8, 18), minute=self.rng.choice([0, 15, 30, 45]), second=0, microsecond=0)
+                batch.append(
+                    WaterReading(
+                        pool=pool,
+                        date=visit_at,
+                        day=WaterReading.day_of(visit_at),
+                        added_by=self.rng.choice(staff),
+                        temperature=round(self.rng.uniform(22, 30), 1),
+                        ph=round(self.rng.gauss(7.3, 0.25), 2),
+                        cl_free=round(max(0.0, self.rng.gauss(1.0, 0.4)), 2),
+                        cl_total=round(max(0.0, self.rng.gauss(1.3, 0.4)), 2),
+                        comment="" if self.rng.random() < 0.8 else "Промывка фильтра",
+                    )
+                )
+                cursor += timedelta(days=max(1, step + self.rng.randint(-2, 2)))
+                if len(batch) >= self.batch_size:
+                    WaterReading.objects.bulk_create(batch)
+                    total += len(batch)
+                    batch = []
+        if batch:
+            WaterReading.objects.bulk_create(batch)
+            total += len(batch)
+        return total
+
+    def _create_plans(self, pools, staff, today):
+        plans = []
+        for pool in pools:
+            if not pool.service_frequency or self.rng.random() > 0.2:
+                continue
+            source_week = week_start(today) + timedelta(days=7 * self.rng.randint(0, 4))
+            plans.append(
+                ServiceVisitPlan(
+                    pool=pool,
+                    week_start=source_week,
+                    planned_date=source_week + timedelta(days=self.rng.randint(0, 4)),
+                    created_by=self.rng.choice(staff),
+                )
+            )
+        ServiceVisitPlan.objects.bulk_create(plans, batch_size=self.batch_size)
+        return len(plans)
+
+    def _create_tasks(self, org, staff, count, today):
+        tasks = []
+        for task_index in range(count):
+            start_date = today + timedelta(days=self.rng.randint(-60, 60))
+            tasks.append(
+                ServiceTask(
+                    organization=org,
+                    title=f"Задача {task_index + 1}",
+                    start_date=start_date,
+                    end_date=start_date + timedelta(days=self.rng.randint(1, 3)) if self.rng.random() < 0.2 else None,
+                    priority=ServiceTask.PRIORITY_HIGH if self.rng.random() < 0.1 else ServiceTask.PRIORITY_NORMAL,
+                    created_by=self.rng.choice(staff),
+                )
+            )
+        tasks = self._with_ids(
+            ServiceTask.objects.bulk_create(tasks, batch_size=self.batch_size),
+            ServiceTask.objects.filter(organization=org),
+        )
+        through = ServiceTask.responsibles.through
+        through.objects.bulk_create(
+            [through(servicetask_id=task.id, user_id=self.rng.choice(staff).id) for task in tasks],
+            batch_size=self.batch_size,
+        )
+        return len(tasks)
+
+    def _create_crm(self, org, clients, pools, staff, count):
+        stages_by_direction = {
+            CrmItem.DIRECTION_SERVICE: [CrmItem.STAGE_SERVICE_NEW, CrmItem.STAGE_SERVICE_IN_PROGRESS, CrmItem.STAGE_SERVICE_DONE],
+            CrmItem.DIRECTION_SALES: [CrmItem.STAGE_SALES_LEAD, CrmItem.STAGE_SALES_OFFER, CrmItem.STAGE_SALES_WON],
+            CrmItem.DIRECTION_PROJECT: [CrmItem.STAGE_PROJECT_IDEA, CrmItem.STAGE_PROJECT_BUILD],
+            CrmItem.DIRECTION_TENDER: [CrmItem.STAGE_TENDER_PREPARE, CrmItem.STAGE_TENDER_SUBMITTED],
+        }
+        items = []
+        for item_index in range(count):
+            direction = self.rng.choice(list(stages_by_direction))
+            pool = self.rng.choice(pools) if pools and direction == CrmItem.DIRECTION_SERVICE else None
+            items.append(
+                CrmItem(
+                    organization=org,
+                    direction=direction,
+                    title=f"Заявка {item_index + 1}",
+                    client=pool.client if pool else (self.rng.choice(clients) if clients else None),
+                    pool=pool,
+                    stage=self.rng.choice(stages_by_direction[direction]),
+                    amount=self.rng.randint(5, 500) * 1000,
+                    responsible=self.rng.choice(staff),
+                    created_by=self.rng.choice(staff),
+                )
+            )
+        CrmItem.objects.bulk_create(items, batch_size=self.batch_size)
+        return len(items)
@@ -5,6 +5,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.urls import reverse
 
+from pool_service.db_router import replica_reads
 from pool_service.models import OrganizationAccess, Pool, WaterReading
 from pool_service.services.notifications import notify_client_users, notify_org_users
 
@@ -16,8 +17,10 @@ class Command(BaseCommand):
         now = timezone.localtime()
         today = now.date()
 
-        self._generate_missed_visits(now, today)
-        self._generate_daily_missing(today)
+        # Scan pools and readings on the replica; the notification writes and their dedupe reads use the primary.
+        with replica_reads():
+            self._generate_missed_visits(now, today)
+            self._generate_daily_missing(today)
 
     def _is_friday_noon(self, now):
         return now.weekday() == 4 and (now.hour, now.minute) >= (12, 0)
@@ -109,40 +112,54 @@ class Command(BaseCommand):
             return
         pools = Pool.objects.filter(
             organization__isnull=False,
-        ).select_related("organization")
+            organization__notify_missed_visits=True,
+            service_suspended=False,
+        ).select_related("organization", "client")
 
+        members = {}
+        for org_id, user_id in OrganizationAccess.objects.filter(
+            organization_id__in={pool.organization_id for pool in pools}
+        ).values_list("organization_id", "user_id"):
+            members.setdefault(org_id, set()).add(user_id)
+
+        pools_by_period = {}
         for pool in pools:
-            if pool.service_suspended:
-                continue
-            if not pool.organization.notify_missed_visits:
-                continue
             frequency = pool.service_frequency or self._map_interval_to_frequency(pool.service_interval_days)
-            if not frequency:
-                continue
-            org_user_ids = list(
-                OrganizationAccess.objects.filter(organization=pool.organization).values_list("user_id", flat=True)
-            )
-            if not org_user_ids:
+            if not frequency or pool.organization_id not in members:
                 continue
             start_date, end_date, period_key = self._period_bounds(today, frequency)
             if not period_key:
                 continue
-            has_service = WaterReading.objects.filter(
-                pool=pool,
-                added_by_id__in=org_user_ids,
-                date__date__gte=start_date,
-                date__date__lte=end_date,
-            ).exists()
-            if has_service:
-                continue
-
-            label = self._period_label(frequency)
-            title = "\u041d\u0435\u0442 \u0441\u0435\u0440\u0432\u0438\u0441\u043d\u043e\u0433\u043e \u043f\u043e\u0441\u0435\u0449\u0435\u043d\u0438\u044f"
-            client_label = pool.client.name if pool.client else pool.address
-            message = f"{client_label}: \u043d\u0435\u0442 \u043f\u043e\u0441\u0435\u0449\u0435\u043d\u0438\u044f {label}".strip()
-            action_url = reverse("pool_detail", kwargs={"pool_uuid": pool.uuid})
-            dedupe_key = f"missed_visit:{pool.id}:{period_key}"
-
+            pools_by_period.setdefault((start_date, end_date, period_key, frequency), []).append(pool)
+
+        # Any reading by a member of the pool's organization in the period counts as a visit.
+        for (start_date, end_date, period_key, frequency), period_pools in pools_by_period.items():
+            visitors = {}
+            for pool_id, user_id in (
+                WaterReading.objects.filter(
+                    pool_id__in=[pool.id for pool in period_pools],
+                    added_by_id__in=set().union(*(members[pool.organization_id] for pool in period_pools)),
+                    day__gte=start_date,
+                    day__lte=end_date,
+                )
+                .values_list("pool_id", "added_by_id")
+                .distinct()
+            ):
+                visitors.setdefault(pool_id, set()).add(user_id)
+            for pool in period_pools:
+                if visitors.get(pool.id, set()) & members[pool.organization_id]:
+                    continue
+                self._notify_missed_visit(pool, frequency, period_key)
+
+    def _notify_missed_visit(self, pool, frequency, period_key):
+        label = self._period_label(frequency)
+        title = "\u041d\u0435\u0442 \u0441\u0435\u0440\u0432\u0438\u0441\u043d\u043e\u0433\u043e \u043f\u043e\u0441\u0435\u0449\u0435\u043d\u0438\u044f"
+        client_label = pool.client.name if pool.client else pool.address
+        message = f"{client_label}: \u043d\u0435\u0442 \u043f\u043e\u0441\u0435\u0449\u0435\u043d\u0438\u044f {label}".strip()
+        action_url = reverse("pool_detail", kwargs={"pool_uuid": pool.uuid})
+        dedupe_key = f"missed_visit:{pool.id}:{period_key}"
+
+        with replica_reads(False):
             notify_org_users(
                 pool.organization,
                 title=title,
@@ -162,7 +179,7 @@ class Command(BaseCommand):
         for pool in pools:
             if pool.organization and not pool.organization.notify_pool_staff_daily:
                 continue
-            has_reading = WaterReading.objects.filter(pool=pool, date__date=today).exists()
+            has_reading = WaterReading.objects.filter(pool=pool, day=today).exists()
             if has_reading:
                 continue
             title = "\u041d\u0435\u0442 \u0435\u0436\u0435\u0434\u043d\u0435\u0432\u043d\u044b\u0445 \u043f\u043e\u043a\u0430\u0437\u0430\u043d\u0438\u0439"
@@ -171,13 +188,14 @@ class Command(BaseCommand):
             action_url = reverse("pool_detail", kwargs={"pool_uuid": pool.uuid})
             dedupe_key = f"daily_missing:{pool.id}:{today.isoformat()}"
 
-            notify_client_users(
-                pool.client,
-                title=title,
-                message=message,
-                kind="daily_missing",
-                level="warning",
-                action_url=action_url,
-                pool=pool,
-                dedupe_key=dedupe_key,
-            )
+            with replica_reads(False):
+                notify_client_users(
+                    pool.client,
+                    title=title,
+                    message=message,
+                    kind="daily_missing",
+                    level="warning",
+                    action_url=action_url,
+                    pool=pool,
+                    dedupe_key=dedupe_key,
+                )
@@ -0,0 +1,50 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from pool_service.models import Organization
+from pool_service.services.reading_import import ImportFormatError, import_readings
+
+
+class Command(BaseCommand):
+    help = "Import water readings of an organization's pools from a CSV or XLSX file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or XLSX file with a header row.")
+        parser.add_argument("--organization", type=int, required=True, help="Organization id.")
+        parser.add_argument("--user", help="Username recorded as the author of the readings.")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Validate the file without saving readings.")
+
+    def handle(self, *args, **options):
+        try:
+            organization = Organization.objects.get(id=options["organization"])
+        except Organization.DoesNotExist:
+            raise CommandError(f"Organization {options['organization']} does not exist.")
+        added_by = None
+        if options["user"]:
+            added_by = User.objects.filter(username=options["user"]).first()
+            if added_by is None:
+                raise CommandError(f"User {options['user']} does not exist.")
+
+        try:
+            with open(options["path"], "rb") as fileobj:
+                report = import_readings(
+                    fileobj,
+                    options["path"],
+                    organization,
+                    added_by=added_by,
+                    chunk_size=max(1, options["chunk_size"]),
+                    dry_run=options["dry_run"],
+                )
+        except (OSError, ImportFormatError) as exc:
+            raise CommandError(str(exc))
+
+        verb = "Would import" if options["dry_run"] else "Imported"
+        self.stdout.write(
+            f"{verb} {report.created} of {report.rows} rows: {report.duplicates} duplicates, "
+            f"{report.error_count} errors, {report.out_of_norm} out of norm."
+        )
+        for row_number, message in report.errors:
+            self.stdout.write(f"  row {row_number}: {message}")
+        if report.error_count > len(report.errors):
+            self.stdout.write(f"  ... and {report.error_count - len(report.errors)} more errors")
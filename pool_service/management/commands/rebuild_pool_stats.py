@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from pool_service.models import Pool
+from pool_service.services.pool_stats import refresh_pool_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the reading count and last reading values stored on each pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--organization", type=int, help="Only rebuild pools of this organization id.")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        pools = Pool.objects.order_by("id")
+        if options.get("organization"):
+            pools = pools.filter(organization_id=options["organization"])
+
+        total = 0
+        batch = []
+        for pool_id in pools.values_list("id", flat=True).iterator():
+            batch.append(pool_id)
+            if len(batch) >= batch_size:
+                total += refresh_pool_stats(batch)
+                batch = []
+        if batch:
+            total += refresh_pool_stats(batch)
+
+        self.stdout.write(f"Rebuilt reading statistics of {total} pools.")
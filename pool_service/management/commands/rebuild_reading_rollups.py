@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from pool_service.models import Pool
+from pool_service.services.rollups import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily and monthly water-chemistry rollups of each pool from its readings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--organization", type=int, help="Only rebuild pools of this organization id.")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        pools = Pool.objects.order_by("id")
+        if options.get("organization"):
+            pools = pools.filter(organization_id=options["organization"])
+
+        total = 0
+        batch = []
+        for pool_id in pools.values_list("id", flat=True).iterator():
+            batch.append(pool_id)
+            if len(batch) >= batch_size:
+                refresh_rollups(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            refresh_rollups(batch)
+            total += len(batch)
+
+        self.stdout.write(f"Rebuilt reading rollups of {total} pools.")
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from pool_service.models import CrmItem, Pool, SearchDocument
+from pool_service.services.search import index_crm_items, index_pools
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search documents of pools and CRM items."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--organization", type=int, help="Only rebuild objects of this organization id.")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        pools = Pool.objects.order_by("id")
+        items = CrmItem.objects.order_by("id")
+        if options.get("organization"):
+            pools = pools.filter(organization_id=options["organization"])
+            items = items.filter(organization_id=options["organization"])
+        else:
+            # Drop documents whose object is gone; a scoped rebuild leaves other organizations alone.
+            for kind, model in ((SearchDocument.KIND_POOL, Pool), (SearchDocument.KIND_CRM, CrmItem)):
+                SearchDocument.objects.filter(kind=kind).exclude(object_id__in=model.objects.values("id")).delete()
+
+        total_pools = self._rebuild(pools, index_pools, batch_size)
+        total_items = self._rebuild(items, index_crm_items, batch_size)
+        self.stdout.write(f"Indexed {total_pools} pools and {total_items} CRM items.")
+
+    def _rebuild(self, queryset, index, batch_size):
+        total = 0
+        batch = []
+        for object_id in queryset.values_list("id", flat=True).iterator():
+            batch.append(object_id)
+            if len(batch) >= batch_size:
+                total += index(batch)
+                batch = []
+        if batch:
+            total += index(batch)
+        return total
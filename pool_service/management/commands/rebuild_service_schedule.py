@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from pool_service.models import Pool
+from pool_service.services.schedule_store import regenerate_pool_schedules, schedule_horizon
+from pool_service.services.visit_state import refresh_pool_visit_states
+
+
+class Command(BaseCommand):
+    help = "Rebuild materialized service visit occurrences (run daily to roll the horizon forward)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument("--organization", type=int, help="Only rebuild pools of this organization id.")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        pools = Pool.objects.order_by("id")
+        if options.get("organization"):
+            pools = pools.filter(organization_id=options["organization"])
+
+        horizon_start, horizon_end = schedule_horizon()
+        total_pools = 0
+        total_rows = 0
+        batch = []
+        for pool_id in pools.values_list("id", flat=True).iterator():
+            batch.append(pool_id)
+            if len(batch) >= batch_size:
+                total_rows += self._rebuild(batch)
+                total_pools += len(batch)
+                batch = []
+        if batch:
+            total_rows += self._rebuild(batch)
+            total_pools += len(batch)
+
+        self.stdout.write(
+            f"Rebuilt {total_pools} pools, {total_rows} occurrences ({horizon_start} — {horizon_end})."
+        )
+
+    def _rebuild(self, pool_ids):
+        refresh_pool_visit_states(pool_ids)
+        return regenerate_pool_schedules(pool_ids)
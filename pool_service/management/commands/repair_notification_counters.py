@@ -0,0 +1,22 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from pool_service.services.notification_counters import recount_unread
+
+
+class Command(BaseCommand):
+    help = "Recount the per-user unread notification counters from the notifications."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only repair the counters of this username.")
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options.get("user"):
+            user = User.objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"User {options['user']} not found.")
+            user_ids = [user.id]
+
+        total = recount_unread(user_ids)
+        self.stdout.write(f"Recounted unread notifications of {total} users.")
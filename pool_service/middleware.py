@@ -1,7 +1,15 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 from django.utils import timezone
 from django.shortcuts import redirect
+from .db_router import PIN_COOKIE, SAFE_METHODS, replica_configured
 from .models import Profile
 from .seo import is_indexable_host
+from .services.permissions import AccessContext
+from .services.request_profiler import profile_request, profile_requested
+from .services.request_timing import RequestTimings, install_template_timer, log_slow_request
 
 
 class TimezoneMiddleware:
@@ -20,6 +28,19 @@ class TimezoneMiddleware:
         return self.get_response(request)
 
 
+class AccessContextMiddleware:
+    """
+    Attach ``request.access``, the user's organization, client and plan access computed once per request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.access = AccessContext(request.user, use_cache=settings.CACHE_IS_SHARED)
+        return self.get_response(request)
+
+
 class AuthRedirectMiddleware:
     """
     Redirect unauthenticated users to login page except for allowed paths.
@@ -66,3 +87,68 @@ class RobotsTagMiddleware:
         if not is_indexable_host(host):
             response["X-Robots-Tag"] = "noindex, nofollow"
         return response
+
+
+class ReplicaPinMiddleware:
+    """
+    Keep a browser on the primary database for a few seconds after it sent a write.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and replica_configured():
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=settings.DB_REPLICA_PIN_SECONDS,
+                secure=request.is_secure(),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class RequestTimingMiddleware:
+    """
+    Opt-in (``REQUEST_TIMING_ENABLED``) SQL, template and view timings of each request.
+
+    Superusers get them as a ``Server-Timing`` header; requests slower than
+    ``REQUEST_TIMING_SLOW_MS`` are logged with their slowest queries.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install_template_timer()
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        started = time.perf_counter()
+        with timings.capture():
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        user = getattr(request, "user", None)
+        if user is not None and user.is_superuser:
+            response["Server-Timing"] = timings.server_timing(total)
+        if total * 1000 >= settings.REQUEST_TIMING_SLOW_MS:
+            log_slow_request(request, response, timings, total)
+        return response
+
+
+class RequestProfileMiddleware:
+    """
+    Profile the view of a request a superuser asked for; see ``services.request_profiler``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profile_requested(request):
+            return self.get_response(request)
+        return profile_request(request, self.get_response)
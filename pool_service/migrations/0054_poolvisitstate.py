@@ -0,0 +1,60 @@
+from django.db import migrations, models
+from django.db.models import Max
+import django.db.models.deletion
+
+
+def fill_visit_states(apps, schema_editor):
+    Pool = apps.get_model("pool_service", "Pool")
+    PoolVisitState = apps.get_model("pool_service", "PoolVisitState")
+    OrganizationAccess = apps.get_model("pool_service", "OrganizationAccess")
+    WaterReading = apps.get_model("pool_service", "WaterReading")
+
+    staff_by_org = {}
+    for org_id, user_id in OrganizationAccess.objects.filter(user__is_active=True).values_list(
+        "organization_id",
+        "user_id",
+    ):
+        staff_by_org.setdefault(org_id, set()).add(user_id)
+
+    states = []
+    for pool_id, org_id in Pool.objects.values_list("id", "organization_id").iterator():
+        last_visit_at = None
+        staff_ids = staff_by_org.get(org_id)
+        if staff_ids:
+            last_visit_at = WaterReading.objects.filter(
+                pool_id=pool_id,
+                added_by_id__in=staff_ids,
+            ).aggregate(last=Max("date"))["last"]
+        states.append(PoolVisitState(pool_id=pool_id, last_visit_at=last_visit_at))
+        if len(states) >= 500:
+            PoolVisitState.objects.bulk_create(states)
+            states = []
+    if states:
+        PoolVisitState.objects.bulk_create(states)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pool_service", "0053_notification_task_assignment_kind"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PoolVisitState",
+            fields=[
+                (
+                    "pool",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="visit_state",
+                        serialize=False,
+                        to="pool_service.pool",
+                    ),
+                ),
+                ("last_visit_at", models.DateTimeField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(fill_visit_states, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pool_service", "0054_poolvisitstate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="poolvisitstate",
+            name="schedule_start",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="poolvisitstate",
+            name="schedule_end",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="ServiceOccurrence",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("source_week_start", models.DateField()),
+                ("due_date", models.DateField()),
+                ("planned_date", models.DateField(blank=True, null=True)),
+                ("actual_date", models.DateField(blank=True, null=True)),
+                ("display_date", models.DateField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("planned", "Запланирован"), ("done", "Выполнен"), ("overdue", "Просрочен")],
+                        max_length=16,
+                    ),
+                ),
+                ("is_extra", models.BooleanField(default=False)),
+                ("generated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "plan",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="pool_service.servicevisitplan",
+                    ),
+                ),
+                (
+                    "pool",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="service_occurrences",
+                        to="pool_service.pool",
+                    ),
+                ),
+                (
+                    "reading",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="pool_service.waterreading",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["pool", "display_date"], name="occurrence_pool_date_idx")],
+            },
+        ),
+    ]
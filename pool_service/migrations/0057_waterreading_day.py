@@ -0,0 +1,57 @@
+from django.db import migrations, models
+from django.utils import timezone
+
+
+BATCH_SIZE = 1000
+
+
+def fill_reading_days(apps, schema_editor):
+    WaterReading = apps.get_model("pool_service", "WaterReading")
+
+    last_id = 0
+    while True:
+        batch = list(
+            WaterReading.objects.filter(id__gt=last_id, day__isnull=True)
+            .order_by("id")
+            .only("id", "date")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for reading in batch:
+            value = reading.date
+            if timezone.is_aware(value):
+                value = timezone.localtime(value)
+            reading.day = value.date()
+        WaterReading.objects.bulk_update(batch, ["day"])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+    # Each backfill batch commits on its own, so large tables are not held in one transaction.
+    atomic = False
+
+    dependencies = [
+        ("pool_service", "0056_waterreading_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="waterreading",
+            name="day",
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_reading_days, reverse_code=migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="waterreading",
+            name="day",
+            field=models.DateField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="waterreading",
+            index=models.Index(fields=["pool", "day"], name="reading_pool_day_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="waterreading",
+            index=models.Index(fields=["pool", "added_by", "day"], name="reading_pool_user_day_idx"),
+        ),
+    ]
@@ -0,0 +1,100 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+import django.db.models.deletion
+
+
+BATCH_SIZE = 500
+
+
+def fill_reading_stats(apps, schema_editor):
+    Pool = apps.get_model("pool_service", "Pool")
+    WaterReading = apps.get_model("pool_service", "WaterReading")
+
+    latest = WaterReading.objects.filter(pool_id=OuterRef("pk")).order_by("-day", "-date", "-id").values("id")[:1]
+    last_id = 0
+    while True:
+        pools = list(
+            Pool.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .annotate(last_reading_id=Subquery(latest))
+            .only("id")[:BATCH_SIZE]
+        )
+        if not pools:
+            break
+        counts = dict(
+            WaterReading.objects.filter(pool_id__in=[pool.id for pool in pools])
+            .values("pool_id")
+            .annotate(total=Count("id"))
+            .values_list("pool_id", "total")
+        )
+        readings = WaterReading.objects.in_bulk([pool.last_reading_id for pool in pools if pool.last_reading_id])
+        for pool in pools:
+            reading = readings.get(pool.last_reading_id)
+            pool.readings_count = counts.get(pool.id, 0)
+            if reading:
+                pool.last_reading_at = reading.date
+                pool.last_ph = reading.ph
+                pool.last_cl_free = reading.cl_free
+                pool.last_cl_total = reading.cl_total
+                pool.last_reading_by_id = reading.added_by_id
+        Pool.objects.bulk_update(
+            pools,
+            ["readings_count", "last_reading_at", "last_ph", "last_cl_free", "last_cl_total", "last_reading_by"],
+        )
+        last_id = pools[-1].id
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("pool_service", "0057_waterreading_day"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pool",
+            name="readings_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="pool",
+            name="last_reading_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="pool",
+            name="last_ph",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="pool",
+            name="last_cl_free",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="pool",
+            name="last_cl_total",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="pool",
+            name="last_reading_by",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pool",
+            index=models.Index(
+                fields=["organization", "service_suspended", "last_reading_at"],
+                name="pool_org_recent_idx",
+            ),
+        ),
+        migrations.RunPython(fill_reading_stats, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,143 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+FTS_TABLE = "pool_service_searchdocument_fts"
+DOCUMENT_TABLE = "pool_service_searchdocument"
+FULLTEXT_INDEX = "searchdoc_body_ft"
+BATCH_SIZE = 500
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "mysql":
+        schema_editor.execute(f"ALTER TABLE {DOCUMENT_TABLE} ADD FULLTEXT INDEX {FULLTEXT_INDEX} (body)")
+    elif vendor == "sqlite":
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if not cursor.fetchone()[0]:
+                return
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"body, content='{DOCUMENT_TABLE}', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {DOCUMENT_TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, body) VALUES (new.id, new.body); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {DOCUMENT_TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, body) VALUES ('delete', old.id, old.body); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {DOCUMENT_TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, body) VALUES ('delete', old.id, old.body); "
+            f"INSERT INTO {FTS_TABLE}(rowid, body) VALUES (new.id, new.body); END"
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "mysql":
+        schema_editor.execute(f"ALTER TABLE {DOCUMENT_TABLE} DROP INDEX {FULLTEXT_INDEX}")
+    elif vendor == "sqlite":
+        for suffix in ("ai", "ad", "au"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def _body(*parts):
+    return " ".join(str(part) for part in parts if part).casefold()
+
+
+def fill_search_documents(apps, schema_editor):
+    Pool = apps.get_model("pool_service", "Pool")
+    CrmItem = apps.get_model("pool_service", "CrmItem")
+    SearchDocument = apps.get_model("pool_service", "SearchDocument")
+
+    documents = []
+    for pool in Pool.objects.select_related("client", "organization").iterator(chunk_size=BATCH_SIZE):
+        client = pool.client
+        documents.append(
+            SearchDocument(
+                kind="pool",
+                object_id=pool.id,
+                organization_id=pool.organization_id or (client.organization_id if client else None),
+                body=_body(
+                    client.name if client else "",
+                    pool.address,
+                    pool.organization.name if pool.organization_id else "",
+                ),
+            )
+        )
+        if len(documents) >= BATCH_SIZE:
+            SearchDocument.objects.bulk_create(documents)
+            documents = []
+
+    items = CrmItem.objects.select_related("client", "pool", "responsible", "organization")
+    for item in items.iterator(chunk_size=BATCH_SIZE):
+        client = item.client
+        responsible = item.responsible
+        documents.append(
+            SearchDocument(
+                kind="crm",
+                object_id=item.id,
+                organization_id=item.organization_id,
+                body=_body(
+                    item.title,
+                    client.name if client else "",
+                    client.company_name if client else "",
+                    item.pool.address if item.pool_id else "",
+                    item.description,
+                    item.service_works,
+                    item.equipment_replacement,
+                    item.photo_url,
+                    item.stage,
+                    item.urgency,
+                    responsible.first_name if responsible else "",
+                    responsible.last_name if responsible else "",
+                    responsible.username if responsible else "",
+                    item.organization.name,
+                ),
+            )
+        )
+        if len(documents) >= BATCH_SIZE:
+            SearchDocument.objects.bulk_create(documents)
+            documents = []
+    if documents:
+        SearchDocument.objects.bulk_create(documents)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pool_service", "0058_pool_reading_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("kind", models.CharField(choices=[("pool", "Объект"), ("crm", "Заявка CRM")], max_length=16)),
+                ("object_id", models.PositiveIntegerField()),
+                ("body", models.TextField(blank=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="pool_service.organization",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["kind", "organization"], name="search_kind_org_idx")],
+                "constraints": [models.UniqueConstraint(fields=["kind", "object_id"], name="uniq_search_document")],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, reverse_code=drop_fulltext_index),
+        migrations.RunPython(fill_search_documents, reverse_code=migrations.RunPython.noop),
+    ]
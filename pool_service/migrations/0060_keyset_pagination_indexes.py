@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pool_service", "0059_searchdocument"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="waterreading",
+            index=models.Index(fields=["pool", "date"], name="reading_pool_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(fields=["user", "is_resolved", "created_at"], name="notif_user_open_created_idx"),
+        ),
+        migrations.RemoveIndex(
+            model_name="notification",
+            name="notif_user_resolved_idx",
+        ),
+    ]
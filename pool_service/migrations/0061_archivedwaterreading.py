@@ -0,0 +1,65 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pool_service", "0060_keyset_pagination_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pool",
+            name="archived_readings_until",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name="ArchivedWaterReading",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("uuid", models.UUIDField(editable=False, unique=True)),
+                ("date", models.DateTimeField()),
+                ("day", models.DateField()),
+                ("temperature", models.FloatField(blank=True, null=True)),
+                ("ph", models.FloatField(blank=True, null=True)),
+                ("cl_free", models.FloatField(blank=True, null=True)),
+                ("cl_total", models.FloatField(blank=True, null=True)),
+                ("ph_dosing_station", models.FloatField(blank=True, null=True)),
+                ("cl_free_dosing_station", models.FloatField(blank=True, null=True)),
+                ("cl_total_dosing_station", models.FloatField(blank=True, null=True)),
+                ("redox_dosing_station", models.FloatField(blank=True, null=True)),
+                ("comment", models.TextField(blank=True, null=True)),
+                ("required_materials", models.TextField(blank=True, null=True)),
+                ("performed_works", models.TextField(blank=True, null=True)),
+                ("consumables_replaced", models.TextField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "added_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "pool",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_readings",
+                        to="pool_service.pool",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["pool", "date"], name="archived_reading_pool_date_idx"),
+                    models.Index(fields=["pool", "day"], name="archived_reading_pool_day_idx"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pool_service", "0061_archivedwaterreading"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReadingRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("period", models.CharField(choices=[("day", "День"), ("month", "Месяц")], max_length=8)),
+                ("period_start", models.DateField()),
+                (
+                    "metric",
+                    models.CharField(
+                        choices=[
+                            ("ph", "pH"),
+                            ("cl_free", "Свободный хлор"),
+                            ("cl_total", "Общий хлор"),
+                            ("temperature", "Температура"),
+                            ("redox", "Redox"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("out_of_norm_count", models.PositiveIntegerField(default=0)),
+                ("value_sum", models.FloatField(default=0)),
+                ("min_value", models.FloatField(blank=True, null=True)),
+                ("max_value", models.FloatField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "pool",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reading_rollups",
+                        to="pool_service.pool",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("pool", "period", "period_start", "metric"),
+                        name="unique_reading_rollup",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+import django.db.models.deletion
+
+
+def fill_notification_counters(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    Notification = apps.get_model("pool_service", "Notification")
+    NotificationCounter = apps.get_model("pool_service", "NotificationCounter")
+
+    counts = {
+        row["user_id"]: row
+        for row in Notification.objects.filter(is_read=False, is_resolved=False)
+        .order_by()
+        .values("user_id")
+        .annotate(
+            tasks=Count("id", filter=Q(kind="task_assignment")),
+            limits=Count("id", filter=~Q(kind="task_assignment")),
+        )
+    }
+    empty = {"tasks": 0, "limits": 0}
+    NotificationCounter.objects.bulk_create(
+        [
+            NotificationCounter(
+                user_id=user_id,
+                tasks_unread=counts.get(user_id, empty)["tasks"],
+                limits_unread=counts.get(user_id, empty)["limits"],
+            )
+            for user_id in User.objects.values_list("id", flat=True).iterator()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("pool_service", "0062_readingrollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationCounter",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="notification_counter",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("tasks_unread", models.PositiveIntegerField(default=0)),
+                ("limits_unread", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(fill_notification_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+import datetime
+
+from django.db import migrations, models
+
+
+def clear_occurrences(apps, schema_editor):
+    # Rows without a window cannot be read back; pools fall back to the live replay
+    # until rebuild_service_schedule materializes them again.
+    apps.get_model("pool_service", "ServiceOccurrence").objects.all().delete()
+    apps.get_model("pool_service", "PoolVisitState").objects.update(schedule_start=None, schedule_end=None)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pool_service", "0065_pushoutbox"),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_occurrences, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="serviceoccurrence",
+            name="occurrence_pool_date_idx",
+        ),
+        migrations.AddField(
+            model_name="serviceoccurrence",
+            name="window_start",
+            field=models.DateField(default=datetime.date(2000, 1, 1)),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="serviceoccurrence",
+            index=models.Index(fields=["pool", "window_start"], name="occurrence_pool_window_idx"),
+        ),
+    ]
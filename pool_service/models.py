@@ -202,6 +202,47 @@ class Pool(models.Model):
     water_contact_phone = models.CharField(max_length=30, null=True, blank=True)
     water_access_notes = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
+    # Reading statistics, maintained by services.pool_stats.
+    readings_count = models.PositiveIntegerField(default=0, editable=False)
+    last_reading_at = models.DateTimeField(null=True, blank=True, editable=False)
+    last_ph = models.FloatField(null=True, blank=True, editable=False)
+    last_cl_free = models.FloatField(null=True, blank=True, editable=False)
+    last_cl_total = models.FloatField(null=True, blank=True, editable=False)
+    last_reading_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="+",
+    )
+    # Date of the newest reading moved to ArchivedWaterReading; None while nothing is archived.
+    archived_readings_until = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["organization", "service_suspended", "last_reading_at"], name="pool_org_recent_idx"),
+        ]
+
+    READING_STATS_FIELDS = (
+        "readings_count",
+        "last_reading_at",
+        "last_ph",
+        "last_cl_free",
+        "last_cl_total",
+        "last_reading_by",
+    )
+    DERIVED_FIELDS = (*READING_STATS_FIELDS, "archived_readings_until")
+
+    def save(self, *args, **kwargs):
+        # Statistics are updated in place as readings change; a stale instance must not overwrite them.
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DERIVED_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         org_name = self.organization.name if self.organization else "без организации"
@@ -265,6 +306,13 @@ class OrganizationAccess(models.Model):
             )
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The membership as loaded, so a save that only changes the role can skip refreshing visit states.
+        instance.loaded_membership = (instance.__dict__.get("user_id"), instance.__dict__.get("organization_id"))
+        return instance
+
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.organization.name} ({self.role})"
 
@@ -572,7 +620,7 @@ class Notification(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=["user", "is_read"], name="notif_user_read_idx"),
-            models.Index(fields=["user", "is_resolved"], name="notif_user_resolved_idx"),
+            models.Index(fields=["user", "is_resolved", "created_at"], name="notif_user_open_created_idx"),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -582,10 +630,37 @@ class Notification(models.Model):
             )
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Whether the row counted as unread when loaded, so a save can adjust the unread counters.
+        instance.loaded_unread = instance.is_unread
+        return instance
+
+    @property
+    def is_unread(self):
+        return not self.__dict__.get("is_read", True) and not self.__dict__.get("is_resolved", True)
+
     def __str__(self):
         return f"{self.title} ({self.user_id})"
 
 
+class NotificationCounter(models.Model):
+    """Unread, unresolved notifications of a user per notifications tab, kept in step with ``Notification``."""
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="notification_counter")
+    tasks_unread = models.PositiveIntegerField(default=0)
+    limits_unread = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def total_unread(self):
+        return self.tasks_unread + self.limits_unread
+
+    def __str__(self):
+        return f"Unread notifications of {self.user_id}"
+
+
 class PushSubscription(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="push_subscriptions")
     endpoint = models.CharField(max_length=512, unique=True)
@@ -599,10 +674,46 @@ class PushSubscription(models.Model):
         return f"Push subscription {self.user_id}"
 
 
+class PushOutbox(models.Model):
+    """One push message to one subscription, queued by requests and sent by ``deliver_push``."""
+
+    STATUS_PENDING = "pending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_EXPIRED = "expired"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "pending"),
+        (STATUS_SENT, "sent"),
+        (STATUS_FAILED, "failed"),
+        (STATUS_EXPIRED, "expired"),
+    ]
+
+    subscription = models.ForeignKey(PushSubscription, on_delete=models.CASCADE, related_name="outbox")
+    payload = models.JSONField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Also the lease of a worker that claimed the message: claiming moves it forward.
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+    last_error = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="push_outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"Push {self.id} to {self.subscription_id} ({self.status})"
+
+
 class WaterReading(models.Model):
     uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
     pool = models.ForeignKey(Pool, on_delete=models.CASCADE, related_name="waterreading")
     date = models.DateTimeField()
+    # Calendar day of ``date``, kept so day-range filters can use the composite indexes.
+    day = models.DateField(editable=False)
     added_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     temperature = models.FloatField(null=True, blank=True)
     ph = models.FloatField(null=True, blank=True)
@@ -616,11 +727,164 @@ class WaterReading(models.Model):
     required_materials = models.TextField(null=True, blank=True)
     performed_works = models.TextField(null=True, blank=True)
     consumables_replaced = models.TextField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["pool", "day"], name="reading_pool_day_idx"),
+            models.Index(fields=["pool", "date"], name="reading_pool_date_idx"),
+            models.Index(fields=["pool", "added_by", "day"], name="reading_pool_user_day_idx"),
+        ]
+
+    @staticmethod
+    def day_of(value):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.date()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The day the row had when loaded, so an edit that moves the reading can refresh both days.
+        instance.loaded_day = instance.__dict__.get("day")
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.date:
+            self.day = self.day_of(self.date)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "date" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "day"}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.pool.address} - {self.date.strftime('%d.%m.%Y %H:%M')}"
 
 
+class ArchivedWaterReading(models.Model):
+    """A water reading moved out of the hot table by ``archive_readings``; keeps the original id and uuid."""
+
+    id = models.BigIntegerField(primary_key=True)
+    uuid = models.UUIDField(unique=True, editable=False)
+    pool = models.ForeignKey(Pool, on_delete=models.CASCADE, related_name="archived_readings")
+    date = models.DateTimeField()
+    day = models.DateField()
+    added_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    temperature = models.FloatField(null=True, blank=True)
+    ph = models.FloatField(null=True, blank=True)
+    cl_free = models.FloatField(null=True, blank=True)
+    cl_total = models.FloatField(null=True, blank=True)
+    ph_dosing_station = models.FloatField(null=True, blank=True)
+    cl_free_dosing_station = models.FloatField(null=True, blank=True)
+    cl_total_dosing_station = models.FloatField(null=True, blank=True)
+    redox_dosing_station = models.FloatField(null=True, blank=True)
+    comment = models.TextField(null=True, blank=True)
+    required_materials = models.TextField(null=True, blank=True)
+    performed_works = models.TextField(null=True, blank=True)
+    consumables_replaced = models.TextField(null=True, blank=True)
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["pool", "date"], name="archived_reading_pool_date_idx"),
+            models.Index(fields=["pool", "day"], name="archived_reading_pool_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.pool_id} - {self.date.strftime('%d.%m.%Y %H:%M')} (archived)"
+
+
+class ReadingRollup(models.Model):
+    """Aggregate of one water-chemistry metric of a pool over a day or a month, kept by services.rollups."""
+
+    PERIOD_DAY = "day"
+    PERIOD_MONTH = "month"
+    PERIOD_CHOICES = [
+        (PERIOD_DAY, "День"),
+        (PERIOD_MONTH, "Месяц"),
+    ]
+
+    METRIC_CHOICES = [
+        ("ph", "pH"),
+        ("cl_free", "Свободный хлор"),
+        ("cl_total", "Общий хлор"),
+        ("temperature", "Температура"),
+        ("redox", "Redox"),
+    ]
+
+    pool = models.ForeignKey(Pool, on_delete=models.CASCADE, related_name="reading_rollups")
+    period = models.CharField(max_length=8, choices=PERIOD_CHOICES)
+    # The day itself, or the first day of the month.
+    period_start = models.DateField()
+    metric = models.CharField(max_length=16, choices=METRIC_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+    out_of_norm_count = models.PositiveIntegerField(default=0)
+    value_sum = models.FloatField(default=0)
+    min_value = models.FloatField(null=True, blank=True)
+    max_value = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["pool", "period", "period_start", "metric"],
+                name="unique_reading_rollup",
+            ),
+        ]
+
+    @property
+    def avg_value(self):
+        return self.value_sum / self.count if self.count else None
+
+    def __str__(self):
+        return f"{self.pool_id} {self.metric} {self.period} {self.period_start}"
+
+
+class PoolVisitState(models.Model):
+    pool = models.OneToOneField(Pool, on_delete=models.CASCADE, primary_key=True, related_name="visit_state")
+    last_visit_at = models.DateTimeField(null=True, blank=True)
+    schedule_start = models.DateField(null=True, blank=True)
+    schedule_end = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Visit state {self.pool_id}"
+
+
+class ServiceOccurrence(models.Model):
+    STATUS_PLANNED = "planned"
+    STATUS_DONE = "done"
+    STATUS_OVERDUE = "overdue"
+    STATUS_CHOICES = [
+        (STATUS_PLANNED, "Запланирован"),
+        (STATUS_DONE, "Выполнен"),
+        (STATUS_OVERDUE, "Просрочен"),
+    ]
+
+    pool = models.ForeignKey(Pool, on_delete=models.CASCADE, related_name="service_occurrences")
+    # First day of the month grid the row was replayed for; grids of adjacent months overlap.
+    window_start = models.DateField()
+    source_week_start = models.DateField()
+    due_date = models.DateField()
+    planned_date = models.DateField(null=True, blank=True)
+    actual_date = models.DateField(null=True, blank=True)
+    display_date = models.DateField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES)
+    is_extra = models.BooleanField(default=False)
+    plan = models.ForeignKey(ServiceVisitPlan, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    reading = models.ForeignKey(WaterReading, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    generated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["pool", "window_start"], name="occurrence_pool_window_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.pool_id} {self.display_date} ({self.status})"
+
+
 class ServiceTask(models.Model):
     VISIBILITY_PUBLIC = "public"
     VISIBILITY_PRIVATE = "private"
@@ -716,3 +980,53 @@ class ServiceTaskChange(models.Model):
 
     def __str__(self):
         return f"{self.task_id} {self.action}"
+
+
+class SearchDocument(models.Model):
+    KIND_POOL = "pool"
+    KIND_CRM = "crm"
+    KIND_CHOICES = [
+        (KIND_POOL, "Объект"),
+        (KIND_CRM, "Заявка CRM"),
+    ]
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, null=True, blank=True)
+    # Casefolded text of the indexed fields; full-text indexed by the database (see services.search).
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="uniq_search_document"),
+        ]
+        indexes = [
+            models.Index(fields=["kind", "organization"], name="search_kind_org_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
+
+
+class RequestProfile(models.Model):
+    """A profile of one request, taken on demand by ``RequestProfileMiddleware``."""
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    method = models.CharField(max_length=8)
+    path = models.CharField(max_length=400)
+    view_name = models.CharField(max_length=120, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    queries = models.PositiveIntegerField(default=0)
+    sql_ms = models.FloatField(default=0)
+    # cProfile stats (``python -m pstats``, snakeviz) and sampled stacks in the collapsed format of flamegraph.pl / speedscope.
+    stats_file = models.FileField(upload_to="profiles/%Y/%m/")
+    flamegraph_file = models.FileField(upload_to="profiles/%Y/%m/", blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from django.db import connections
+
+
+def bulk_upsert(model, objects, unique_fields, update_fields, batch_size=None):
+    """``bulk_create`` that updates rows conflicting on ``unique_fields``.
+
+    MySQL infers the conflict target from the table's unique keys and rejects an
+    explicit one, so ``unique_fields`` is only passed where the backend accepts it.
+    """
+    features = connections[model.objects.db].features
+    return model.objects.bulk_create(
+        objects,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=unique_fields if features.supports_update_conflicts_with_target else None,
+        update_fields=update_fields,
+    )
@@ -0,0 +1,100 @@
+"""Shared per-organization cache of the computed service calendar.
+
+Everything that does not depend on the viewer (occurrences, pool responsibles,
+organization tasks) is computed once per organization and range and stored
+under the organization's data version. Signals and ``regenerate_pool_schedules``
+replace the version on every relevant write, so stale entries are never read
+and simply expire. A version bumped in one worker's LocMem cache is not seen by
+the others, so without a shared cache (``CACHE_IS_SHARED``) nothing is cached.
+"""
+from __future__ import annotations
+
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from pool_service.db_router import replica_reads
+from pool_service.models import OrganizationAccess, Pool, PoolAccess, ServiceTask
+from pool_service.services.permissions import ORG_STAFF_ROLES
+from pool_service.services.schedule import is_scheduled
+from pool_service.services.schedule_store import occurrences_for_pools
+
+
+def _version_key(org_id):
+    return f"calendar:version:{org_id}"
+
+
+def organization_calendar_version(org_id):
+    key = _version_key(org_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid4().hex
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key) or version
+    return version
+
+
+def bump_calendar_versions(org_ids):
+    versions = {_version_key(org_id): uuid4().hex for org_id in set(org_ids) if org_id}
+    if versions:
+        cache.set_many(versions, timeout=None)
+
+
+def pool_responsibles(pool_ids, org_ids):
+    """First active org staff member with access to each pool, by name."""
+    responsible_by_pool = {}
+    org_staff_ids = set(
+        OrganizationAccess.objects.filter(
+            organization_id__in=org_ids,
+            role__in=ORG_STAFF_ROLES,
+            user__is_active=True,
+        ).values_list("user_id", flat=True)
+    )
+    if org_staff_ids:
+        for access in (
+            PoolAccess.objects.filter(pool_id__in=pool_ids, user_id__in=org_staff_ids, user__is_active=True)
+            .select_related("user")
+            .order_by("pool_id", "user__last_name", "user__first_name")
+        ):
+            if access.pool_id not in responsible_by_pool:
+                responsible_by_pool[access.pool_id] = access.user
+    return responsible_by_pool
+
+
+def build_organization_schedule(org_id, range_start, range_end, today):
+    pools = [
+        pool
+        for pool in Pool.objects.filter(organization_id=org_id)
+        if not pool.service_suspended and is_scheduled(pool)
+    ]
+    tasks = (
+        ServiceTask.objects.filter(organization_id=org_id)
+        .filter(
+            Q(end_date__isnull=True, start_date__lte=range_end, start_date__gte=range_start)
+            | Q(end_date__isnull=False, start_date__lte=range_end, end_date__gte=range_start)
+        )
+        .prefetch_related("responsibles")
+        .order_by("id")
+    )
+    return {
+        "occurrences": occurrences_for_pools(pools, range_start, range_end, today=today),
+        "responsibles": pool_responsibles([pool.id for pool in pools], [org_id]),
+        "tasks": list(tasks),
+    }
+
+
+def organization_schedule(org_id, range_start, range_end, today):
+    """Viewer-independent calendar data for one organization, cached per data version."""
+    if not settings.CACHE_IS_SHARED:
+        return build_organization_schedule(org_id, range_start, range_end, today)
+    version = organization_calendar_version(org_id)
+    key = f"calendar:schedule:{org_id}:{range_start.isoformat()}:{range_end.isoformat()}:{today.isoformat()}:{version}"
+    data = cache.get(key)
+    if data is None:
+        # The entry outlives this request, so build it from the primary rather than a lagging replica.
+        with replica_reads(False):
+            data = build_organization_schedule(org_id, range_start, range_end, today)
+        cache.set(key, data, timeout=getattr(settings, "SERVICE_CALENDAR_CACHE_TIMEOUT", 600))
+    return data
@@ -0,0 +1,104 @@
+"""Per-user counters of unread notifications, one per notifications tab.
+
+``NotificationCounter`` holds the number of unread, unresolved notifications of
+each tab, so the header badge and the tab badges read one row instead of
+counting notifications on every page. Saves and deletes of single notifications
+adjust the counters through signals; bulk inserts (``notify_users``) and the bulk
+actions below adjust them by the number of rows they changed. A missing counter
+is recounted on first read, and ``repair_notification_counters`` recounts them all.
+"""
+
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from pool_service.db_router import replica_reads
+from pool_service.models import Notification, NotificationCounter
+from pool_service.services.bulk import bulk_upsert
+
+
+NOTIFICATION_TABS = {
+    "tasks": Q(kind="task_assignment"),
+    "limits": ~Q(kind="task_assignment"),
+}
+COUNTER_FIELDS = {"tasks": "tasks_unread", "limits": "limits_unread"}
+
+
+def tab_of(kind):
+    return "tasks" if kind == "task_assignment" else "limits"
+
+
+def adjust_unread(user_ids, changes):
+    """Add ``{tab: delta}`` to the counters of ``user_ids``; users without a counter row are recounted on read instead."""
+    values = {
+        COUNTER_FIELDS[tab]: Greatest(F(COUNTER_FIELDS[tab]) + delta, 0)
+        for tab, delta in changes.items()
+        if delta
+    }
+    if values:
+        NotificationCounter.objects.filter(user_id__in=list(user_ids)).update(**values, updated_at=timezone.now())
+
+
+def recount_unread(user_ids=None):
+    """Recount the counters of ``user_ids`` (of everyone if None) from the notifications; return how many were stored."""
+    unread = Notification.objects.filter(is_read=False, is_resolved=False)
+    counters = NotificationCounter.objects.all()
+    if user_ids is not None:
+        user_ids = set(user_ids)
+        unread = unread.filter(user_id__in=user_ids)
+        counters = counters.filter(user_id__in=user_ids)
+    rows = unread.order_by().values("user_id").annotate(
+        **{field: Count("id", filter=NOTIFICATION_TABS[tab]) for tab, field in COUNTER_FIELDS.items()}
+    )
+    # The counts are stored, so they are read from the primary even on replica pages.
+    with replica_reads(False):
+        recounted = {
+            row["user_id"]: NotificationCounter(user_id=row["user_id"], **{field: row[field] for field in COUNTER_FIELDS.values()})
+            for row in rows
+        }
+    for user_id in user_ids or ():
+        recounted.setdefault(user_id, NotificationCounter(user_id=user_id))
+    with transaction.atomic():
+        # Counters of users left without unread notifications are not in ``recounted``.
+        counters.update(**{field: 0 for field in COUNTER_FIELDS.values()}, updated_at=timezone.now())
+        bulk_upsert(
+            NotificationCounter,
+            list(recounted.values()),
+            unique_fields=["user"],
+            update_fields=[*COUNTER_FIELDS.values(), "updated_at"],
+            batch_size=500,
+        )
+    return len(recounted)
+
+
+def unread_counts(user):
+    """``{"tasks": n, "limits": n, "total": n}`` of the user's unread, unresolved notifications."""
+    # The counter may have just been changed by this user's own request, so it is read from the primary.
+    with replica_reads(False):
+        counter = NotificationCounter.objects.filter(user_id=user.pk).first()
+        if counter is None:
+            recount_unread([user.pk])
+            counter = NotificationCounter.objects.get(user_id=user.pk)
+    counts = {tab: getattr(counter, field) for tab, field in COUNTER_FIELDS.items()}
+    counts["total"] = counter.total_unread
+    return counts
+
+
+def mark_notifications(user, tab=None, resolve=False):
+    """Mark the user's open notifications of ``tab`` (all tabs if None) read, or resolved, and adjust the counters."""
+    values = {"is_read": True}
+    if resolve:
+        values.update(is_resolved=True, resolved_at=timezone.now())
+    changes = {}
+    with transaction.atomic():
+        for name, tab_filter in NOTIFICATION_TABS.items():
+            if tab not in (None, name):
+                continue
+            open_notes = Notification.objects.filter(user=user, is_resolved=False).filter(tab_filter)
+            changes[name] = -open_notes.filter(is_read=False).update(**values)
+            if resolve:
+                open_notes.update(**values)
+        adjust_unread([user.pk], changes)
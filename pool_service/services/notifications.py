@@ -1,9 +1,11 @@
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.urls import reverse
 
 from pool_service.models import Notification, OrganizationAccess, OrganizationWaterNorms
-from pool_service.services.push_notifications import send_push_to_users
+from pool_service.services.notification_counters import adjust_unread, tab_of
+from pool_service.services.push_notifications import queue_push_to_users
 
 
 READING_LABELS = {
@@ -13,11 +15,8 @@ READING_LABELS = {
 }
 
 
-def _limits_for_org(organization):
+def _limits_from_norms(norms):
     base = getattr(settings, "WATER_READING_LIMITS", {})
-    if not organization:
-        return base
-    norms = OrganizationWaterNorms.objects.filter(organization=organization).first()
     if not norms:
         return base
 
@@ -41,7 +40,19 @@ def _limits_for_org(organization):
     return limits
 
 
-def _reading_violations(reading, limits):
+def _limits_for_org(organization):
+    if not organization:
+        return getattr(settings, "WATER_READING_LIMITS", {})
+    return _limits_from_norms(OrganizationWaterNorms.objects.filter(organization=organization).first())
+
+
+def limits_by_organization(org_ids):
+    """Reading limits for each organization id (None: no organization) in one query."""
+    norms = {norms.organization_id: norms for norms in OrganizationWaterNorms.objects.filter(organization_id__in=org_ids)}
+    return {org_id: _limits_from_norms(norms.get(org_id)) for org_id in set(org_ids)}
+
+
+def reading_violations(reading, limits):
     violations = []
     for field, label in READING_LABELS.items():
         value = getattr(reading, field, None)
@@ -59,28 +70,6 @@ def _reading_violations(reading, limits):
     return violations
 
 
-def _create_notification(user, *, title, message, kind, level="info", action_url="", organization=None, client=None, pool=None, dedupe_key=""):
-    payload = {
-        "title": title,
-        "message": message,
-        "kind": kind,
-        "level": level,
-        "action_url": action_url,
-        "organization": organization,
-        "client": client,
-        "pool": pool,
-        "dedupe_key": dedupe_key or "",
-    }
-    if dedupe_key:
-        obj, created = Notification.objects.get_or_create(
-            user=user,
-            dedupe_key=dedupe_key,
-            defaults=payload,
-        )
-        return obj, created
-    return Notification.objects.create(user=user, **payload), True
-
-
 def notify_users(
     users,
     *,
@@ -95,28 +84,57 @@ def notify_users(
     dedupe_key="",
     send_push=True,
 ):
-    created = []
-    created_users = {}
+    """Create one notification per active user in a single insert and push it to them; return the created ones.
+
+    With a ``dedupe_key``, users who already have a notification with that key are
+    skipped, and ``unique_notification_dedupe`` drops the rows a concurrent call
+    inserted first; nothing is locked. An insert that ignores conflicts does not
+    return ids, so the keys created here are read back with one more query, and
+    only those rows are counted and pushed. Two calls racing on the same key may
+    both count a row; ``repair_notification_counters`` recounts such drift.
+    ``bulk_create`` sends no signals, so the unread counters are adjusted here with
+    ``F()`` increments.
+    """
+    recipients = {}
     for user in users:
-        if not user or not user.is_active:
-            continue
-        obj, was_created = _create_notification(
-            user,
-            title=title,
-            message=message,
-            kind=kind,
-            level=level,
-            action_url=action_url,
-            organization=organization,
-            client=client,
-            pool=pool,
-            dedupe_key=dedupe_key,
-        )
-        if was_created:
-            created.append(obj)
-            created_users[user.id] = user
-    if send_push and created_users:
-        send_push_to_users(created_users.values(), title=title, message=message, action_url=action_url)
+        if user and user.is_active:
+            recipients.setdefault(user.id, user)
+    if not recipients:
+        return []
+
+    payload = {
+        "title": title,
+        "message": message,
+        "kind": kind,
+        "level": level,
+        "action_url": action_url,
+        "organization": organization,
+        "client": client,
+        "pool": pool,
+        "dedupe_key": dedupe_key or "",
+    }
+    with transaction.atomic():
+        if dedupe_key:
+            existing = Notification.objects.filter(dedupe_key=dedupe_key, user_id__in=list(recipients))
+            for user_id in existing.values_list("user_id", flat=True):
+                recipients.pop(user_id, None)
+            if not recipients:
+                return []
+        notifications = [Notification(user=user, **payload) for user in recipients.values()]
+        if dedupe_key:
+            Notification.objects.bulk_create(notifications, ignore_conflicts=True)
+            created = list(Notification.objects.filter(dedupe_key=dedupe_key, user_id__in=list(recipients)))
+        else:
+            created = Notification.objects.bulk_create(notifications)
+        adjust_unread([notification.user_id for notification in created], {tab_of(kind): 1})
+        # Queued in the same transaction: the pushes exist exactly when the notifications do.
+        if send_push and created:
+            queue_push_to_users(
+                [recipients[notification.user_id] for notification in created],
+                title=title,
+                message=message,
+                action_url=action_url,
+            )
     return created
 
 
@@ -196,7 +214,7 @@ def notify_reading_out_of_range(reading):
     if not organization.notify_limits:
         return []
     limits = _limits_for_org(organization)
-    violations = _reading_violations(reading, limits)
+    violations = reading_violations(reading, limits)
     if not violations:
         return []
     title = "\u041f\u043e\u043a\u0430\u0437\u0430\u0442\u0435\u043b\u0438 \u0432\u043d\u0435 \u043d\u043e\u0440\u043c\u044b"
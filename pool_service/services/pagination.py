@@ -0,0 +1,151 @@
+"""Keyset (cursor) pagination.
+
+A page is fetched with ``WHERE (key) < (last key seen)`` instead of ``OFFSET``, so
+the hundredth page costs the same index range scan as the first one and no
+``COUNT(*)`` is needed. The cursor handed to the client is an opaque url-safe token
+holding the ordering values of the last row on the page.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from functools import cmp_to_key
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+@dataclass
+class CursorPage:
+    items: list
+    next_cursor: str | None = None
+    # Caller-supplied estimate (e.g. a denormalized counter); None when unknown.
+    approximate_total: int | None = None
+    per_page: int = 0
+    is_first: bool = True
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token, model, ordering):
+    """Ordering values stored in ``token``, or None if it is missing or malformed."""
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != len(ordering):
+        return None
+    try:
+        return [
+            model._meta.get_field(name.lstrip("-")).to_python(value)
+            for name, value in zip(ordering, values)
+        ]
+    except ValidationError:
+        return None
+
+
+def _after(ordering, values):
+    """Rows strictly after ``values`` in ``ordering``: (a, b) after (x, y) = a beyond x, or a = x and b beyond y."""
+    condition = Q()
+    for index in range(len(ordering) - 1, -1, -1):
+        name = ordering[index].lstrip("-")
+        lookup = "lt" if ordering[index].startswith("-") else "gt"
+        beyond = Q(**{f"{name}__{lookup}": values[index]})
+        condition = beyond if index == len(ordering) - 1 else beyond | (Q(**{name: values[index]}) & condition)
+    return condition
+
+
+def _compare_by(ordering):
+    def compare(first, second):
+        for name in ordering:
+            left, right = getattr(first, name.lstrip("-")), getattr(second, name.lstrip("-"))
+            if left != right:
+                result = -1 if left < right else 1
+                return -result if name.startswith("-") else result
+        return 0
+
+    return cmp_to_key(compare)
+
+
+def _rows_after(queryset, ordering, values, limit):
+    queryset = queryset.order_by(*ordering)
+    if values is not None:
+        # The inclusive bound on the leading key is redundant but lets the database seek the index range.
+        leading = ordering[0].lstrip("-")
+        bound = "lte" if ordering[0].startswith("-") else "gte"
+        queryset = queryset.filter(**{f"{leading}__{bound}": values[0]}).filter(_after(ordering, values))
+    return list(queryset[:limit])
+
+
+def _page(items, ordering, per_page, is_first, approximate_total):
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, name.lstrip("-")) for name in ordering])
+    return CursorPage(
+        items=items,
+        next_cursor=next_cursor,
+        approximate_total=approximate_total,
+        per_page=per_page,
+        is_first=is_first,
+    )
+
+
+def cursor_page(queryset, ordering, cursor=None, per_page=20, approximate_total=None):
+    """One page of ``queryset`` ordered by ``ordering``, which must end with a unique field.
+
+    An unreadable cursor restarts from the first page.
+    """
+    values = decode_cursor(cursor, queryset.model, ordering)
+    items = _rows_after(queryset, ordering, values, per_page + 1)
+    return _page(items, ordering, per_page, values is None, approximate_total)
+
+
+def merged_cursor_page(querysets, ordering, cursor=None, per_page=20, approximate_total=None):
+    """Like ``cursor_page`` over the union of ``querysets``, e.g. a table and its archive.
+
+    The last field of ``ordering`` must be unique across all of them.
+    """
+    values = decode_cursor(cursor, querysets[0].model, ordering)
+    items = []
+    for queryset in querysets:
+        items.extend(_rows_after(queryset, ordering, values, per_page + 1))
+    items.sort(key=_compare_by(ordering))
+    return _page(items[: per_page + 1], ordering, per_page, values is None, approximate_total)
+
+
+def keyset_iter(queryset, ordering, batch_size=2000):
+    """Yield every row of ``queryset`` in ``ordering``, one keyset query per ``batch_size`` rows.
+
+    Unlike ``QuerySet.iterator()`` this keeps memory bounded on backends without
+    server-side cursors (MySQLdb buffers the whole result of a query).
+    """
+    values = None
+    while True:
+        rows = _rows_after(queryset, ordering, values, batch_size)
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        values = [getattr(rows[-1], name.lstrip("-")) for name in ordering]
@@ -1,13 +1,22 @@
 from __future__ import annotations
 
 from datetime import timedelta
+from functools import cached_property
 import math
 
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 
-from pool_service.models import Client, Organization, OrganizationAccess, Pool
+from pool_service.db_router import replica_reads
+from pool_service.models import Client, ClientAccess, Organization, OrganizationAccess, Pool, PoolAccess
 
 TRIAL_DAYS = 14
+ORG_STAFF_ROLES = ["owner", "admin", "service", "manager"]
+# Organization role -> pool role, strongest first.
+ORG_POOL_ROLES = (("owner", "admin"), ("admin", "admin"), ("service", "service"), ("manager", "manager"))
+# AccessContext parts kept in the cross-request snapshot.
+SNAPSHOT_PARTS = ("organization_accesses", "client_access", "personal_client", "_personal_pools")
 
 
 def trial_ends_at(org: Organization | None):
@@ -39,45 +48,227 @@ def company_trial_days_left(org: Organization | None, now=None) -> int:
     return int(math.ceil(delta.total_seconds() / 86400))
 
 
+def _access_cache_key(user_id):
+    return f"access:v1:{user_id}"
+
+
+def forget_user_access(user_ids):
+    """Drop the cached access snapshots of ``user_ids``; the next request rebuilds them."""
+    keys = [_access_cache_key(user_id) for user_id in set(user_ids) if user_id]
+    if keys:
+        cache.delete_many(keys)
+
+
+class AccessContext:
+    """What a user can access, each part queried on first use and then kept.
+
+    ``AccessContextMiddleware`` attaches one to every request as ``request.access``,
+    so the views and context processors of a page share the same few queries.
+    With ``use_cache`` the parts are read from a per-user snapshot in the cache,
+    which signals drop whenever the user's organizations, accesses or personal
+    pools change, so a steady-state page runs no access queries at all. Requests
+    only use it with a shared cache (``CACHE_IS_SHARED``): a LocMem snapshot
+    dropped in one worker would keep authorizing in the others.
+    It is a snapshot: a view that changes the user's own access and then renders
+    in the same request should call ``reset()``.
+    """
+
+    def __init__(self, user, use_cache=False):
+        self.user = user
+        self.use_cache = use_cache
+
+    def reset(self):
+        for name, value in type(self).__dict__.items():
+            if isinstance(value, cached_property):
+                self.__dict__.pop(name, None)
+
+    @cached_property
+    def _snapshot(self):
+        key = _access_cache_key(self.user.pk)
+        snapshot = cache.get(key)
+        if snapshot is None:
+            fresh = AccessContext(self.user)
+            # The snapshot outlives this request, so build it from the primary rather than a lagging replica.
+            with replica_reads(False):
+                snapshot = {name: getattr(fresh, name) for name in SNAPSHOT_PARTS}
+            cache.set(key, snapshot, settings.ACCESS_CACHE_TIMEOUT)
+        return snapshot
+
+    def _part(self, name, query):
+        if self.use_cache:
+            return self._snapshot[name]
+        return query()
+
+    @cached_property
+    def is_authenticated(self) -> bool:
+        return bool(self.user and getattr(self.user, "is_authenticated", False))
+
+    @cached_property
+    def organization_accesses(self):
+        if not self.is_authenticated:
+            return []
+        return self._part(
+            "organization_accesses",
+            lambda: list(OrganizationAccess.objects.filter(user=self.user).select_related("organization").order_by("pk")),
+        )
+
+    @property
+    def org_access(self):
+        return self.organization_accesses[0] if self.organization_accesses else None
+
+    @property
+    def organization(self):
+        return self.org_access.organization if self.org_access else None
+
+    @property
+    def org_roles(self):
+        return [access.role for access in self.organization_accesses]
+
+    def has_org_role(self, roles, organization=None) -> bool:
+        """Whether the user holds one of ``roles`` (in ``organization`` if given)."""
+        org_id = getattr(organization, "pk", organization)
+        return any(
+            access.role in roles and (org_id is None or access.organization_id == org_id)
+            for access in self.organization_accesses
+        )
+
+    @property
+    def is_org_staff(self) -> bool:
+        return bool(self.organization_accesses)
+
+    @property
+    def is_org_admin(self) -> bool:
+        if self.is_authenticated and self.user.is_superuser:
+            return True
+        return any(role in ("owner", "admin") for role in self.org_roles)
+
+    @cached_property
+    def client_access(self):
+        if not self.is_authenticated:
+            return None
+        return self._part(
+            "client_access",
+            lambda: ClientAccess.objects.filter(user=self.user).select_related("client").first(),
+        )
+
+    @cached_property
+    def personal_client(self):
+        if not self.is_authenticated:
+            return None
+        return self._part(
+            "personal_client",
+            lambda: None if self.is_org_staff else Client.objects.filter(user=self.user, organization__isnull=True).first(),
+        )
+
+    @property
+    def is_personal_user(self) -> bool:
+        return self.personal_client is not None
+
+    @cached_property
+    def _personal_pools(self):
+        if self.personal_client is None:
+            return []
+        return self._part(
+            "_personal_pools",
+            lambda: list(Pool.objects.filter(client=self.personal_client).only("id", "uuid", "client_id").order_by("pk")[:2]),
+        )
+
+    @property
+    def personal_pool(self):
+        return self._personal_pools[0] if self._personal_pools else None
+
+    @property
+    def is_personal_free(self) -> bool:
+        return len(self._personal_pools) == 1
+
+    def is_access_blocked(self, now=None) -> bool:
+        if not self.organization:
+            return False
+        return not company_has_access(self.organization, now=now)
+
+
+def request_access(request) -> AccessContext:
+    """The request's ``AccessContext``, created here if the middleware did not run or the user changed.
+
+    ``login()`` and ``logout()`` replace ``request.user`` after the middleware built the context.
+    """
+    user = getattr(request, "user", None)
+    access = getattr(request, "access", None)
+    if access is None or access.user is not user:
+        access = request.access = AccessContext(user, use_cache=settings.CACHE_IS_SHARED)
+    return access
+
+
 def is_personal_free(user) -> bool:
-    if not user or not getattr(user, "is_authenticated", False):
-        return False
-    if OrganizationAccess.objects.filter(user=user).exists():
-        return False
-    client = Client.objects.filter(user=user, organization__isnull=True).first()
-    if not client:
-        return False
-    return Pool.objects.filter(client=client).count() == 1
+    return AccessContext(user).is_personal_free
 
 
 def is_personal_user(user) -> bool:
-    if not user or not getattr(user, "is_authenticated", False):
-        return False
-    if OrganizationAccess.objects.filter(user=user).exists():
-        return False
-    return Client.objects.filter(user=user, organization__isnull=True).exists()
+    return AccessContext(user).is_personal_user
 
 
 def personal_pool(user):
-    if not is_personal_user(user):
-        return None
-    client = Client.objects.filter(user=user, organization__isnull=True).first()
-    if not client:
-        return None
-    return Pool.objects.filter(client=client).first()
+    return AccessContext(user).personal_pool
 
 
 def organization_for_user(user):
-    if not user or not getattr(user, "is_authenticated", False):
-        return None
-    access = OrganizationAccess.objects.filter(user=user).select_related("organization").first()
-    if not access:
-        return None
-    return access.organization
+    return AccessContext(user).organization
 
 
 def is_org_access_blocked(user, now=None) -> bool:
-    org = organization_for_user(user)
-    if not org:
-        return False
-    return not company_has_access(org, now=now)
+    return AccessContext(user).is_access_blocked(now=now)
+
+
+def pool_roles_for_user(user, pools, access: AccessContext | None = None):
+    """``{pool_id: role}`` of ``user`` for ``pools``: "admin", "service", "manager", "editor", "viewer" or None.
+
+    Resolves the whole batch with one query each for pool and client accesses, plus
+    organization accesses unless ``access`` (the request's ``AccessContext``) is given
+    and owners of clients not loaded with the pools. The organization role wins over
+    the client role, which wins over the pool share; the client's own user is admin.
+    """
+    pools = list(pools)
+    if user.is_superuser:
+        return {pool.id: "admin" for pool in pools}
+    if not pools:
+        return {}
+
+    pool_roles = dict(
+        PoolAccess.objects.filter(user=user, pool_id__in=[pool.id for pool in pools]).values_list("pool_id", "role")
+    )
+    client_ids = {pool.client_id for pool in pools if pool.client_id}
+    client_roles = dict(
+        ClientAccess.objects.filter(user=user, client_id__in=client_ids).values_list("client_id", "role")
+    ) if client_ids else {}
+    if access is not None:
+        org_accesses = [(item.organization_id, item.role) for item in access.organization_accesses]
+    else:
+        org_ids = {pool.organization_id for pool in pools if pool.organization_id}
+        org_accesses = list(
+            OrganizationAccess.objects.filter(user=user, organization_id__in=org_ids).values_list("organization_id", "role")
+        ) if org_ids else []
+    org_roles = {}
+    for org_id, role in org_accesses:
+        org_roles.setdefault(org_id, set()).add(role)
+
+    owned_client_ids = {
+        pool.client_id for pool in pools if Pool.client.is_cached(pool) and pool.client and pool.client.user_id == user.id
+    }
+    unloaded = {pool.client_id for pool in pools if pool.client_id and not Pool.client.is_cached(pool)}
+    if unloaded:
+        owned_client_ids.update(Client.objects.filter(id__in=unloaded, user=user).values_list("id", flat=True))
+
+    roles = {}
+    for pool in pools:
+        if pool.client_id in owned_client_ids:
+            roles[pool.id] = "admin"
+            continue
+        held = org_roles.get(pool.organization_id, set())
+        org_role = next((pool_role for org_role, pool_role in ORG_POOL_ROLES if org_role in held), None)
+        client_role = None
+        if pool.client_id in client_roles:
+            client_role = client_roles[pool.client_id] or "viewer"
+            if client_role == "staff":
+                client_role = "editor"
+        roles[pool.id] = org_role or client_role or pool_roles.get(pool.id)
+    return roles
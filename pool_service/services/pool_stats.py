@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+
+from pool_service.models import ArchivedWaterReading, Pool, WaterReading
+
+
+LAST_READING_FIELDS = {
+    "last_reading_at": "date",
+    "last_ph": "ph",
+    "last_cl_free": "cl_free",
+    "last_cl_total": "cl_total",
+    "last_reading_by_id": "added_by_id",
+}
+
+
+def _last_values(reading):
+    return {field: getattr(reading, source) if reading else None for field, source in LAST_READING_FIELDS.items()}
+
+
+def _latest_readings(model, pool_ids):
+    latest = model.objects.filter(pool_id=OuterRef("pk")).order_by("-day", "-date", "-id").values("id")[:1]
+    last_ids = dict(
+        Pool.objects.filter(id__in=pool_ids).annotate(last_id=Subquery(latest)).values_list("id", "last_id")
+    )
+    readings = model.objects.in_bulk([reading_id for reading_id in last_ids.values() if reading_id])
+    return {pool_id: readings.get(last_id) for pool_id, last_id in last_ids.items()}
+
+
+def refresh_pool_stats(pool_ids):
+    """Recompute the reading statistics of ``pool_ids`` from their readings, archived ones included."""
+    pool_ids = set(pool_ids)
+    if not pool_ids:
+        return 0
+    counts = Counter()
+    for model in (WaterReading, ArchivedWaterReading):
+        counts.update(
+            dict(
+                model.objects.filter(pool_id__in=pool_ids)
+                .values("pool_id")
+                .annotate(total=Count("id"))
+                .values_list("pool_id", "total")
+            )
+        )
+    last_readings = _latest_readings(WaterReading, pool_ids)
+    # The newest reading is normally kept hot; fall back to the archive if it was deleted since.
+    archived_only = [pool_id for pool_id, reading in last_readings.items() if reading is None and counts[pool_id]]
+    if archived_only:
+        last_readings.update(_latest_readings(ArchivedWaterReading, archived_only))
+
+    pools = []
+    for pool_id, reading in last_readings.items():
+        pool = Pool(id=pool_id, readings_count=counts[pool_id])
+        for name, value in _last_values(reading).items():
+            setattr(pool, name, value)
+        pools.append(pool)
+    Pool.objects.bulk_update(pools, Pool.READING_STATS_FIELDS, batch_size=500)
+    return len(pools)
+
+
+def record_reading_added(reading):
+    """Count a new reading and make it the last one unless a later reading exists."""
+    with transaction.atomic():
+        Pool.objects.filter(id=reading.pool_id).update(readings_count=F("readings_count") + 1)
+        Pool.objects.filter(id=reading.pool_id).filter(
+            Q(last_reading_at__isnull=True) | Q(last_reading_at__lte=reading.date)
+        ).update(**_last_values(reading))
+
+
+def record_reading_removed(reading):
+    """Uncount a deleted reading; recompute the last values only if it could have been the last one."""
+    with transaction.atomic():
+        Pool.objects.filter(id=reading.pool_id, readings_count__gt=0).update(readings_count=F("readings_count") - 1)
+        if Pool.objects.filter(id=reading.pool_id, last_reading_at__lte=reading.date).exists():
+            refresh_pool_stats([reading.pool_id])
@@ -1,14 +1,40 @@
+"""Web push through a durable outbox.
+
+Requests only queue: ``queue_push_to_users`` writes one ``PushOutbox`` row per
+subscription of the recipients. The ``deliver_push`` worker claims due rows in
+batches and sends them from a thread pool, so a slow push service never holds
+up a form submit. A failed send is retried with exponential backoff, and the
+other queued messages of the same endpoint wait as well. Messages not delivered
+within ``PUSH_TTL_SECONDS`` expire, and subscriptions the push service reports
+gone (404/410) are deleted with their queued messages.
+"""
+
+from __future__ import annotations
+
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 
 from django.conf import settings
+from django.db import connection, transaction
 from django.templatetags.static import static
+from django.utils import timezone
 from pywebpush import WebPushException, webpush
 
-from pool_service.models import PushSubscription
+from pool_service.models import PushOutbox, PushSubscription
 
 logger = logging.getLogger(__name__)
 
+# Seconds a claimed message is left to its worker before another one may take it.
+CLAIM_LEASE_SECONDS = 300
+MAX_RETRY_DELAY_SECONDS = 3600
+GONE_STATUSES = {404, 410}
+
+SENT = "sent"
+RETRY = "retry"
+GONE = "gone"
+
 
 def _push_config():
     public_key = getattr(settings, "VAPID_PUBLIC_KEY", "")
@@ -30,47 +56,133 @@ def _icon_url():
     return f"{base}{static('assets/images/favicon.png')}"
 
 
-def send_push_to_users(users, *, title, message, action_url=""):
-    config = _push_config()
-    if not config:
+def queue_push_to_users(users, *, title, message, action_url=""):
+    """Queue a push message to every subscription of the active ``users``; return how many were queued."""
+    if not _push_config():
+        return 0
+    active_users = [user for user in users if user and user.is_active]
+    if not active_users:
         return 0
-    icon_url = _icon_url()
     payload = {
         "title": title,
         "body": message,
         "url": action_url,
-        "icon": icon_url,
+        "icon": _icon_url(),
     }
-    active_users = [user for user in users if user and user.is_active]
-    if not active_users:
-        return 0
-    sent = 0
-    subscriptions = PushSubscription.objects.filter(user__in=active_users).select_related("user")
-    for sub in subscriptions:
-        if not sub.endpoint or not sub.p256dh or not sub.auth:
-            sub.delete()
-            continue
-        subscription_info = {
-            "endpoint": sub.endpoint,
-            "keys": {"p256dh": sub.p256dh, "auth": sub.auth},
-        }
-        try:
-            webpush(
-                subscription_info=subscription_info,
-                data=json.dumps(payload),
-                vapid_private_key=config["private_key"],
-                vapid_claims={"sub": f"mailto:{config['email']}" if config["email"] else "mailto:admin@localhost"},
-                ttl=3600,
-            )
-            sent += 1
-        except WebPushException as exc:
-            status = getattr(getattr(exc, "response", None), "status_code", None)
-            if status in {404, 410}:
-                sub.delete()
-            else:
-                logger.warning("Web push failed for user %s: %s", sub.user_id, exc)
-            continue
-        except Exception:
-            logger.exception("Web push failed for user %s", sub.user_id)
-            continue
-    return sent
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=settings.PUSH_TTL_SECONDS)
+    queued = [
+        PushOutbox(subscription_id=subscription_id, payload=payload, next_attempt_at=now, expires_at=expires_at)
+        for subscription_id in PushSubscription.objects.filter(user__in=active_users).values_list("id", flat=True)
+    ]
+    PushOutbox.objects.bulk_create(queued, batch_size=500)
+    return len(queued)
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next attempt after ``attempts`` failed ones."""
+    return min(settings.PUSH_RETRY_BASE_SECONDS * 2 ** (attempts - 1), MAX_RETRY_DELAY_SECONDS)
+
+
+def _claim(batch_size, now):
+    with transaction.atomic():
+        due = PushOutbox.objects.filter(status=PushOutbox.STATUS_PENDING, next_attempt_at__lte=now)
+        if connection.features.has_select_for_update_skip_locked:
+            # Concurrent workers take different rows instead of waiting for each other.
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.order_by("next_attempt_at", "id").values_list("id", flat=True)[:batch_size])
+        PushOutbox.objects.filter(id__in=ids).update(next_attempt_at=now + timedelta(seconds=CLAIM_LEASE_SECONDS))
+    return list(PushOutbox.objects.filter(id__in=ids).select_related("subscription"))
+
+
+def _send(outbox, config, now):
+    """Send one message; runs in a worker thread, so it must not touch the database."""
+    subscription = outbox.subscription
+    if not subscription.endpoint or not subscription.p256dh or not subscription.auth:
+        return GONE, "incomplete subscription"
+    try:
+        webpush(
+            subscription_info={
+                "endpoint": subscription.endpoint,
+                "keys": {"p256dh": subscription.p256dh, "auth": subscription.auth},
+            },
+            data=json.dumps(outbox.payload),
+            vapid_private_key=config["private_key"],
+            # webpush adds "aud" and "exp" to the claims it is given.
+            vapid_claims={"sub": f"mailto:{config['email']}" if config["email"] else "mailto:admin@localhost"},
+            ttl=max(int((outbox.expires_at - now).total_seconds()), 0),
+            timeout=settings.PUSH_TIMEOUT,
+        )
+    except WebPushException as exc:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+        return (GONE if status in GONE_STATUSES else RETRY), str(exc)
+    except Exception as exc:
+        return RETRY, repr(exc)
+    return SENT, ""
+
+
+def _record_failure(outbox, error, now):
+    outbox.attempts += 1
+    outbox.last_error = error[:255]
+    next_attempt_at = now + timedelta(seconds=retry_delay(outbox.attempts))
+    if outbox.attempts >= settings.PUSH_MAX_ATTEMPTS or next_attempt_at >= outbox.expires_at:
+        outbox.status = PushOutbox.STATUS_FAILED
+        outbox.save(update_fields=["attempts", "last_error", "status"])
+        return
+    outbox.next_attempt_at = next_attempt_at
+    outbox.save(update_fields=["attempts", "last_error", "next_attempt_at"])
+    # Back off the whole endpoint, not only this message.
+    PushOutbox.objects.filter(
+        subscription_id=outbox.subscription_id,
+        status=PushOutbox.STATUS_PENDING,
+        next_attempt_at__lt=next_attempt_at,
+    ).update(next_attempt_at=next_attempt_at)
+
+
+def deliver_pending(batch_size=100, workers=None, now=None):
+    """Send one batch of due messages; return ``{"claimed", "sent", "retried", "failed", "expired", "gone"}`` counts."""
+    now = now or timezone.now()
+    stats = dict.fromkeys(("claimed", "sent", "retried", "failed", "expired", "gone"), 0)
+    config = _push_config()
+    if not config:
+        return stats
+    claimed = _claim(batch_size, now)
+    stats["claimed"] = len(claimed)
+    expired = [outbox for outbox in claimed if outbox.expires_at <= now]
+    if expired:
+        PushOutbox.objects.filter(id__in=[outbox.id for outbox in expired]).update(status=PushOutbox.STATUS_EXPIRED)
+        stats["expired"] = len(expired)
+    live = [outbox for outbox in claimed if outbox.expires_at > now]
+    if not live:
+        return stats
+
+    with ThreadPoolExecutor(max_workers=workers or settings.PUSH_WORKERS) as pool:
+        results = list(pool.map(lambda outbox: _send(outbox, config, now), live))
+
+    sent_ids, gone_subscription_ids = [], set()
+    for outbox, (outcome, error) in zip(live, results):
+        if outcome == SENT:
+            sent_ids.append(outbox.id)
+        elif outcome == GONE:
+            gone_subscription_ids.add(outbox.subscription_id)
+            stats["gone"] += 1
+        else:
+            logger.warning("Web push to subscription %s failed: %s", outbox.subscription_id, error)
+            _record_failure(outbox, error, now)
+            stats["failed" if outbox.status == PushOutbox.STATUS_FAILED else "retried"] += 1
+    if sent_ids:
+        PushOutbox.objects.filter(id__in=sent_ids).update(status=PushOutbox.STATUS_SENT, sent_at=timezone.now())
+        stats["sent"] = len(sent_ids)
+    if gone_subscription_ids:
+        # Their queued messages go with them.
+        PushSubscription.objects.filter(id__in=gone_subscription_ids).delete()
+    return stats
+
+
+def purge_outbox(older_than_days):
+    """Delete delivered, failed and expired messages queued more than ``older_than_days`` ago; return how many."""
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    deleted, _ = (
+        PushOutbox.objects.filter(created_at__lt=cutoff).exclude(status=PushOutbox.STATUS_PENDING).delete()
+    )
+    return deleted
@@ -0,0 +1,83 @@
+"""Cold storage for old water readings.
+
+``archive_readings`` moves readings older than a cutoff from ``WaterReading`` to
+``ArchivedWaterReading`` in id-ordered batches, keeping their ids and uuids, so the
+hot table that the calendar, notifications and statistics query stays small.
+Moving a reading is not deleting it: the pool statistics keep counting archived
+readings and no reading signals fire. The newest reading of every pool is never
+archived, so the stored last-reading values stay in the hot table.
+
+History pages read both tables through ``reading_history_page``.
+"""
+
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+
+from pool_service.models import ArchivedWaterReading, Pool, ServiceOccurrence, WaterReading
+from pool_service.services.calendar_cache import bump_calendar_versions
+from pool_service.services.pagination import cursor_page, merged_cursor_page
+
+
+READINGS_ORDERING = ("-date", "-id")
+ARCHIVED_FIELDS = [field.attname for field in ArchivedWaterReading._meta.concrete_fields if field.name != "archived_at"]
+
+
+def _archive_batch(reading_ids):
+    rows = WaterReading.objects.filter(id__in=reading_ids).values(*ARCHIVED_FIELDS)
+    archived = [ArchivedWaterReading(**row) for row in rows]
+    pool_ids = {reading.pool_id for reading in archived}
+    with transaction.atomic():
+        ArchivedWaterReading.objects.bulk_create(archived)
+        ServiceOccurrence.objects.filter(reading_id__in=reading_ids).update(reading=None)
+        # A raw delete skips the collector and the reading signals: the reading moved, it was not removed.
+        WaterReading.objects.filter(id__in=reading_ids)._raw_delete(WaterReading.objects.db)
+        newest = ArchivedWaterReading.objects.filter(pool_id=OuterRef("pk")).order_by("-date").values("date")[:1]
+        Pool.objects.filter(id__in=pool_ids).update(archived_readings_until=Subquery(newest))
+    return len(archived), pool_ids
+
+
+def archive_readings(before, batch_size=1000, dry_run=False):
+    """Move readings of days before ``before`` to the archive; return ``(readings, pools)`` counts."""
+    candidates = WaterReading.objects.filter(day__lt=before).exclude(date=F("pool__last_reading_at")).order_by("id")
+    total = 0
+    pool_ids = set()
+    last_id = 0
+    while True:
+        batch = list(candidates.filter(id__gt=last_id).values_list("id", "pool_id")[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1][0]
+        if dry_run:
+            total += len(batch)
+            pool_ids.update(pool_id for _, pool_id in batch)
+            continue
+        moved, moved_pool_ids = _archive_batch([reading_id for reading_id, _ in batch])
+        total += moved
+        pool_ids |= moved_pool_ids
+
+    if pool_ids and not dry_run:
+        bump_calendar_versions(
+            Pool.objects.filter(id__in=pool_ids).exclude(organization=None).values_list("organization_id", flat=True)
+        )
+    return total, len(pool_ids)
+
+
+def reading_history_page(pool, cursor=None, per_page=20):
+    """One page of the pool's readings, newest first, continuing into the archive."""
+    readings = WaterReading.objects.filter(pool=pool).select_related("added_by")
+    page = cursor_page(readings, READINGS_ORDERING, cursor=cursor, per_page=per_page, approximate_total=pool.readings_count)
+    if pool.archived_readings_until is None:
+        return page
+    if page.has_next and page.items[-1].date > pool.archived_readings_until:
+        # Every archived reading sorts after this page.
+        return page
+    archived = ArchivedWaterReading.objects.filter(pool=pool).select_related("added_by")
+    return merged_cursor_page(
+        [readings, archived],
+        READINGS_ORDERING,
+        cursor=cursor,
+        per_page=per_page,
+        approximate_total=pool.readings_count,
+    )
@@ -0,0 +1,324 @@
+"""Streaming bulk import of water readings from CSV or XLSX files.
+
+Rows are parsed lazily and handled in chunks: the pools of a chunk are resolved
+with one query (by uuid, or by exact address within the organization), already
+stored readings are found with another, and the valid rows are written with one
+``bulk_create``. ``bulk_create`` sends no signals, so the derived pool state
+(statistics, visit state, schedule, rollups, calendar cache) is refreshed once
+per pool after the last chunk, and readings out of the organization's norms are
+reported in one summary notification per pool.
+
+Expected columns (header row, case-insensitive): ``pool`` (pool uuid) or
+``address``, ``date``, and any of the numeric and text reading fields. A uuid
+that is not one of the organization's pools falls back to the row's address, so
+an export from another organization imports as is.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Q
+from django.urls import reverse
+
+from pool_service.models import OrganizationAccess, Pool, WaterReading
+from pool_service.services.calendar_cache import bump_calendar_versions
+from pool_service.services.notifications import limits_by_organization, notify_org_users, reading_violations
+from pool_service.services.pool_stats import refresh_pool_stats
+from pool_service.services.rollups import refresh_rollups
+from pool_service.services.schedule_store import regenerate_pool_schedules
+from pool_service.services.visit_state import refresh_pool_visit_states
+
+
+NUMERIC_FIELDS = [
+    "temperature",
+    "ph",
+    "cl_free",
+    "cl_total",
+    "ph_dosing_station",
+    "cl_free_dosing_station",
+    "cl_total_dosing_station",
+    "redox_dosing_station",
+]
+TEXT_FIELDS = ["comment", "required_materials", "performed_works", "consumables_replaced"]
+# Physically possible values: anything outside is a typo rather than a reading out of norm.
+VALUE_RANGES = {
+    "temperature": (-5, 60),
+    "ph": (0, 14),
+    "ph_dosing_station": (0, 14),
+    "redox_dosing_station": (-2000, 2000),
+}
+DATE_FORMATS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M",
+    "%Y-%m-%d",
+    "%d.%m.%Y %H:%M:%S",
+    "%d.%m.%Y %H:%M",
+    "%d.%m.%Y",
+)
+MAX_REPORTED_ERRORS = 200
+# Above this many days per pool the rollups of the pool are rebuilt whole.
+ROLLUP_DAYS_LIMIT = 500
+
+
+class ImportFormatError(ValueError):
+    """The file cannot be read at all (unknown format, missing columns, missing dependency)."""
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    created: int = 0
+    duplicates: int = 0
+    out_of_norm: int = 0
+    error_count: int = 0
+    # ``(row_number, message)``, the first MAX_REPORTED_ERRORS of them.
+    errors: list = field(default_factory=list)
+
+    def add_error(self, row_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((row_number, message))
+
+
+def _header(values):
+    header = [str(name or "").strip().lower() for name in values]
+    if "date" not in header or not {"pool", "pool_uuid", "address"} & set(header):
+        raise ImportFormatError("В первой строке нужны колонки date и pool (uuid объекта) или address.")
+    return header
+
+
+def _csv_rows(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        sample = text.read(4096)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(text, dialect)
+        header = _header(next(reader, []))
+        for row_number, values in enumerate(reader, start=2):
+            if any(value.strip() for value in values):
+                yield row_number, dict(zip(header, values))
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise ImportFormatError(f"Не удалось прочитать CSV: {exc}") from exc
+
+
+def _xlsx_rows(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise ImportFormatError("Для импорта XLSX установите openpyxl или загрузите CSV.") from exc
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = _header(next(rows, []))
+        for row_number, values in enumerate(rows, start=2):
+            if any(value not in (None, "") for value in values):
+                yield row_number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename):
+    """Yield ``(row_number, {column: value})`` for each non-empty data row of the file."""
+    name = filename.lower()
+    if name.endswith(".xlsx"):
+        rows = _xlsx_rows(fileobj)
+    elif name.endswith((".csv", ".txt")):
+        rows = _csv_rows(fileobj)
+    else:
+        raise ImportFormatError("Поддерживаются файлы CSV и XLSX.")
+    return rows
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None, microsecond=0)
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    text = str(value or "").strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"не удалось разобрать дату «{text}»")
+
+
+def _parse_number(name, value):
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        number = float(str(value).strip().replace(",", "."))
+    except ValueError:
+        raise ValueError(f"{name}: «{value}» не число") from None
+    low, high = VALUE_RANGES.get(name, (0, 10000))
+    if not low <= number <= high:
+        raise ValueError(f"{name}: {number} вне диапазона {low}…{high}")
+    return number
+
+
+def _pool_lookup(organization, chunk):
+    uuids, addresses = set(), set()
+    for _, row in chunk:
+        reference = str(row.get("pool") or row.get("pool_uuid") or "").strip()
+        if reference:
+            try:
+                uuids.add(uuid.UUID(reference))
+            except ValueError:
+                pass
+        address = str(row.get("address") or "").strip()
+        if address:
+            addresses.add(address)
+    by_uuid, by_address = {}, defaultdict(list)
+    for pool in Pool.objects.filter(organization=organization).filter(
+        Q(uuid__in=uuids) | Q(address__in=addresses)
+    ).only("id", "uuid", "address", "organization_id", "service_suspended", "client_id"):
+        by_uuid[str(pool.uuid)] = pool
+        by_address[pool.address].append(pool)
+    return by_uuid, by_address
+
+
+def _resolve_pool(row, by_uuid, by_address):
+    reference = str(row.get("pool") or row.get("pool_uuid") or "").strip()
+    address = str(row.get("address") or "").strip()
+    if reference:
+        try:
+            pool = by_uuid.get(str(uuid.UUID(reference)))
+        except ValueError:
+            pool = None
+        if pool is not None:
+            return pool
+        if not address:
+            raise ValueError(f"объект «{reference}» не найден")
+    if not address:
+        raise ValueError("не указан объект (pool или address)")
+    pools = by_address.get(address, [])
+    if not pools:
+        raise ValueError(f"объект по адресу «{address}» не найден")
+    if len(pools) > 1:
+        raise ValueError(f"по адресу «{address}» несколько объектов, укажите uuid")
+    return pools[0]
+
+
+def _build_reading(row, pool, added_by):
+    values = {name: _parse_number(name, row.get(name)) for name in NUMERIC_FIELDS}
+    if all(value is None for value in values.values()) and not any(row.get(name) for name in TEXT_FIELDS):
+        raise ValueError("нет ни одного показателя")
+    reading_date = _parse_date(row.get("date"))
+    texts = {name: str(row[name]).strip() or None for name in TEXT_FIELDS if row.get(name) not in (None, "")}
+    return WaterReading(
+        pool=pool,
+        date=reading_date,
+        day=WaterReading.day_of(reading_date),
+        added_by=added_by,
+        **values,
+        **texts,
+    )
+
+
+def _import_chunk(chunk, organization, added_by, limits, seen, report, created_days, violations, dry_run):
+    by_uuid, by_address = _pool_lookup(organization, chunk)
+    readings = []
+    for row_number, row in chunk:
+        report.rows += 1
+        try:
+            pool = _resolve_pool(row, by_uuid, by_address)
+            readings.append((row_number, _build_reading(row, pool, added_by)))
+        except ValueError as exc:
+            report.add_error(row_number, str(exc))
+
+    existing = set(
+        WaterReading.objects.filter(
+            pool_id__in={reading.pool_id for _, reading in readings},
+            date__in={reading.date for _, reading in readings},
+        ).values_list("pool_id", "date")
+    ) if readings else set()
+    new = []
+    for row_number, reading in readings:
+        key = (reading.pool_id, reading.date)
+        if key in existing or key in seen:
+            report.duplicates += 1
+            continue
+        seen.add(key)
+        new.append(reading)
+        if reading_violations(reading, limits):
+            report.out_of_norm += 1
+            violations[reading.pool_id] += 1
+
+    if new and not dry_run:
+        with transaction.atomic():
+            WaterReading.objects.bulk_create(new, batch_size=len(new))
+        for reading in new:
+            created_days[reading.pool_id].add(reading.day)
+    report.created += len(new)
+
+
+def refresh_imported_pools(organization, created_days):
+    """Refresh what the reading signals would have maintained for ``{pool_id: days}``."""
+    pool_ids = list(created_days)
+    if not pool_ids:
+        return
+    refresh_pool_stats(pool_ids)
+    refresh_pool_visit_states(pool_ids)
+    regenerate_pool_schedules(pool_ids)
+    for pool_id, days in created_days.items():
+        refresh_rollups([pool_id], days if len(days) <= ROLLUP_DAYS_LIMIT else None)
+    bump_calendar_versions([organization.id])
+
+
+def _notify_out_of_norm(organization, added_by, violations, import_key):
+    # Same rule as for single readings: staff who entered the values do not need to be told.
+    if not violations or not organization.notify_limits:
+        return
+    if added_by and OrganizationAccess.objects.filter(user=added_by, organization=organization).exists():
+        return
+    for pool in Pool.objects.filter(id__in=list(violations), service_suspended=False).select_related("client"):
+        client_label = pool.client.name if pool.client else pool.address
+        notify_org_users(
+            organization,
+            title="Показатели вне нормы",
+            message=f"{client_label}: импортировано показаний вне нормы — {violations[pool.id]}",
+            kind="limits",
+            level="warning",
+            action_url=reverse("pool_detail", kwargs={"pool_uuid": pool.uuid}),
+            pool=pool,
+            dedupe_key=f"limits_import:{import_key}:{pool.id}",
+        )
+
+
+def import_readings(fileobj, filename, organization, added_by=None, chunk_size=1000, dry_run=False):
+    """Import the readings of ``fileobj`` into ``organization``'s pools; return an ``ImportReport``.
+
+    Invalid rows and readings already stored (same pool and time) are skipped and
+    reported; ``ImportFormatError`` is raised only when the file cannot be read.
+    """
+    rows = iter_rows(fileobj, filename)
+    limits = limits_by_organization([organization.id])[organization.id]
+    report = ImportReport()
+    seen = set()
+    created_days = defaultdict(set)
+    violations = Counter()
+    try:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            _import_chunk(chunk, organization, added_by, limits, seen, report, created_days, violations, dry_run)
+    finally:
+        refresh_imported_pools(organization, created_days)
+    if not dry_run:
+        _notify_out_of_norm(organization, added_by, violations, uuid.uuid4().hex)
+    return report
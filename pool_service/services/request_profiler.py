@@ -0,0 +1,129 @@
+"""On-demand profiles of single requests.
+
+A superuser asks for one with the ``X-Profile-Request: 1`` header, or with
+``?_profile=<token>`` in the URL, where the token comes from ``profile_token``
+and is shown on the admin list of profiles. The link has to be signed, so a
+crafted link opened by a superuser cannot trigger profiles.
+
+The rest of the request (the view and its rendering) runs under cProfile while
+a background thread samples its stack every ``REQUEST_PROFILE_SAMPLE_MS``. The
+``.prof`` stats and the sampled stacks, in the collapsed format read by
+flamegraph.pl and speedscope, are stored in media storage as a
+``RequestProfile``. Only the newest ``REQUEST_PROFILE_KEEP`` profiles are kept.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import marshal
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+from pool_service.models import RequestProfile
+from pool_service.services.request_timing import RequestTimings
+
+
+PROFILE_HEADER = "HTTP_X_PROFILE_REQUEST"
+PROFILE_PARAM = "_profile"
+
+_signer = signing.TimestampSigner(salt="pool_service.request_profile")
+
+
+def profile_token(user):
+    """Value of ``?_profile=`` that profiles a request of ``user``, valid for ``REQUEST_PROFILE_TOKEN_MAX_AGE``."""
+    return _signer.sign(str(user.pk))
+
+
+def profile_requested(request):
+    user = getattr(request, "user", None)
+    if user is None or not user.is_superuser:
+        return False
+    if request.META.get(PROFILE_HEADER) == "1":
+        return True
+    token = request.GET.get(PROFILE_PARAM)
+    if not token:
+        return False
+    try:
+        return _signer.unsign(token, max_age=settings.REQUEST_PROFILE_TOKEN_MAX_AGE) == str(user.pk)
+    except signing.BadSignature:
+        return False
+
+
+class StackSampler:
+    """Samples the stack of one thread from a background thread while active."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profile-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                names.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        return "".join(f"{stack} {samples}\n" for stack, samples in self.stacks.most_common())
+
+
+def prune_profiles(keep):
+    stale = RequestProfile.objects.order_by("-created_at", "-id").values_list("id", flat=True)[keep:]
+    # Deleting one by one lets the post_delete receiver remove the files.
+    for profile in RequestProfile.objects.filter(id__in=list(stale)):
+        profile.delete()
+
+
+def profile_request(request, get_response):
+    """Run ``get_response(request)`` under the profilers and store a ``RequestProfile``; return the response."""
+    profiler = cProfile.Profile()
+    timings = RequestTimings()
+    sampler = StackSampler(threading.get_ident(), settings.REQUEST_PROFILE_SAMPLE_MS / 1000)
+    started = time.perf_counter()
+    with timings.capture(), sampler:
+        response = profiler.runcall(get_response, request)
+    duration = time.perf_counter() - started
+    profiler.create_stats()
+
+    match = getattr(request, "resolver_match", None)
+    profile = RequestProfile(
+        user=request.user,
+        method=request.method,
+        path=request.get_full_path()[:400],
+        view_name=(match.view_name if match else "")[:120],
+        status_code=response.status_code,
+        duration_ms=round(duration * 1000, 1),
+        queries=timings.queries,
+        sql_ms=round(timings.sql_seconds * 1000, 1),
+    )
+    # A random part keeps the file names unguessable when media files are served.
+    stem = f"{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:12]}"
+    profile.stats_file.save(f"{stem}.prof", ContentFile(marshal.dumps(profiler.stats)), save=False)
+    profile.flamegraph_file.save(f"{stem}.collapsed.txt", ContentFile(sampler.collapsed().encode()), save=False)
+    profile.save()
+    prune_profiles(settings.REQUEST_PROFILE_KEEP)
+
+    response["X-Request-Profile"] = str(profile.id)
+    return response
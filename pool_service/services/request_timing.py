@@ -0,0 +1,132 @@
+"""Per-request SQL, template and view timings.
+
+``RequestTimings`` is an ``execute_wrapper`` for every database connection that
+counts queries, sums their time and keeps the slowest few; while it is active,
+top-level template renders add their time to it as well. Django only signals
+template renders under the test runner, so ``install_template_timer`` wraps
+``Template.render`` once per process; outside an active ``RequestTimings`` the
+wrapper only checks a context variable.
+
+``RequestTimingMiddleware`` turns this on when ``REQUEST_TIMING_ENABLED`` is set:
+superusers get a ``Server-Timing`` header and requests slower than
+``REQUEST_TIMING_SLOW_MS`` are logged as JSON lines to the
+``pool_service.slow_requests`` logger (a rotating file when ``SLOW_REQUEST_LOG``
+is set).
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from itertools import count
+
+from django.db import connections
+from django.template.base import Template
+from django.utils import timezone
+
+
+TOP_QUERIES = 5
+MAX_SQL_LENGTH = 2000
+
+slow_request_logger = logging.getLogger("pool_service.slow_requests")
+_active = ContextVar("request_timings", default=None)
+_sequence = count()
+
+
+class RequestTimings:
+    def __init__(self, top=TOP_QUERIES):
+        self.top = top
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self._rendering = False
+        # Min-heap of ``(seconds, sequence, alias, sql)``: the slowest ``top`` queries.
+        self._slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.sql_seconds += elapsed
+            entry = (elapsed, next(_sequence), context["connection"].alias, sql)
+            if len(self._slowest) < self.top:
+                heapq.heappush(self._slowest, entry)
+            elif elapsed > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    @contextmanager
+    def capture(self):
+        """Time the queries of every connection, and the template renders, inside the block."""
+        token = _active.set(self)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(self))
+                yield self
+        finally:
+            _active.reset(token)
+
+    def top_queries(self):
+        return [
+            {"ms": round(seconds * 1000, 2), "db": alias, "sql": sql[:MAX_SQL_LENGTH]}
+            for seconds, _, alias, sql in sorted(self._slowest, reverse=True)
+        ]
+
+    def server_timing(self, total_seconds):
+        """``Server-Timing`` header value; ``view`` is the time below the middleware, SQL and templates included."""
+        return ", ".join(
+            [
+                f'sql;dur={self.sql_seconds * 1000:.1f};desc="{self.queries} queries"',
+                f"tpl;dur={self.template_seconds * 1000:.1f}",
+                f"view;dur={total_seconds * 1000:.1f}",
+            ]
+        )
+
+
+def install_template_timer():
+    """Wrap ``Template.render`` so renders inside ``RequestTimings.capture`` are timed; idempotent."""
+    render = Template.render
+    if getattr(render, "timed", False):
+        return
+
+    def timed_render(self, context):
+        timings = _active.get()
+        # Included templates render inside their parent: only the outermost render is timed.
+        if timings is None or timings._rendering:
+            return render(self, context)
+        timings._rendering = True
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            timings.template_seconds += time.perf_counter() - started
+            timings._rendering = False
+
+    timed_render.timed = True
+    Template.render = timed_render
+
+
+def log_slow_request(request, response, timings, total_seconds):
+    match = getattr(request, "resolver_match", None)
+    user = getattr(request, "user", None)
+    record = {
+        "at": timezone.now().isoformat(),
+        "method": request.method,
+        "path": request.path,
+        "view": match.view_name if match else None,
+        "status": response.status_code,
+        "user_id": user.pk if user is not None and user.is_authenticated else None,
+        "total_ms": round(total_seconds * 1000, 1),
+        "sql_ms": round(timings.sql_seconds * 1000, 1),
+        "queries": timings.queries,
+        "template_ms": round(timings.template_seconds * 1000, 1),
+        "top_queries": timings.top_queries(),
+    }
+    slow_request_logger.warning(json.dumps(record, ensure_ascii=False))
@@ -0,0 +1,235 @@
+"""Daily and monthly water-chemistry rollups per pool.
+
+A day rollup is recomputed from the readings of that pool and day (hot and
+archived) whenever one of them changes, and the month rollup is then re-summed
+from its day rollups. Both touch a handful of rows, so trend charts and reports
+read rollups instead of scanning readings.
+
+``out_of_norm_count`` uses the organization's norms at the time of the refresh;
+run ``rebuild_reading_rollups --organization`` after the norms change.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from pool_service.models import ArchivedWaterReading, Pool, ReadingRollup, WaterReading
+from pool_service.services.bulk import bulk_upsert
+from pool_service.services.notifications import limits_by_organization
+from pool_service.services.schedule import add_month
+
+
+# Rollup metric -> reading field.
+ROLLUP_METRICS = {
+    "ph": "ph",
+    "cl_free": "cl_free",
+    "cl_total": "cl_total",
+    "temperature": "temperature",
+    "redox": "redox_dosing_station",
+}
+ROLLUP_FIELDS = ["count", "out_of_norm_count", "value_sum", "min_value", "max_value"]
+
+
+def _out_of_norm(field, limit):
+    condition = Q()
+    if limit.get("min") is not None:
+        condition |= Q(**{f"{field}__lt": limit["min"]})
+    if limit.get("max") is not None:
+        condition |= Q(**{f"{field}__gt": limit["max"]})
+    return condition
+
+
+def _day_aggregates(model, pool_ids, limits, days):
+    readings = model.objects.filter(pool_id__in=pool_ids)
+    if days is not None:
+        readings = readings.filter(day__in=days)
+    annotations = {}
+    for metric, field in ROLLUP_METRICS.items():
+        annotations[f"{metric}_count"] = Count(field)
+        annotations[f"{metric}_sum"] = Sum(field)
+        annotations[f"{metric}_min"] = Min(field)
+        annotations[f"{metric}_max"] = Max(field)
+        limit = limits.get(field)
+        if limit:
+            annotations[f"{metric}_out"] = Count("id", filter=_out_of_norm(field, limit))
+    return readings.order_by().values("pool_id", "day").annotate(**annotations)
+
+
+def _add(rollups, pool_id, period, period_start, metric, values):
+    if not values["count"]:
+        return
+    values = {
+        "count": values["count"],
+        "out_of_norm_count": values.get("out_of_norm_count") or 0,
+        "value_sum": values["value_sum"] or 0,
+        "min_value": values["min_value"],
+        "max_value": values["max_value"],
+    }
+    rollup = rollups.get((pool_id, period_start, metric))
+    if rollup is None:
+        rollups[(pool_id, period_start, metric)] = ReadingRollup(
+            pool_id=pool_id,
+            period=period,
+            period_start=period_start,
+            metric=metric,
+            **values,
+        )
+        return
+    rollup.count += values["count"]
+    rollup.out_of_norm_count += values["out_of_norm_count"]
+    rollup.value_sum += values["value_sum"]
+    rollup.min_value = min(rollup.min_value, values["min_value"])
+    rollup.max_value = max(rollup.max_value, values["max_value"])
+
+
+def _replace(period, pool_ids, period_starts, rollups):
+    """Store ``rollups`` as the only ``period`` rows of the pools (and, if given, of ``period_starts``)."""
+    stale = ReadingRollup.objects.filter(pool_id__in=pool_ids, period=period)
+    if period_starts is not None:
+        stale = stale.filter(period_start__in=period_starts)
+    with transaction.atomic():
+        stale.delete()
+        bulk_upsert(
+            ReadingRollup,
+            list(rollups.values()),
+            unique_fields=["pool", "period", "period_start", "metric"],
+            update_fields=[*ROLLUP_FIELDS, "updated_at"],
+            batch_size=500,
+        )
+
+
+def refresh_day_rollups(pool_ids, days=None):
+    """Recompute the day rollups of ``pool_ids`` for ``days`` (all days if None).
+
+    Returns the first days of the months touched, or None for all of them.
+    """
+    pool_ids = set(pool_ids)
+    if not pool_ids:
+        return set()
+    days = set(days) if days is not None else None
+    pools_by_org = defaultdict(list)
+    for pool_id, org_id in Pool.objects.filter(id__in=pool_ids).values_list("id", "organization_id"):
+        pools_by_org[org_id].append(pool_id)
+    limits = limits_by_organization(list(pools_by_org))
+
+    rollups = {}
+    for org_id, org_pool_ids in pools_by_org.items():
+        for model in (WaterReading, ArchivedWaterReading):
+            for row in _day_aggregates(model, org_pool_ids, limits[org_id], days):
+                for metric in ROLLUP_METRICS:
+                    _add(
+                        rollups,
+                        row["pool_id"],
+                        ReadingRollup.PERIOD_DAY,
+                        row["day"],
+                        metric,
+                        {
+                            "count": row[f"{metric}_count"],
+                            "out_of_norm_count": row.get(f"{metric}_out"),
+                            "value_sum": row[f"{metric}_sum"],
+                            "min_value": row[f"{metric}_min"],
+                            "max_value": row[f"{metric}_max"],
+                        },
+                    )
+    _replace(ReadingRollup.PERIOD_DAY, pool_ids, days, rollups)
+    if days is None:
+        return None
+    return {day.replace(day=1) for day in days}
+
+
+def refresh_month_rollups(pool_ids, months=None):
+    """Re-sum the month rollups of ``pool_ids`` from their day rollups (all months if None)."""
+    pool_ids = set(pool_ids)
+    if not pool_ids or months == set():
+        return
+    days = ReadingRollup.objects.filter(pool_id__in=pool_ids, period=ReadingRollup.PERIOD_DAY)
+    if months is not None:
+        days = days.filter(period_start__gte=min(months), period_start__lt=add_month(max(months), 1))
+    rows = (
+        days.order_by()
+        .annotate(month=TruncMonth("period_start"))
+        .values("pool_id", "metric", "month")
+        .annotate(
+            count=Sum("count"),
+            out_of_norm_count=Sum("out_of_norm_count"),
+            value_sum=Sum("value_sum"),
+            min_value=Min("min_value"),
+            max_value=Max("max_value"),
+        )
+    )
+    rollups = {}
+    for row in rows:
+        if months is None or row["month"] in months:
+            _add(rollups, row["pool_id"], ReadingRollup.PERIOD_MONTH, row["month"], row["metric"], row)
+    _replace(ReadingRollup.PERIOD_MONTH, pool_ids, months, rollups)
+
+
+def refresh_rollups(pool_ids, days=None):
+    months = refresh_day_rollups(pool_ids, days)
+    refresh_month_rollups(pool_ids, months)
+
+
+def record_reading_change(reading):
+    """Refresh the rollups of the day a reading is on, and of the day it was loaded with if it moved."""
+    days = {reading.day, getattr(reading, "loaded_day", None)} - {None}
+    refresh_rollups([reading.pool_id], days)
+
+
+def pool_trend(pool, metric, period, start, end):
+    """``[{"period_start", "avg", "min", "max", "count", "out_of_norm"}]`` of one metric between two dates."""
+    rollups = ReadingRollup.objects.filter(
+        pool=pool,
+        metric=metric,
+        period=period,
+        period_start__gte=start,
+        period_start__lte=end,
+    ).order_by("period_start")
+    return [
+        {
+            "period_start": rollup.period_start.isoformat(),
+            "avg": round(rollup.avg_value, 3),
+            "min": rollup.min_value,
+            "max": rollup.max_value,
+            "count": rollup.count,
+            "out_of_norm": rollup.out_of_norm_count,
+        }
+        for rollup in rollups
+    ]
+
+
+def organization_summary(org_id, period, start, end):
+    """Per-period totals across the organization's pools: ``{metric: [{period_start, avg, min, max, count, out_of_norm}]}``."""
+    rows = (
+        ReadingRollup.objects.filter(
+            pool__organization_id=org_id,
+            period=period,
+            period_start__gte=start,
+            period_start__lte=end,
+        )
+        .order_by("metric", "period_start")
+        .values("metric", "period_start")
+        .annotate(
+            count=Sum("count"),
+            out_of_norm=Sum("out_of_norm_count"),
+            value_sum=Sum("value_sum"),
+            min=Min("min_value"),
+            max=Max("max_value"),
+        )
+    )
+    summary = defaultdict(list)
+    for row in rows:
+        summary[row["metric"]].append(
+            {
+                "period_start": row["period_start"].isoformat(),
+                "avg": round(row["value_sum"] / row["count"], 3) if row["count"] else None,
+                "min": row["min"],
+                "max": row["max"],
+                "count": row["count"],
+                "out_of_norm": row["out_of_norm"],
+            }
+        )
+    return dict(summary)
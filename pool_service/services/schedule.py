@@ -0,0 +1,597 @@
+"""Service visit schedule engine.
+
+Pure functions over preloaded pools, readings, plans and tasks: nothing here
+touches the database, so the calendar, the JSON feed and management commands
+can share one computation for any date range.
+"""
+from __future__ import annotations
+
+import calendar
+import json
+from dataclasses import dataclass, field
+from datetime import date, time, timedelta
+from urllib.parse import urlencode
+
+from django.urls import reverse
+
+from pool_service.models import Pool, ServiceTask
+
+
+STATUS_ORDER = {"overdue": 0, "planned": 1, "done": 2}
+
+
+@dataclass(frozen=True)
+class Occurrence:
+    pool_id: int
+    source_week_start: date
+    due_date: date
+    planned_date: date | None
+    plan_id: int | None
+    status: str
+    actual_date: date | None
+    reading_id: int | None
+    is_extra: bool = False
+
+    @property
+    def display_date(self) -> date:
+        return self.actual_date or self.planned_date or self.due_date
+
+
+@dataclass
+class StatusCounts:
+    overdue: int = 0
+    planned: int = 0
+    done: int = 0
+
+    def add(self, status):
+        if status == "overdue":
+            self.overdue += 1
+        elif status == "planned":
+            self.planned += 1
+        else:
+            self.done += 1
+
+    def __iadd__(self, other):
+        self.overdue += other.overdue
+        self.planned += other.planned
+        self.done += other.done
+        return self
+
+
+@dataclass
+class VisitItem:
+    client_name: str
+    display_name: str
+    pool_ids: list
+    status: str
+    date: date
+    week_start: date
+    source_week_start: str
+    source_weeks: str
+    source_month: str
+    allow_month_move: bool
+    is_draggable: bool
+    title: str
+    object_type: str
+    responsible_ids: list = field(default_factory=list)
+    item_type: str = "auto"
+    kind_order: int = 0
+    start_time: time | None = None
+
+
+@dataclass
+class TaskItem:
+    client_name: str
+    display_name: str
+    status: str
+    date: date
+    priority: str
+    visibility: str
+    is_completed: bool
+    title: str
+    task_id: int | None = None
+    is_multi: bool = False
+    span_days: int = 1
+    is_continued: bool = False
+    start_date: date | None = None
+    end_date: date | None = None
+    start_time: time | None = None
+    start_time_label: str = ""
+    is_draggable: bool = False
+    edit_url: str = ""
+    item_type: str = "task"
+    kind_order: int = 1
+
+
+def add_month(d: date, months: int) -> date:
+    month_index = d.month - 1 + months
+    year = d.year + (month_index // 12)
+    month = (month_index % 12) + 1
+    day = min(d.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day)
+
+
+def week_start(d: date) -> date:
+    return d - timedelta(days=d.weekday())
+
+
+def month_range(month: date) -> tuple[date, date]:
+    """Calendar grid of ``month``: from the Monday of its first week to the Sunday of its last."""
+    last_day = date(month.year, month.month, calendar.monthrange(month.year, month.month)[1])
+    return week_start(month.replace(day=1)), last_day + timedelta(days=(6 - last_day.weekday()))
+
+
+def shift_from_weekend(d: date) -> date:
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d - timedelta(days=2)
+    return d
+
+
+def frequency_days(pool):
+    if pool.service_interval_days:
+        return int(pool.service_interval_days)
+    mapping = {
+        Pool.SERVICE_FREQ_WEEKLY: 7,
+        Pool.SERVICE_FREQ_TWICE_MONTHLY: 14,
+    }
+    return mapping.get(pool.service_frequency)
+
+
+def frequency_months(pool):
+    mapping = {
+        Pool.SERVICE_FREQ_MONTHLY: 1,
+        Pool.SERVICE_FREQ_BIMONTHLY: 2,
+        Pool.SERVICE_FREQ_QUARTERLY: 3,
+        Pool.SERVICE_FREQ_TWICE_YEARLY: 6,
+        Pool.SERVICE_FREQ_YEARLY: 12,
+    }
+    return mapping.get(pool.service_frequency)
+
+
+def frequency_label(pool):
+    if pool.service_interval_days:
+        return f"Каждые {pool.service_interval_days} дней"
+    if pool.service_frequency:
+        return pool.get_service_frequency_display()
+    return "Не задана"
+
+
+def period_kind(pool):
+    if pool.service_interval_days:
+        return "week" if int(pool.service_interval_days) <= 14 else "month"
+    if pool.service_frequency in {Pool.SERVICE_FREQ_WEEKLY, Pool.SERVICE_FREQ_TWICE_MONTHLY}:
+        return "week"
+    return "month"
+
+
+def period_key(kind, d):
+    return week_start(d) if kind == "week" else f"{d.year}-{d.month:02d}"
+
+
+def is_scheduled(pool) -> bool:
+    if getattr(pool, "service_suspended", False):
+        return False
+    return bool(frequency_days(pool) or frequency_months(pool))
+
+
+def pool_occurrences(pool, anchor_date, readings, plans_by_week, range_start, range_end, today) -> list[Occurrence]:
+    """Replay the visit recurrence of one pool over ``[range_start, range_end]``.
+
+    ``readings`` are the staff readings of the pool inside the range and
+    ``plans_by_week`` maps a source week start to its ``ServiceVisitPlan``.
+    Readings that do not close a planned visit are returned as extra visits.
+    """
+    if not is_scheduled(pool) or not anchor_date:
+        return []
+    interval_days = frequency_days(pool)
+    interval_months = frequency_months(pool)
+    kind = period_kind(pool)
+
+    readings_by_period = {}
+    for reading in sorted(readings, key=lambda item: (item.date, item.id)):
+        if not reading.date:
+            continue
+        reading_date = reading.date.date()
+        readings_by_period.setdefault(period_key(kind, reading_date), []).append((reading_date, reading))
+
+    used_reading_ids = set()
+
+    def _select_reading(expected_date):
+        available = [
+            (reading_date, reading)
+            for reading_date, reading in readings_by_period.get(period_key(kind, expected_date), [])
+            if reading.id not in used_reading_ids
+        ]
+        if not available:
+            return None, None
+        chosen_date, chosen = min(
+            available,
+            key=lambda entry: (abs((entry[0] - expected_date).days), entry[0], entry[1].id),
+        )
+        used_reading_ids.add(chosen.id)
+        return chosen_date, chosen
+
+    occurrences = []
+
+    def _visit(due_date):
+        week_key = week_start(due_date)
+        plan = plans_by_week.get(week_key)
+        planned_date = plan.planned_date if plan else due_date
+        actual_date, reading = _select_reading(planned_date)
+        if reading:
+            status = "done"
+        else:
+            status = "overdue" if (week_key + timedelta(days=6)) < today else "planned"
+        occurrences.append(
+            Occurrence(
+                pool_id=pool.id,
+                source_week_start=week_key,
+                due_date=due_date,
+                planned_date=planned_date,
+                plan_id=plan.id if plan else None,
+                status=status,
+                actual_date=actual_date,
+                reading_id=reading.id if reading else None,
+            )
+        )
+        return actual_date
+
+    anchor = anchor_date
+    if interval_days:
+        due_date = anchor + timedelta(days=interval_days)
+        if due_date < range_start:
+            delta_days = (range_start - due_date).days
+            steps = delta_days // interval_days
+            if due_date + timedelta(days=steps * interval_days) < range_start:
+                steps += 1
+            due_date = due_date + timedelta(days=steps * interval_days)
+
+        while due_date <= range_end:
+            actual_date = _visit(due_date)
+            if actual_date:
+                due_date = actual_date + timedelta(days=interval_days)
+            else:
+                due_date = due_date + timedelta(days=interval_days)
+    else:
+        step = 1
+        due_date = shift_from_weekend(add_month(anchor, interval_months * step))
+        if due_date < range_start:
+            delta_months = (range_start.year - anchor.year) * 12 + (range_start.month - anchor.month)
+            step = max(1, delta_months // interval_months)
+            while shift_from_weekend(add_month(anchor, interval_months * step)) < range_start:
+                step += 1
+            due_date = shift_from_weekend(add_month(anchor, interval_months * step))
+
+        while due_date <= range_end:
+            actual_date = _visit(due_date)
+            if actual_date:
+                anchor = actual_date
+                step = 1
+            else:
+                step += 1
+            due_date = shift_from_weekend(add_month(anchor, interval_months * step))
+
+    extra_seen = set()
+    for entries in readings_by_period.values():
+        for actual_date, reading in entries:
+            if reading.id in used_reading_ids or actual_date in extra_seen:
+                continue
+            extra_seen.add(actual_date)
+            used_reading_ids.add(reading.id)
+            occurrences.append(
+                Occurrence(
+                    pool_id=pool.id,
+                    source_week_start=week_start(actual_date),
+                    due_date=actual_date,
+                    planned_date=None,
+                    plan_id=None,
+                    status="done",
+                    actual_date=actual_date,
+                    reading_id=reading.id,
+                    is_extra=True,
+                )
+            )
+    return occurrences
+
+
+def occurrences_for_range(pools, anchors, readings_by_pool, plans_by_pool, range_start, range_end, today):
+    """Occurrences of every scheduled pool over an arbitrary (multi-month) range.
+
+    ``anchors`` maps a pool id to the date of its last visit before ``range_start``;
+    pools without one are anchored at their creation date.
+    """
+    result = {}
+    for pool in pools:
+        if not is_scheduled(pool):
+            continue
+        anchor_date = anchors.get(pool.id) or (pool.created_at.date() if pool.created_at else None)
+        result[pool.id] = pool_occurrences(
+            pool,
+            anchor_date,
+            readings_by_pool.get(pool.id, []),
+            plans_by_pool.get(pool.id, {}),
+            range_start,
+            range_end,
+            today,
+        )
+    return result
+
+
+def user_label(user):
+    if not user:
+        return ""
+    return user.get_full_name() or user.username or str(user.id)
+
+
+def visit_items(pools, occurrences_by_pool, range_start, range_end, today, responsible_by_pool=None, responsible_filter=None):
+    """Group pool occurrences into calendar chips (one per client, week and object type).
+
+    Base visits are grouped before extra visits so that chip order is stable.
+    Returns ``(items, StatusCounts)``; extra visits are not counted.
+    """
+    responsible_by_pool = responsible_by_pool or {}
+    responsible_filter = set(responsible_filter or ())
+    grouped = {}
+    for is_extra_pass in (False, True):
+        for pool in pools:
+            responsible = responsible_by_pool.get(pool.id)
+            if responsible_filter and (not responsible or responsible.id not in responsible_filter):
+                continue
+            for occurrence in occurrences_by_pool.get(pool.id, []):
+                if occurrence.is_extra != is_extra_pass:
+                    continue
+                display_week_start = week_start(occurrence.display_date)
+                group_key = occurrence.actual_date if occurrence.is_extra else display_week_start
+                object_type = pool.object_type or Pool.OBJECT_TYPE_POOL
+                key = (pool.client_id, ("extra" if occurrence.is_extra else "base", group_key), object_type)
+                group = grouped.setdefault(
+                    key,
+                    {
+                        "client_name": pool.client.name,
+                        "week_start": display_week_start,
+                        "week_end": display_week_start + timedelta(days=6),
+                        "pool_ids": [],
+                        "pool_addresses": [],
+                        "plan_dates": [],
+                        "due_dates": [],
+                        "actual_dates": [],
+                        "frequency_labels": set(),
+                        "responsibles": set(),
+                        "responsible_ids": set(),
+                        "allow_month_move": True,
+                        "source_weeks": {},
+                        "is_extra": occurrence.is_extra,
+                        "object_type": object_type,
+                    },
+                )
+                group["pool_ids"].append(pool.id)
+                group["pool_addresses"].append(pool.address)
+                group["due_dates"].append(occurrence.due_date)
+                group["source_weeks"][pool.id] = occurrence.source_week_start
+                if occurrence.planned_date:
+                    group["plan_dates"].append(occurrence.planned_date)
+                if occurrence.actual_date:
+                    group["actual_dates"].append(occurrence.actual_date)
+                group["frequency_labels"].add(frequency_label(pool))
+                if responsible:
+                    group["responsibles"].add(responsible.get_full_name() or responsible.username)
+                    group["responsible_ids"].add(responsible.id)
+                group["allow_month_move"] = group["allow_month_move"] and period_kind(pool) == "month"
+
+    items = []
+    counts = StatusCounts()
+    for group in grouped.values():
+        is_extra = group["is_extra"]
+        if group["actual_dates"]:
+            event_date = min(group["actual_dates"])
+            status = "done"
+            draggable = False
+        else:
+            status = "overdue" if group["week_end"] < today else "planned"
+            event_date = min(group["plan_dates"]) if group["plan_dates"] else min(group["due_dates"])
+            draggable = status == "planned"
+
+        if event_date < range_start or event_date > range_end:
+            continue
+        if not is_extra:
+            counts.add(status)
+
+        pool_count = len(group["pool_ids"])
+        display_name = group["client_name"]
+        if pool_count > 1:
+            display_name = f"{display_name} ({pool_count})"
+
+        addresses = group["pool_addresses"]
+        addresses_display = ", ".join(addresses[:3])
+        if len(addresses) > 3:
+            addresses_display = f"{addresses_display} и еще {len(addresses) - 3}"
+
+        group_frequency_label = None
+        if len(group["frequency_labels"]) == 1:
+            group_frequency_label = next(iter(group["frequency_labels"]))
+        elif len(group["frequency_labels"]) > 1:
+            group_frequency_label = "Несколько частот"
+
+        responsible_label = None
+        if len(group["responsibles"]) == 1:
+            responsible_label = next(iter(group["responsibles"]))
+        elif len(group["responsibles"]) > 1:
+            responsible_label = "Несколько"
+
+        title_parts = [f"Бассейнов: {pool_count}"]
+        if addresses_display:
+            title_parts.append(f"Адреса: {addresses_display}")
+        if responsible_label:
+            title_parts.append(f"Ответственный: {responsible_label}")
+        if status == "done":
+            title_parts.append(f"Выезд: {event_date:%d.%m.%Y}")
+        else:
+            title_parts.append(f"План: {event_date:%d.%m.%Y}")
+        if is_extra:
+            title_parts.append("Дополнительный выезд")
+        if group_frequency_label:
+            title_parts.append(f"Частота: {group_frequency_label}")
+        if status == "overdue":
+            title_parts.append("Просрочено")
+
+        source_weeks = {str(pid): week.isoformat() for pid, week in group["source_weeks"].items()}
+        source_week_values = list({week.isoformat() for week in group["source_weeks"].values()})
+
+        items.append(
+            VisitItem(
+                client_name=group["client_name"],
+                display_name=display_name,
+                pool_ids=group["pool_ids"],
+                status=status,
+                date=event_date,
+                week_start=group["week_start"],
+                source_week_start=source_week_values[0] if len(source_week_values) == 1 else "",
+                source_weeks=json.dumps(source_weeks),
+                source_month=event_date.strftime("%Y-%m"),
+                allow_month_move=group["allow_month_move"],
+                is_draggable=draggable,
+                title=" | ".join(title_parts),
+                object_type=group["object_type"],
+                responsible_ids=sorted(group["responsible_ids"]),
+            )
+        )
+    return items, counts
+
+
+def task_items(tasks, range_start, range_end, today, viewer=None, return_url=""):
+    """Calendar chips for service tasks overlapping the range.
+
+    ``tasks`` must have ``responsibles`` prefetched. Returns
+    ``(items, search_index, StatusCounts)``; multi-day tasks get a continuation
+    chip for every following day inside the range.
+    """
+    items = []
+    search_index = []
+    counts = StatusCounts()
+    viewer_id = getattr(viewer, "id", None)
+    viewer_is_superuser = bool(getattr(viewer, "is_superuser", False))
+    for task in tasks:
+        task_start = task.start_date
+        task_end = task.end_date or task.start_date
+        if task_end < range_start or task_start > range_end:
+            continue
+
+        is_completed = bool(task.completed_at)
+        if is_completed:
+            status = "done"
+        elif task_end < today:
+            status = "overdue"
+        else:
+            status = "planned"
+        counts.add(status)
+
+        task_responsibles = list(task.responsibles.all())
+        responsible_names = [name for name in (user_label(user) for user in task_responsibles) if name]
+        responsible_label = ", ".join(responsible_names)
+
+        title_parts = []
+        if responsible_label:
+            title_parts.append(f"Участники: {responsible_label}")
+        if task.priority == ServiceTask.PRIORITY_HIGH:
+            title_parts.append("Важная задача")
+        if task_start == task_end:
+            title_parts.append(f"Дата: {task_start:%d.%m.%Y}")
+        else:
+            title_parts.append(f"Период: {task_start:%d.%m.%Y} — {task_end:%d.%m.%Y}")
+        if task.start_time and task.end_time:
+            title_parts.append(f"Время: {task.start_time:%H:%M} — {task.end_time:%H:%M}")
+        elif task.start_time:
+            title_parts.append(f"Время начала: {task.start_time:%H:%M}")
+        elif task.end_time:
+            title_parts.append(f"Время окончания: {task.end_time:%H:%M}")
+        if is_completed and task.completed_at:
+            title_parts.append(f"Выполнено: {task.completed_at:%d.%m.%Y}")
+        if status == "overdue":
+            title_parts.append("Просрочено")
+        title = " | ".join(title_parts)
+
+        can_edit = viewer_is_superuser or viewer_id in {user.id for user in task_responsibles}
+        edit_url = ""
+        if can_edit:
+            edit_url = reverse("task_edit", kwargs={"task_id": task.id})
+            if return_url:
+                edit_url = f"{edit_url}?{urlencode({'next': return_url})}"
+
+        display_start = max(task_start, range_start)
+        display_end = min(task_end, range_end)
+        span_days = (task_end - task_start).days + 1
+        start_time_label = task.start_time.strftime("%H:%M") if task.start_time else ""
+
+        items.append(
+            TaskItem(
+                client_name=task.title,
+                display_name=task.title,
+                status=status,
+                date=display_start,
+                priority=task.priority,
+                visibility=task.visibility,
+                is_completed=is_completed,
+                title=title,
+                task_id=task.id,
+                is_multi=span_days > 1,
+                span_days=span_days,
+                is_continued=task_start < range_start,
+                start_date=task_start,
+                end_date=task_end,
+                start_time=task.start_time,
+                start_time_label=start_time_label,
+                is_draggable=can_edit and not is_completed,
+                edit_url=edit_url,
+            )
+        )
+        search_index.append(
+            {
+                "id": task.id,
+                "title": task.title,
+                "date": task_start.isoformat(),
+                "date_label": (
+                    f"{task_start:%d.%m.%Y}" if task_start == task_end else f"{task_start:%d.%m.%Y} — {task_end:%d.%m.%Y}"
+                ),
+                "time_label": start_time_label,
+                "edit_url": edit_url,
+                "priority": task.priority,
+                "status": status,
+            }
+        )
+
+        cursor = display_start + timedelta(days=1)
+        while span_days > 1 and cursor <= display_end:
+            items.append(
+                TaskItem(
+                    client_name=task.title,
+                    display_name=task.title,
+                    status=status,
+                    date=cursor,
+                    priority=task.priority,
+                    visibility=task.visibility,
+                    is_completed=is_completed,
+                    title=title,
+                    item_type="task_continuation",
+                    kind_order=2,
+                )
+            )
+            cursor += timedelta(days=1)
+    return items, search_index, counts
+
+
+def items_by_date(items):
+    result = {}
+    for item in items:
+        result.setdefault(item.date, []).append(item)
+    for day_items in result.values():
+        day_items.sort(
+            key=lambda item: (
+                STATUS_ORDER.get(item.status, 9),
+                item.kind_order,
+                item.start_time or time.max,
+                item.client_name or "",
+            )
+        )
+    return result
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from pool_service.models import (
+    Client,
+    OrganizationAccess,
+    Pool,
+    PoolAccess,
+    PoolVisitState,
+    ServiceOccurrence,
+    ServiceTask,
+    ServiceVisitPlan,
+    WaterReading,
+)
+from pool_service.services.schedule import (
+    Occurrence,
+    add_month,
+    is_scheduled,
+    month_range,
+    occurrences_for_range,
+)
+from pool_service.services.visit_state import last_visit_dates_before, staff_user_ids_by_org
+
+
+def _today():
+    return timezone.localdate() if settings.USE_TZ else date.today()
+
+
+def schedule_months(today=None):
+    """First days of the months whose calendar grids are materialized."""
+    today = today or _today()
+    past_months = getattr(settings, "SERVICE_SCHEDULE_PAST_MONTHS", 12)
+    future_months = getattr(settings, "SERVICE_SCHEDULE_FUTURE_MONTHS", 12)
+    return [add_month(today.replace(day=1), offset) for offset in range(-past_months, future_months + 1)]
+
+
+def schedule_horizon(today=None):
+    months = schedule_months(today)
+    return month_range(months[0])[0], month_range(months[-1])[1]
+
+
+def regenerate_pool_schedules(pool_ids, today=None):
+    """Replace the stored occurrences of the pools with a replay of every month grid in the horizon.
+
+    Each grid is replayed on its own, anchored at the last staff visit before it,
+    exactly as ``live_occurrences`` does for that range. The inputs are loaded
+    once for the whole horizon.
+    """
+    pool_ids = set(pool_ids)
+    if not pool_ids:
+        return 0
+    today = today or _today()
+    horizon_start, horizon_end = schedule_horizon(today)
+    pools = list(Pool.objects.filter(id__in=pool_ids))
+    scheduled = [pool for pool in pools if is_scheduled(pool)]
+    rows = []
+    if scheduled:
+        anchors, readings_by_pool, plans_by_pool = _schedule_inputs(scheduled, horizon_start, horizon_end)
+        for month in schedule_months(today):
+            window_start, window_end = month_range(month)
+            window_anchors, window_readings, window_plans = {}, {}, {}
+            for pool in scheduled:
+                readings = readings_by_pool.get(pool.id, [])
+                earlier = [reading for reading in readings if reading.day < window_start]
+                if earlier:
+                    window_anchors[pool.id] = max(earlier, key=lambda reading: (reading.day, reading.date)).date.date()
+                elif pool.id in anchors:
+                    window_anchors[pool.id] = anchors[pool.id]
+                window_readings[pool.id] = [
+                    reading for reading in readings if window_start <= reading.day <= window_end
+                ]
+                window_plans[pool.id] = {
+                    week: plan
+                    for week, plan in plans_by_pool.get(pool.id, {}).items()
+                    if window_start <= week <= window_end
+                }
+            window = occurrences_for_range(
+                scheduled, window_anchors, window_readings, window_plans, window_start, window_end, today
+            )
+            for pool_id, occurrences in window.items():
+                for occurrence in occurrences:
+                    rows.append(
+                        ServiceOccurrence(
+                            pool_id=pool_id,
+                            window_start=window_start,
+                            source_week_start=occurrence.source_week_start,
+                            due_date=occurrence.due_date,
+                            planned_date=occurrence.planned_date,
+                            actual_date=occurrence.actual_date,
+                            display_date=occurrence.display_date,
+                            status=occurrence.status,
+                            is_extra=occurrence.is_extra,
+                            plan_id=occurrence.plan_id,
+                            reading_id=occurrence.reading_id,
+                        )
+                    )
+
+    existing_ids = [pool.id for pool in pools]
+    with transaction.atomic():
+        ServiceOccurrence.objects.filter(pool_id__in=existing_ids).delete()
+        ServiceOccurrence.objects.bulk_create(rows, batch_size=1000)
+        PoolVisitState.objects.filter(pool_id__in=existing_ids).update(
+            schedule_start=horizon_start,
+            schedule_end=horizon_end,
+        )
+    _bump_calendars({pool.organization_id for pool in pools if pool.organization_id})
+    return len(rows)
+
+
+def _bump_calendars(org_ids):
+    # calendar_cache reads the stored schedule, so it is imported here rather than at the top.
+    from pool_service.services.calendar_cache import bump_calendar_versions
+
+    if not org_ids:
+        return
+    # Bump again after commit: a calendar built mid-transaction would cache the old rows.
+    bump_calendar_versions(org_ids)
+    transaction.on_commit(lambda: bump_calendar_versions(org_ids))
+
+
+def _schedule_inputs(pools, range_start, range_end):
+    """``(anchors, readings_by_pool, plans_by_pool)`` for replaying ``pools`` over the range.
+
+    Only visits by staff of the pool's own organization count as service visits.
+    """
+    pool_ids = [pool.id for pool in pools]
+    anchors = last_visit_dates_before(pools, range_start)
+    staff = staff_user_ids_by_org({pool.organization_id for pool in pools if pool.organization_id})
+
+    readings_by_pool = {}
+    staff_ids = set().union(*staff.values()) if staff else set()
+    if staff_ids:
+        for reading in WaterReading.objects.filter(
+            pool_id__in=pool_ids,
+            added_by_id__in=staff_ids,
+            day__gte=range_start,
+            day__lte=range_end,
+        ).only("id", "pool_id", "date", "day", "added_by_id").order_by("date"):
+            readings_by_pool.setdefault(reading.pool_id, []).append(reading)
+    pools_by_id = {pool.id: pool for pool in pools}
+    for pool_id, readings in readings_by_pool.items():
+        pool_staff = staff.get(pools_by_id[pool_id].organization_id, set())
+        readings_by_pool[pool_id] = [reading for reading in readings if reading.added_by_id in pool_staff]
+
+    plans_by_pool = {}
+    for plan in ServiceVisitPlan.objects.filter(
+        pool_id__in=pool_ids,
+        week_start__gte=range_start,
+        week_start__lte=range_end,
+    ):
+        plans_by_pool.setdefault(plan.pool_id, {})[plan.week_start] = plan
+    return anchors, readings_by_pool, plans_by_pool
+
+
+def live_occurrences(pools, range_start, range_end, today=None):
+    """Replay the recurrence for ``pools`` over the range straight from readings and plans.
+
+    The replay is anchored at each pool's last staff visit before ``range_start``.
+    """
+    today = today or _today()
+    pools = [pool for pool in pools if is_scheduled(pool)]
+    if not pools:
+        return {}
+    anchors, readings_by_pool, plans_by_pool = _schedule_inputs(pools, range_start, range_end)
+    return occurrences_for_range(pools, anchors, readings_by_pool, plans_by_pool, range_start, range_end, today)
+
+
+def occurrences_for_pools(pools, range_start, range_end, today=None):
+    """Occurrences for any range: stored rows where the horizon covers it, live replay otherwise."""
+    today = today or _today()
+    pools = list(pools)
+    occurrences_by_pool, uncovered = stored_occurrences(pools, range_start, range_end, today)
+    if uncovered:
+        uncovered = set(uncovered)
+        occurrences_by_pool.update(
+            live_occurrences([pool for pool in pools if pool.id in uncovered], range_start, range_end, today)
+        )
+    return occurrences_by_pool
+
+
+def regenerate_organization_schedules(org_ids, today=None):
+    pool_ids = Pool.objects.filter(organization_id__in=org_ids).values_list("id", flat=True)
+    return regenerate_pool_schedules(pool_ids, today=today)
+
+
+def stored_occurrences(pools, range_start, range_end, today=None):
+    """Read materialized occurrences when the range is a month grid inside the pools' stored horizon.
+
+    Returns ``(occurrences_by_pool, uncovered_pool_ids)``; the caller replays the
+    recurrence itself for the uncovered pools. Any other range is uncovered for
+    every pool, since its replay would be anchored differently.
+    """
+    today = today or _today()
+    pool_ids = [pool.id for pool in pools]
+    covered = set()
+    if (range_start, range_end) == month_range(range_start + timedelta(days=6)):
+        covered = set(
+            PoolVisitState.objects.filter(
+                pool_id__in=pool_ids,
+                schedule_start__lte=range_start,
+                schedule_end__gte=range_end,
+            ).values_list("pool_id", flat=True)
+        )
+    occurrences_by_pool = {}
+    if covered:
+        rows = ServiceOccurrence.objects.filter(pool_id__in=covered, window_start=range_start)
+        for row in rows.order_by("pool_id", "id"):
+            status = row.status
+            if status != ServiceOccurrence.STATUS_DONE:
+                overdue = row.source_week_start + timedelta(days=6) < today
+                status = ServiceOccurrence.STATUS_OVERDUE if overdue else ServiceOccurrence.STATUS_PLANNED
+            occurrences_by_pool.setdefault(row.pool_id, []).append(
+                Occurrence(
+                    pool_id=row.pool_id,
+                    source_week_start=row.source_week_start,
+                    due_date=row.due_date,
+                    planned_date=row.planned_date,
+                    plan_id=row.plan_id,
+                    status=status,
+                    actual_date=row.actual_date,
+                    reading_id=row.reading_id,
+                    is_extra=row.is_extra,
+                )
+            )
+    uncovered = [pool_id for pool_id in pool_ids if pool_id not in covered]
+    return occurrences_by_pool, uncovered
+
+
+def schedule_fingerprint(pool_ids, organization_id=None):
+    """Cheap version of everything the calendar for these pools is computed from.
+
+    Max ``updated_at`` catches edits, row counts catch deletes. Occurrence rows are
+    regenerated on pool changes, so their ``generated_at`` covers pool settings.
+    Client and user names have no timestamp, so the names shown on the chips are
+    hashed as they are.
+    """
+    pool_ids = list(pool_ids)
+    sources = []
+    members = Q()
+    users = Q()
+    if pool_ids:
+        sources += [
+            (WaterReading.objects.filter(pool_id__in=pool_ids), "updated_at"),
+            (ServiceVisitPlan.objects.filter(pool_id__in=pool_ids), "updated_at"),
+            (ServiceOccurrence.objects.filter(pool_id__in=pool_ids), "generated_at"),
+            (PoolAccess.objects.filter(pool_id__in=pool_ids), "id"),
+        ]
+        members |= Q(organization_id__in=Pool.objects.filter(id__in=pool_ids).values("organization_id"))
+        users |= Q(poolaccess__pool_id__in=pool_ids)
+    if organization_id:
+        sources += [
+            (ServiceTask.objects.filter(organization_id=organization_id), "updated_at"),
+            (ServiceTask.responsibles.through.objects.filter(servicetask__organization_id=organization_id), "id"),
+        ]
+        members |= Q(organization_id=organization_id)
+        users |= Q(service_tasks__organization_id=organization_id) | Q(organizationaccess__organization_id=organization_id)
+    if members:
+        # Pool responsibles are the organization staff with access to the pool.
+        sources.append((OrganizationAccess.objects.filter(members), "id"))
+    parts = []
+    for queryset, stamp_field in sources:
+        stats = queryset.aggregate(last=Max(stamp_field), count=Count("id"))
+        parts.append(f"{queryset.model._meta.model_name}:{stats['last']}/{stats['count']}")
+
+    names = hashlib.sha1()
+    if pool_ids:
+        pool_clients = Pool.objects.filter(id__in=pool_ids).values("client_id")
+        for row in Client.objects.filter(id__in=pool_clients).order_by("id").values_list("id", "name"):
+            names.update(repr(row).encode("utf-8"))
+    if users:
+        for row in (
+            User.objects.filter(users)
+            .distinct()
+            .order_by("id")
+            .values_list("id", "username", "first_name", "last_name", "is_active")
+        ):
+            names.update(repr(row).encode("utf-8"))
+    parts.append(f"names:{names.hexdigest()}")
+    return "|".join(parts)
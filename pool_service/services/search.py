@@ -0,0 +1,222 @@
+"""Full-text search over pools and CRM items.
+
+Every indexed object has one ``SearchDocument`` whose casefolded body is indexed by
+the database: an FTS5 table on SQLite, a FULLTEXT index on MySQL. Other databases,
+and queries made only of words too short for the index, fall back to a substring
+match on the body, which still reads a single table instead of joining the sources.
+"""
+
+from __future__ import annotations
+
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from pool_service.models import CrmItem, Pool, SearchDocument
+from pool_service.services.bulk import bulk_upsert
+
+
+FTS_TABLE = "pool_service_searchdocument_fts"
+FULLTEXT_INDEX = "searchdoc_body_ft"
+WORD_RE = re.compile(r"\w+")
+
+
+def _body(*parts):
+    return " ".join(str(part) for part in parts if part).casefold()
+
+
+def pool_document(pool):
+    client = pool.client
+    organization_id = pool.organization_id or (client.organization_id if client else None)
+    body = _body(
+        client.name if client else "",
+        pool.address,
+        pool.organization.name if pool.organization_id else "",
+    )
+    return organization_id, body
+
+
+def crm_document(item):
+    client = item.client
+    responsible = item.responsible
+    body = _body(
+        item.title,
+        client.name if client else "",
+        client.company_name if client else "",
+        item.pool.address if item.pool_id else "",
+        item.description,
+        item.service_works,
+        item.equipment_replacement,
+        item.photo_url,
+        item.stage,
+        item.urgency,
+        responsible.first_name if responsible else "",
+        responsible.last_name if responsible else "",
+        responsible.username if responsible else "",
+        item.organization.name,
+    )
+    return item.organization_id, body
+
+
+def _save_documents(kind, object_ids, documents):
+    bulk_upsert(
+        SearchDocument,
+        [
+            SearchDocument(kind=kind, object_id=object_id, organization_id=organization_id, body=body)
+            for object_id, (organization_id, body) in documents.items()
+        ],
+        unique_fields=["kind", "object_id"],
+        update_fields=["organization", "body", "updated_at"],
+        batch_size=500,
+    )
+    missing = set(object_ids) - set(documents)
+    if missing:
+        SearchDocument.objects.filter(kind=kind, object_id__in=missing).delete()
+    return len(documents)
+
+
+def index_pools(pool_ids):
+    pool_ids = set(pool_ids)
+    if not pool_ids:
+        return 0
+    pools = Pool.objects.filter(id__in=pool_ids).select_related("client", "organization")
+    return _save_documents(SearchDocument.KIND_POOL, pool_ids, {pool.id: pool_document(pool) for pool in pools})
+
+
+def index_crm_items(item_ids):
+    item_ids = set(item_ids)
+    if not item_ids:
+        return 0
+    items = CrmItem.objects.filter(id__in=item_ids).select_related("client", "pool", "responsible", "organization")
+    return _save_documents(SearchDocument.KIND_CRM, item_ids, {item.id: crm_document(item) for item in items})
+
+
+def index_pool_dependents(pool_ids):
+    """Reindex pools and the CRM items that show their address."""
+    index_pools(pool_ids)
+    index_crm_items(CrmItem.objects.filter(pool_id__in=list(pool_ids)).values_list("id", flat=True))
+
+
+def index_clients(client_ids):
+    client_ids = list(client_ids)
+    index_pools(Pool.objects.filter(client_id__in=client_ids).values_list("id", flat=True))
+    index_crm_items(CrmItem.objects.filter(client_id__in=client_ids).values_list("id", flat=True))
+
+
+def index_organizations(org_ids):
+    org_ids = list(org_ids)
+    index_pools(
+        Pool.objects.filter(Q(organization_id__in=org_ids) | Q(client__organization_id__in=org_ids)).values_list(
+            "id",
+            flat=True,
+        )
+    )
+    index_crm_items(CrmItem.objects.filter(organization_id__in=org_ids).values_list("id", flat=True))
+
+
+def index_responsibles(user_ids):
+    index_crm_items(CrmItem.objects.filter(responsible_id__in=list(user_ids)).values_list("id", flat=True))
+
+
+def remove_documents(kind, object_ids):
+    SearchDocument.objects.filter(kind=kind, object_id__in=list(object_ids)).delete()
+
+
+def search_words(query):
+    return WORD_RE.findall(query.casefold())
+
+
+class SubstringBackend:
+    """Substring match on the stored body; keeps the old ``icontains`` semantics."""
+
+    def search(self, kind, query, organization_ids=None, limit=None, object_ids=None):
+        documents = SearchDocument.objects.filter(kind=kind, body__contains=query.casefold().strip())
+        if organization_ids is not None:
+            documents = documents.filter(organization_id__in=organization_ids)
+        if object_ids is not None:
+            documents = documents.filter(object_id__in=object_ids)
+        documents = documents.order_by("-updated_at").values_list("object_id", flat=True)
+        return list(documents[:limit] if limit else documents)
+
+
+class _FullTextBackend:
+    min_word_length = 1
+
+    def match_sql(self, kind, words):
+        """Return SQL selecting matching ``object_id`` values first, with a ``{scope}`` slot, and its params."""
+        raise NotImplementedError
+
+    def search(self, kind, query, organization_ids=None, limit=None, object_ids=None):
+        words = [word for word in search_words(query) if len(word) >= self.min_word_length]
+        if not words:
+            return SubstringBackend().search(kind, query, organization_ids, limit, object_ids)
+        sql, params = self.match_sql(kind, words)
+        scope = ""
+        if organization_ids is not None:
+            organization_ids = list(organization_ids)
+            if not organization_ids:
+                return []
+            scope = f" AND d.organization_id IN ({', '.join(['%s'] * len(organization_ids))})"
+            params += organization_ids
+        if object_ids is not None:
+            subquery, subquery_params = object_ids.query.get_compiler(connection=connection).as_sql()
+            scope += f" AND d.object_id IN ({subquery})"
+            params += list(subquery_params)
+        sql = sql.format(scope=scope)
+        if limit:
+            sql += " LIMIT %s"
+            params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+class SqliteFtsBackend(_FullTextBackend):
+    def match_sql(self, kind, words):
+        expression = " ".join(f'"{word}"*' for word in words)
+        return (
+            f"SELECT d.object_id FROM {FTS_TABLE} f "
+            f"JOIN {SearchDocument._meta.db_table} d ON d.id = f.rowid "
+            f"WHERE d.kind = %s AND {FTS_TABLE} MATCH %s{{scope}} ORDER BY f.rank"
+        ), [kind, expression]
+
+
+class MysqlFulltextBackend(_FullTextBackend):
+    # InnoDB skips words shorter than innodb_ft_min_token_size (3 by default).
+    min_word_length = 3
+
+    def match_sql(self, kind, words):
+        expression = " ".join(f"+{word}*" for word in words)
+        return (
+            "SELECT d.object_id, MATCH(d.body) AGAINST(%s IN BOOLEAN MODE) AS score "
+            f"FROM {SearchDocument._meta.db_table} d "
+            "WHERE d.kind = %s AND MATCH(d.body) AGAINST(%s IN BOOLEAN MODE){scope} "
+            "ORDER BY score DESC"
+        ), [expression, kind, expression]
+
+
+def _sqlite_fts_available():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def get_backend():
+    if connection.vendor == "sqlite" and _sqlite_fts_available():
+        return SqliteFtsBackend()
+    if connection.vendor == "mysql":
+        return MysqlFulltextBackend()
+    return SubstringBackend()
+
+
+def search(kind, query, organization_ids=None, object_ids=None):
+    """Ids of ``kind`` objects matching ``query``, best match first.
+
+    ``object_ids``, a queryset of the ids the user may see, is applied in the same
+    query, so ``SEARCH_RESULT_LIMIT`` only ever cuts off visible matches.
+    """
+    if not query.strip():
+        return []
+    return get_backend().search(kind, query, organization_ids, limit=settings.SEARCH_RESULT_LIMIT, object_ids=object_ids)
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from django.db.models import Max, OuterRef, Q, Subquery
+
+from pool_service.models import ArchivedWaterReading, OrganizationAccess, Pool, PoolVisitState, WaterReading
+from pool_service.services.bulk import bulk_upsert
+
+
+def staff_user_ids_by_org(org_ids) -> dict[int, set[int]]:
+    staff = {}
+    for org_id, user_id in OrganizationAccess.objects.filter(
+        organization_id__in=org_ids,
+        user__is_active=True,
+    ).values_list("organization_id", "user_id"):
+        staff.setdefault(org_id, set()).add(user_id)
+    return staff
+
+
+def refresh_pool_visit_states(pool_ids):
+    pool_ids = set(pool_ids)
+    if not pool_ids:
+        return 0
+    pools_by_org = {}
+    for pool_id, org_id in Pool.objects.filter(id__in=pool_ids).values_list("id", "organization_id"):
+        pools_by_org.setdefault(org_id, []).append(pool_id)
+    staff = staff_user_ids_by_org([org_id for org_id in pools_by_org if org_id])
+
+    last_visits = {}
+    for org_id, org_pool_ids in pools_by_org.items():
+        staff_ids = staff.get(org_id)
+        if not org_id or not staff_ids:
+            continue
+        # Archived readings are older than the hot ones, so they only matter for pools without a hot visit.
+        for model in (WaterReading, ArchivedWaterReading):
+            pending = [pool_id for pool_id in org_pool_ids if pool_id not in last_visits]
+            if not pending:
+                break
+            last_visits.update(
+                model.objects.filter(pool_id__in=pending, added_by_id__in=staff_ids)
+                .values("pool_id")
+                .annotate(last_visit_at=Max("date"))
+                .values_list("pool_id", "last_visit_at")
+            )
+
+    states = [
+        PoolVisitState(pool_id=pool_id, last_visit_at=last_visits.get(pool_id))
+        for org_pool_ids in pools_by_org.values()
+        for pool_id in org_pool_ids
+    ]
+    bulk_upsert(PoolVisitState, states, unique_fields=["pool"], update_fields=["last_visit_at", "updated_at"])
+    return len(states)
+
+
+def refresh_organization_visit_states(org_ids):
+    pool_ids = Pool.objects.filter(organization_id__in=org_ids).values_list("id", flat=True)
+    return refresh_pool_visit_states(pool_ids)
+
+
+def record_reading_visit(reading):
+    """Move the pool's last visit forward for a newly added staff reading."""
+    pool = reading.pool
+    if not reading.date or not reading.added_by_id or not pool.organization_id:
+        return
+    is_staff = OrganizationAccess.objects.filter(
+        organization_id=pool.organization_id,
+        user_id=reading.added_by_id,
+        user__is_active=True,
+    ).exists()
+    if not is_staff:
+        return
+    updated = PoolVisitState.objects.filter(pool_id=pool.id).filter(
+        Q(last_visit_at__isnull=True) | Q(last_visit_at__lt=reading.date)
+    ).update(last_visit_at=reading.date)
+    if not updated and not PoolVisitState.objects.filter(pool_id=pool.id).exists():
+        refresh_pool_visit_states([pool.id])
+
+
+def last_visit_dates_before(pools, before) -> dict:
+    """Calendar date of the last staff visit before ``before`` for each pool.
+
+    Pools whose stored last visit is already earlier than ``before`` are answered
+    from ``PoolVisitState``; the rest fall back to a per-pool top-1 subquery.
+    """
+    pools = list(pools)
+    if not pools:
+        return {}
+    states = dict(
+        PoolVisitState.objects.filter(pool_id__in=[pool.id for pool in pools]).values_list(
+            "pool_id",
+            "last_visit_at",
+        )
+    )
+    result = {}
+    pending = []
+    for pool in pools:
+        if not pool.organization_id:
+            continue
+        if pool.id not in states:
+            pending.append(pool.id)
+            continue
+        last_visit_at = states[pool.id]
+        if last_visit_at is None:
+            continue
+        if last_visit_at.date() < before:
+            result[pool.id] = last_visit_at.date()
+        else:
+            pending.append(pool.id)
+
+    for model in (WaterReading, ArchivedWaterReading):
+        if not pending:
+            break
+        last_visit = (
+            model.objects.filter(
+                pool_id=OuterRef("pk"),
+                day__lt=before,
+                added_by__is_active=True,
+                added_by__organizationaccess__organization_id=OuterRef("organization_id"),
+            )
+            .order_by("-day", "-date")
+            .values("date")[:1]
+        )
+        for pool_id, last_visit_at in (
+            Pool.objects.filter(id__in=pending)
+            .annotate(last_visit_at=Subquery(last_visit))
+            .values_list("id", "last_visit_at")
+        ):
+            if last_visit_at:
+                result[pool_id] = last_visit_at.date()
+        # Pools with no visit in the hot table may have one in the archive.
+        pending = [pool_id for pool_id in pending if pool_id not in result]
+    return result
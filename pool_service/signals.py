@@ -1,7 +1,43 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Profile
+from .models import (
+    Client,
+    ClientAccess,
+    CrmItem,
+    Notification,
+    NotificationCounter,
+    Organization,
+    OrganizationAccess,
+    Pool,
+    PoolAccess,
+    Profile,
+    RequestProfile,
+    SearchDocument,
+    ServiceTask,
+    ServiceVisitPlan,
+    WaterReading,
+)
+from .services.calendar_cache import bump_calendar_versions
+from .services.notification_counters import adjust_unread, tab_of
+from .services.permissions import forget_user_access
+from .services.pool_stats import record_reading_added, record_reading_removed, refresh_pool_stats
+from .services.rollups import record_reading_change, refresh_rollups
+from .services.search import (
+    index_clients,
+    index_crm_items,
+    index_organizations,
+    index_pool_dependents,
+    index_responsibles,
+    remove_documents,
+)
+from .services.schedule_store import regenerate_organization_schedules, regenerate_pool_schedules
+from .services.visit_state import (
+    record_reading_visit,
+    refresh_organization_visit_states,
+    refresh_pool_visit_states,
+)
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -11,3 +47,297 @@ def create_user_profile(sender, instance, created, **kwargs):
 #@receiver(post_save, sender=User)
 #def save_user_profile(sender, instance, **kwargs):
 #    instance.profile.save()
+
+
+def _refresh_pools(pool_ids):
+    refresh_pool_visit_states(pool_ids)
+    regenerate_pool_schedules(pool_ids)
+
+
+def _refresh_organizations(org_ids):
+    refresh_organization_visit_states(org_ids)
+    regenerate_organization_schedules(org_ids)
+
+
+USER_LABEL_FIELDS = ("username", "first_name", "last_name")
+
+
+@receiver(post_init, sender=User)
+def remember_user_status(sender, instance, **kwargs):
+    # Deferred fields are not loaded here, so read the attribute dict rather than the field.
+    instance.loaded_is_active = instance.__dict__.get("is_active")
+    instance.loaded_label = tuple(instance.__dict__.get(name) for name in USER_LABEL_FIELDS)
+
+
+@receiver(post_save, sender=User)
+def refresh_visit_states_on_user_status(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    # Only blocking or unblocking staff changes whose visits count; logins and profile edits do not.
+    loaded_is_active, instance.loaded_is_active = getattr(instance, "loaded_is_active", None), instance.is_active
+    if created or raw or loaded_is_active == instance.is_active:
+        return
+    if update_fields is not None and "is_active" not in update_fields:
+        return
+    org_ids = list(OrganizationAccess.objects.filter(user=instance).values_list("organization_id", flat=True))
+    if org_ids:
+        _refresh_organizations(org_ids)
+
+
+@receiver(post_save, sender=Pool)
+def refresh_visit_state_on_pool_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _refresh_pools([instance.id])
+
+
+@receiver(post_save, sender=WaterReading)
+def update_visit_state_on_reading_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        record_reading_visit(instance)
+    else:
+        refresh_pool_visit_states([instance.pool_id])
+    regenerate_pool_schedules([instance.pool_id])
+
+
+@receiver(post_delete, sender=WaterReading)
+def update_visit_state_on_reading_delete(sender, instance, **kwargs):
+    # The pool itself may be going away in the same cascade, so wait for commit.
+    pool_id = instance.pool_id
+    transaction.on_commit(lambda: _refresh_pools([pool_id]))
+
+
+@receiver(post_save, sender=WaterReading)
+def update_pool_stats_on_reading_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        record_reading_added(instance)
+    else:
+        refresh_pool_stats([instance.pool_id])
+
+
+@receiver(post_delete, sender=WaterReading)
+def update_pool_stats_on_reading_delete(sender, instance, **kwargs):
+    record_reading_removed(instance)
+
+
+@receiver(post_save, sender=WaterReading)
+def update_rollups_on_reading_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_reading_change(instance)
+
+
+@receiver(post_delete, sender=WaterReading)
+def update_rollups_on_reading_delete(sender, instance, **kwargs):
+    # The pool may be going away in the same cascade, so wait for commit.
+    pool_id, day = instance.pool_id, instance.day
+    transaction.on_commit(lambda: refresh_rollups([pool_id], {day}))
+
+
+@receiver(post_save, sender=ServiceVisitPlan)
+def regenerate_schedule_on_plan_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        regenerate_pool_schedules([instance.pool_id])
+
+
+@receiver(post_delete, sender=ServiceVisitPlan)
+def regenerate_schedule_on_plan_delete(sender, instance, **kwargs):
+    pool_id = instance.pool_id
+    transaction.on_commit(lambda: regenerate_pool_schedules([pool_id]))
+
+
+@receiver(post_save, sender=OrganizationAccess)
+def refresh_visit_states_on_membership_save(sender, instance, created, raw=False, **kwargs):
+    # The role does not decide whose visits count, so a role change needs no refresh.
+    loaded = getattr(instance, "loaded_membership", None)
+    instance.loaded_membership = (instance.user_id, instance.organization_id)
+    if raw or (not created and loaded == instance.loaded_membership):
+        return
+    org_ids = {instance.organization_id}
+    if loaded and loaded[1]:
+        org_ids.add(loaded[1])
+    _refresh_organizations(org_ids)
+
+
+@receiver(post_delete, sender=OrganizationAccess)
+def refresh_visit_states_on_membership_delete(sender, instance, **kwargs):
+    org_id = instance.organization_id
+    transaction.on_commit(lambda: _refresh_organizations([org_id]))
+
+
+def _bump_calendar(*org_ids):
+    # Bump again after commit: a calendar built mid-transaction would cache the old rows.
+    org_ids = [org_id for org_id in org_ids if org_id]
+    if org_ids:
+        bump_calendar_versions(org_ids)
+        transaction.on_commit(lambda: bump_calendar_versions(org_ids))
+
+
+def _pool_organization_id(instance):
+    if instance._meta.get_field("pool").is_cached(instance):
+        return instance.pool.organization_id
+    return Pool.objects.filter(id=instance.pool_id).values_list("organization_id", flat=True).first()
+
+
+# Readings, visit plans, staff and pools regenerate the stored schedule, which bumps the version itself.
+@receiver(post_save, sender=PoolAccess)
+@receiver(post_delete, sender=PoolAccess)
+def bump_calendar_on_pool_data(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _bump_calendar(_pool_organization_id(instance))
+
+
+@receiver(post_save, sender=Pool)
+@receiver(post_delete, sender=Pool)
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=ServiceTask)
+@receiver(post_delete, sender=ServiceTask)
+@receiver(post_save, sender=OrganizationAccess)
+@receiver(post_delete, sender=OrganizationAccess)
+def bump_calendar_on_organization_data(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _bump_calendar(instance.organization_id)
+
+
+@receiver(m2m_changed, sender=ServiceTask.responsibles.through)
+def bump_calendar_on_task_responsibles(sender, instance, action, pk_set=None, **kwargs):
+    if isinstance(instance, ServiceTask):
+        if action in {"post_add", "post_remove", "post_clear"}:
+            _bump_calendar(instance.organization_id)
+    elif action in {"post_add", "post_remove", "pre_clear"}:
+        # Changed from the user's side: the tasks are in pk_set, or all of the user's before a clear.
+        tasks = ServiceTask.objects.filter(id__in=pk_set) if pk_set is not None else instance.service_tasks.all()
+        _bump_calendar(*set(tasks.values_list("organization_id", flat=True)))
+
+
+@receiver(post_save, sender=User)
+def bump_calendar_on_user_label(sender, instance, created, raw=False, **kwargs):
+    # Calendar chips name staff members; logins and other saves leave the names alone.
+    label = tuple(getattr(instance, name) for name in USER_LABEL_FIELDS)
+    loaded_label, instance.loaded_label = getattr(instance, "loaded_label", None), label
+    if created or raw or loaded_label == label:
+        return
+    _bump_calendar(*OrganizationAccess.objects.filter(user=instance).values_list("organization_id", flat=True))
+
+
+@receiver(post_save, sender=User)
+def create_notification_counter(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        NotificationCounter.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Notification)
+def count_unread_on_notification_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    was_unread = False if created else getattr(instance, "loaded_unread", False)
+    if instance.is_unread != was_unread:
+        adjust_unread([instance.user_id], {tab_of(instance.kind): 1 if instance.is_unread else -1})
+    instance.loaded_unread = instance.is_unread
+
+
+@receiver(post_delete, sender=Notification)
+def count_unread_on_notification_delete(sender, instance, **kwargs):
+    if getattr(instance, "loaded_unread", instance.is_unread):
+        adjust_unread([instance.user_id], {tab_of(instance.kind): -1})
+
+
+def _forget_access(user_ids):
+    # Forget again after commit: a request during the transaction would cache the old rows.
+    user_ids = [user_id for user_id in user_ids if user_id]
+    if user_ids:
+        forget_user_access(user_ids)
+        transaction.on_commit(lambda: forget_user_access(user_ids))
+
+
+@receiver(post_save, sender=User)
+def forget_access_of_new_user(sender, instance, created, raw=False, **kwargs):
+    # A new user can reuse the id of a deleted one whose snapshot has not expired.
+    if created and not raw:
+        forget_user_access([instance.id])
+
+
+@receiver(post_save, sender=OrganizationAccess)
+@receiver(post_delete, sender=OrganizationAccess)
+@receiver(post_save, sender=ClientAccess)
+@receiver(post_delete, sender=ClientAccess)
+def forget_access_on_membership(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _forget_access([instance.user_id])
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def forget_access_on_organization(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _forget_access(OrganizationAccess.objects.filter(organization_id=instance.id).values_list("user_id", flat=True))
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def forget_access_on_client(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _forget_access(
+            [instance.user_id, *ClientAccess.objects.filter(client_id=instance.id).values_list("user_id", flat=True)]
+        )
+
+
+@receiver(post_save, sender=Pool)
+@receiver(post_delete, sender=Pool)
+def forget_access_on_personal_pool(sender, instance, raw=False, **kwargs):
+    # Only the pools of a personal client are part of the snapshot.
+    if not raw and instance.client_id:
+        _forget_access(
+            Client.objects.filter(id=instance.client_id, organization__isnull=True).values_list("user_id", flat=True)
+        )
+
+
+def _touches(update_fields, names):
+    return update_fields is None or bool(set(update_fields) & names)
+
+
+@receiver(post_save, sender=Pool)
+def index_pool_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_pool_dependents([instance.id])
+
+
+@receiver(post_delete, sender=Pool)
+def remove_pool_document(sender, instance, **kwargs):
+    remove_documents(SearchDocument.KIND_POOL, [instance.id])
+
+
+@receiver(post_save, sender=CrmItem)
+def index_crm_item_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_crm_items([instance.id])
+
+
+@receiver(post_delete, sender=CrmItem)
+def remove_crm_item_document(sender, instance, **kwargs):
+    remove_documents(SearchDocument.KIND_CRM, [instance.id])
+
+
+@receiver(post_save, sender=Client)
+def index_client_objects_on_save(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        index_clients([instance.id])
+
+
+@receiver(post_save, sender=Organization)
+def index_organization_objects_on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if not created and not raw and _touches(update_fields, {"name"}):
+        index_organizations([instance.id])
+
+
+@receiver(post_save, sender=User)
+def index_responsible_items_on_user_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if not created and not raw and _touches(update_fields, {"first_name", "last_name", "username"}):
+        index_responsibles([instance.id])
+
+
+@receiver(post_delete, sender=RequestProfile)
+def remove_request_profile_files(sender, instance, **kwargs):
+    for file in (instance.stats_file, instance.flamegraph_file):
+        if file:
+            file.delete(save=False)
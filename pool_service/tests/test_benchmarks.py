@@ -0,0 +1,40 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from pool_service.models import Pool, ServiceOccurrence, WaterReading
+
+
+class BenchmarkCommandsTests(TestCase):
+    def test_generate_demo_data_and_benchmark(self):
+        call_command(
+            "generate_demo_data",
+            organizations=1,
+            clients=3,
+            pools=2,
+            months=2,
+            tasks=3,
+            crm=3,
+            stdout=StringIO(),
+        )
+        self.assertEqual(Pool.objects.count(), 6)
+        self.assertTrue(WaterReading.objects.exists())
+        self.assertTrue(ServiceOccurrence.objects.exists())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / "bench.json"
+            call_command(
+                "benchmark_views",
+                user="demo1_staff1",
+                targets=["readings_all", "pool_detail", "generate_notifications"],
+                repeat=1,
+                output=str(output),
+                stdout=StringIO(),
+            )
+            results = json.loads(output.read_text(encoding="utf-8"))["results"]
+        self.assertEqual(set(results), {"readings_all", "pool_detail", "generate_notifications"})
+        self.assertGreater(results["readings_all"]["queries"], 0)
@@ -0,0 +1,72 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+from pool_service.db_backends import pooling
+
+
+class PooledBackendTests(SimpleTestCase):
+    # The wrappers below use their own settings but share the "default" alias name.
+    databases = {"default"}
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+        self.addCleanup(pooling.close_pools)
+
+    def _connection(self, **pool_options):
+        handler = ConnectionHandler(
+            {
+                "default": {
+                    "ENGINE": "pool_service.db_backends.sqlite3",
+                    "NAME": self.path,
+                    "POOL": {"MAX_SIZE": 2, "MAX_LIFETIME": 60, "HEALTH_CHECK_INTERVAL": 30, **pool_options},
+                }
+            }
+        )
+        connection = handler["default"]
+        self.addCleanup(connection.close)
+        return connection
+
+    def _metrics(self, connection):
+        return connection.connection_pool().metrics()
+
+    def test_closed_connection_is_reused(self):
+        connection = self._connection()
+        connection.ensure_connection()
+        raw = connection.connection
+        connection.close()
+        connection.ensure_connection()
+        self.assertIs(connection.connection, raw)
+        self.assertEqual(
+            {key: self._metrics(connection)[key] for key in ("created", "reused", "in_use", "idle")},
+            {"created": 1, "reused": 1, "in_use": 1, "idle": 0},
+        )
+
+    def test_old_and_broken_connections_are_replaced(self):
+        connection = self._connection(HEALTH_CHECK_INTERVAL=0)
+        connection.ensure_connection()
+        raw = connection.connection
+        connection.close()
+        raw.close()
+        connection.ensure_connection()
+        self.assertIsNot(connection.connection, raw)
+        self.assertEqual(self._metrics(connection)["failed_checks"], 1)
+
+        raw = connection.connection
+        connection.close()
+        with mock.patch.object(pooling.time, "monotonic", return_value=pooling.time.monotonic() + 120):
+            connection.ensure_connection()
+        self.assertIsNot(connection.connection, raw)
+        self.assertEqual(self._metrics(connection)["recycled"], 1)
+
+    def test_connection_closed_inside_a_transaction_is_discarded(self):
+        connection = self._connection()
+        connection.ensure_connection()
+        with mock.patch.object(connection, "in_atomic_block", True):
+            connection.close()
+        self.assertEqual((self._metrics(connection)["discarded"], self._metrics(connection)["idle"]), (1, 0))
@@ -0,0 +1,66 @@
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from pool_service import db_router
+from pool_service.middleware import ReplicaPinMiddleware
+from pool_service.models import Client, Organization, OrganizationAccess, Pool
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(db_router, "replica_configured", return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = db_router.ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def _routed_view(self, request):
+        @db_router.read_from_replica
+        def view(request):
+            return HttpResponse(self.router.db_for_read(Pool))
+
+        return view(request).content.decode()
+
+    def test_only_safe_unpinned_requests_read_from_the_replica(self):
+        self.assertEqual(self._routed_view(self.factory.get("/")), "replica")
+        self.assertEqual(self._routed_view(self.factory.post("/")), "default")
+        pinned = self.factory.get("/")
+        pinned.COOKIES[db_router.PIN_COOKIE] = "1"
+        self.assertEqual(self._routed_view(pinned), "default")
+
+        with db_router.replica_reads():
+            self.assertEqual(self.router.db_for_write(Pool), "default")
+            with db_router.replica_reads(False):
+                self.assertEqual(self.router.db_for_read(Pool), "default")
+        self.assertEqual(self.router.db_for_read(Pool), "default")
+
+    def test_writes_pin_the_browser_to_the_primary(self):
+        middleware = ReplicaPinMiddleware(lambda request: HttpResponse())
+        with mock.patch("pool_service.middleware.replica_configured", return_value=True):
+            self.assertNotIn(db_router.PIN_COOKIE, middleware(self.factory.get("/")).cookies)
+            cookie = middleware(self.factory.post("/")).cookies[db_router.PIN_COOKIE]
+        self.assertEqual(cookie["max-age"], 5)
+
+
+@skipUnless(db_router.replica_configured(), "set DB_REPLICA_NAME to run against a second database")
+@override_settings(CACHE_IS_SHARED=True)
+class ReplicaDatabaseTests(TestCase):
+    databases = "__all__"
+
+    def test_list_reads_the_replica_until_pinned(self):
+        org = Organization.objects.create(name="Аквасервис", trial_started_at=timezone.now())
+        user = User.objects.create_user(username="manager", password="pass")
+        OrganizationAccess.objects.create(user=user, organization=org, role="manager")
+        client = Client.objects.create(name="Иванов", organization=org)
+        Pool.objects.create(client=client, address="ул. Лесная, 12", organization=org)
+        self.client.force_login(user)
+
+        # The pool exists only on the primary; the replica test database is empty.
+        self.assertNotContains(self.client.get(reverse("pool_list")), "Лесная")
+        self.client.cookies[db_router.PIN_COOKIE] = "1"
+        self.assertContains(self.client.get(reverse("pool_list")), "Лесная")
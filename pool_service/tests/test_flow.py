@@ -116,3 +116,16 @@ class PoolServiceFlowTests(TestCase):
         addresses = {p.address for p in pools}
         self.assertIn("Свой адрес", addresses)
         self.assertNotIn("Чужой адрес", addresses)
+
+    def test_login_redirects_personal_client_to_their_pool(self):
+        solo_user = User.objects.create_user(username="solo", password="pass")
+        solo_client = Client.objects.create(user=solo_user, client_type="private", name="Соло", organization=None)
+        pool = Pool.objects.create(client=solo_client, address="Свой бассейн")
+        pool_url = reverse("pool_detail", kwargs={"pool_uuid": pool.uuid})
+
+        resp = self.http.post(reverse("login"), {"username": "solo", "password": "pass"})
+        self.assertRedirects(resp, pool_url, fetch_redirect_response=False)
+
+        self.http.logout()
+        resp = self.http.post(reverse("home"), {"username": "solo", "password": "pass"})
+        self.assertRedirects(resp, pool_url, fetch_redirect_response=False)
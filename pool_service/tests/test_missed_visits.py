@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from pool_service.management.commands.generate_notifications import Command
+from pool_service.models import Client, Notification, Organization, OrganizationAccess, Pool, WaterReading
+
+
+class MissedVisitTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org", trial_started_at=timezone.now())
+        self.tech = User.objects.create_user(username="tech", password="pass")
+        OrganizationAccess.objects.create(user=self.tech, organization=self.org, role="service")
+        self.client_record = Client.objects.create(name="Client", organization=self.org)
+
+    def pool(self, address, interval_days):
+        return Pool.objects.create(
+            client=self.client_record,
+            address=address,
+            organization=self.org,
+            service_interval_days=interval_days,
+            created_at=datetime(2026, 10, 1, 9),
+        )
+
+    def test_any_staff_reading_in_the_period_counts_as_a_visit(self):
+        visited = self.pool("Visited", 10)
+        missed = self.pool("Missed", 10)
+        # Reported per September-October; the schedule expects the first visit only on November 30.
+        not_due = self.pool("Not due", 60)
+        # Not in the week of a due visit, so the schedule shows it as an extra one.
+        WaterReading.objects.create(pool=visited, date=datetime(2026, 10, 17, 9), added_by=self.tech)
+        now = datetime(2026, 10, 23, 12, 30)
+
+        Command()._generate_missed_visits(now, now.date())
+
+        alerted = set(Notification.objects.filter(kind="missed_visit").values_list("pool_id", flat=True))
+        self.assertEqual(alerted, {missed.id, not_due.id})
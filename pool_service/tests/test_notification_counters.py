@@ -0,0 +1,79 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from pool_service.models import Notification, NotificationCounter
+from pool_service.services.notification_counters import unread_counts
+from pool_service.services.notifications import notify_users
+
+
+class NotificationCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", password="pass")
+        unread_counts(self.user)
+        self.notes = [
+            Notification.objects.create(user=self.user, kind="task_assignment", title="Task 1"),
+            Notification.objects.create(user=self.user, kind="task_assignment", title="Task 2"),
+            Notification.objects.create(user=self.user, kind="limits", title="Limits 1"),
+            Notification.objects.create(user=self.user, kind="missed_visit", title="Missed 1"),
+        ]
+        self.client.force_login(self.user)
+
+    def _counts(self):
+        return unread_counts(self.user)
+
+    def test_saves_and_deletes_keep_the_counters(self):
+        self.assertEqual(self._counts(), {"tasks": 2, "limits": 2, "total": 4})
+
+        self.client.post(reverse("notifications_mark_read", args=[self.notes[0].id]))
+        self.client.post(reverse("notification_resolve", args=[self.notes[2].id]))
+        self.assertEqual(self._counts(), {"tasks": 1, "limits": 1, "total": 2})
+
+        # Saving an already read notification again does not count twice.
+        note = Notification.objects.get(id=self.notes[0].id)
+        note.title = "Task 1 (edited)"
+        note.save()
+        Notification.objects.get(id=self.notes[2].id).delete()
+        Notification.objects.get(id=self.notes[3].id).delete()
+        self.assertEqual(self._counts(), {"tasks": 1, "limits": 0, "total": 1})
+
+    def test_bulk_actions_adjust_only_their_tab(self):
+        self.client.post(reverse("notifications_mark_all"), {"kind": "task"})
+        self.assertEqual(self._counts(), {"tasks": 0, "limits": 2, "total": 2})
+
+        self.client.post(reverse("notifications_mark_read", args=[self.notes[2].id]))
+        self.client.post(reverse("notifications_resolve_all"), {"kind": "service"})
+        self.assertEqual(self._counts(), {"tasks": 0, "limits": 0, "total": 0})
+        self.assertFalse(Notification.objects.filter(user=self.user, kind="limits", is_resolved=False).exists())
+
+        Notification.objects.create(user=self.user, kind="limits", title="Limits 2")
+        response = self.client.get(reverse("notifications_unread"))
+        self.assertEqual(response.json(), {"tasks": 0, "limits": 1, "total": 1})
+        self.assertEqual(response["Cache-Control"], "no-store")
+
+    def test_repair_command_recounts_drifted_counters(self):
+        NotificationCounter.objects.filter(user=self.user).update(tasks_unread=9, limits_unread=0)
+        other = User.objects.create_user(username="other", password="pass")
+        Notification.objects.create(user=other, kind="limits", title="Limits")
+
+        call_command("repair_notification_counters", stdout=StringIO())
+        self.assertEqual(self._counts(), {"tasks": 2, "limits": 2, "total": 4})
+        self.assertEqual(unread_counts(other)["total"], 1)
+
+    def test_fan_out_inserts_once_and_skips_users_already_notified(self):
+        users = [self.user] + [User.objects.create_user(username=f"staff{index}", password="pass") for index in range(5)]
+        users[-1].is_active = False
+        notify_users(users[:2], title="Missed", message="", kind="missed_visit", dedupe_key="missed:1")
+
+        # Existing keys, insert, read back, counters, plus the savepoint pair.
+        with self.assertNumQueries(6):
+            created = notify_users(users, title="Missed", message="", kind="missed_visit", dedupe_key="missed:1", send_push=False)
+        self.assertEqual(sorted(note.user_id for note in created), [user.id for user in users[2:5]])
+        self.assertTrue(all(note.id for note in created))
+        self.assertEqual(Notification.objects.filter(dedupe_key="missed:1").count(), 5)
+        self.assertEqual(self._counts()["limits"], 3)
+        self.assertEqual(unread_counts(users[2])["limits"], 1)
+        self.assertEqual(notify_users(users, title="Missed", message="", kind="missed_visit", dedupe_key="missed:1"), [])
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from pool_service.models import Client, Notification, Organization, OrganizationAccess, Pool, WaterReading
+from pool_service.services.pagination import cursor_page
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org", trial_started_at=timezone.now())
+        self.user = User.objects.create_user(username="tech", password="pass")
+        OrganizationAccess.objects.create(user=self.user, organization=self.org, role="service")
+        client = Client.objects.create(name="Client", organization=self.org)
+        self.pool = Pool.objects.create(client=client, address="Addr", organization=self.org)
+        start = datetime(2026, 1, 1, 10)
+        # Pairs of readings share a timestamp, so the id has to break ties.
+        self.readings = [
+            WaterReading.objects.create(pool=self.pool, date=start + timedelta(days=index // 2), added_by=self.user)
+            for index in range(25)
+        ]
+
+    def test_walks_every_row_once_in_order(self):
+        expected = [reading.id for reading in sorted(self.readings, key=lambda r: (r.date, r.id), reverse=True)]
+        seen = []
+        cursor = None
+        queryset = WaterReading.objects.filter(pool=self.pool)
+        while True:
+            page = cursor_page(queryset, ("-date", "-id"), cursor, per_page=7)
+            seen += [reading.id for reading in page]
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, expected)
+        self.assertEqual(cursor_page(queryset, ("-date", "-id"), "not-a-cursor", per_page=7).is_first, True)
+
+    def test_pool_detail_loads_more_rows(self):
+        self.client.force_login(self.user)
+        url = reverse("pool_detail", kwargs={"pool_uuid": self.pool.uuid})
+        response = self.client.get(url)
+        page = response.context["readings"]
+        self.assertEqual((len(page), page.approximate_total), (20, 25))
+
+        response = self.client.get(url, {"cursor": page.next_cursor, "partial": "1"})
+        self.assertEqual(response.content.decode().count("<tr"), 5)
+        self.assertNotIn("X-Next-Cursor", response)
+
+    @override_settings(NOTIFICATIONS_PER_PAGE=3)
+    def test_notifications_are_paged_per_tab(self):
+        for index in range(5):
+            Notification.objects.create(user=self.user, kind="limits", title=f"Deviation {index}")
+        Notification.objects.create(user=self.user, kind="task_assignment", title="Task", is_read=True)
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("notifications"))
+        deviations = response.context["deviation_notifications"]
+        self.assertEqual([note.title for note in deviations], ["Deviation 4", "Deviation 3", "Deviation 2"])
+        self.assertEqual((response.context["deviation_unread_count"], response.context["task_unread_count"]), (5, 0))
+
+        response = self.client.get(reverse("notifications"), {"tab": "limits", "cursor": deviations.next_cursor, "partial": "1"})
+        self.assertContains(response, "Deviation 1")
+        self.assertContains(response, "Deviation 0")
+        self.assertNotContains(response, "Deviation 2")
@@ -1,13 +1,17 @@
 from datetime import timedelta
 
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
 from django.utils import timezone
 
-from pool_service.models import Client, Organization, Pool
+from pool_service.models import Client, ClientAccess, Organization, OrganizationAccess, Pool, PoolAccess
 from pool_service.services.permissions import (
+    AccessContext,
     company_has_access,
     is_personal_free,
+    pool_roles_for_user,
+    request_access,
     trial_ends_at,
 )
 
@@ -37,3 +41,73 @@ class PlanAccessTests(TestCase):
         self.assertTrue(is_personal_free(user))
         Pool.objects.create(client=client, address="Addr 2")
         self.assertFalse(is_personal_free(user))
+
+    def test_request_access_is_computed_once_per_request(self):
+        org = Organization.objects.create(name="Org", trial_started_at=timezone.now() - timedelta(days=30))
+        user = User.objects.create_user(username="staff", password="pass12345")
+        OrganizationAccess.objects.create(user=user, organization=org, role="admin")
+        self.client.force_login(user)
+
+        response = self.client.get(reverse("billing"))
+        access = response.wsgi_request.access
+        with self.assertNumQueries(0):
+            self.assertEqual((access.organization, access.org_roles), (org, ["admin"]))
+            self.assertTrue(access.is_access_blocked())
+            self.assertFalse(access.is_personal_user)
+        self.assertTrue(response.context["access_blocked"])
+
+        org.paid_until = timezone.now() + timedelta(days=30)
+        org.save()
+        access.reset()
+        self.assertFalse(access.is_access_blocked())
+
+    def test_access_snapshot_is_cached_until_access_changes(self):
+        org = Organization.objects.create(name="Org", trial_started_at=timezone.now() - timedelta(days=30))
+        user = User.objects.create_user(username="owner", password="pass12345")
+        OrganizationAccess.objects.create(user=user, organization=org, role="owner")
+        self.assertTrue(AccessContext(user, use_cache=True).is_access_blocked())
+
+        with self.assertNumQueries(0):
+            access = AccessContext(user, use_cache=True)
+            self.assertEqual((access.organization, access.org_roles, access.client_access), (org, ["owner"], None))
+
+        org.paid_until = timezone.now() + timedelta(days=30)
+        org.save()
+        self.assertFalse(AccessContext(user, use_cache=True).is_access_blocked())
+
+        OrganizationAccess.objects.filter(user=user).delete()
+        client = Client.objects.create(user=user, client_type="private", name="Owner")
+        Pool.objects.create(client=client, address="Addr")
+        access = AccessContext(user, use_cache=True)
+        self.assertEqual((access.is_org_staff, access.is_personal_free), (False, True))
+
+    def test_requests_keep_access_snapshots_only_in_a_shared_cache(self):
+        request = RequestFactory().get("/")
+        request.user = User.objects.create_user(username="tech", password="pass12345")
+        with override_settings(CACHE_IS_SHARED=False):
+            self.assertFalse(request_access(request).use_cache)
+        del request.access
+        with override_settings(CACHE_IS_SHARED=True):
+            self.assertTrue(request_access(request).use_cache)
+
+    def test_pool_roles_are_resolved_for_a_batch_of_pools(self):
+        org = Organization.objects.create(name="Org", trial_started_at=timezone.now())
+        other_org = Organization.objects.create(name="Other", trial_started_at=timezone.now())
+        user = User.objects.create_user(username="tech", password="pass12345")
+        OrganizationAccess.objects.create(user=user, organization=org, role="service")
+        own_client = Client.objects.create(user=user, client_type="private", name="Own")
+        shared_client = Client.objects.create(name="Shared", organization=other_org)
+        ClientAccess.objects.create(user=user, client=shared_client, role="viewer")
+        pools = [
+            Pool.objects.create(client=Client.objects.create(name="Org client", organization=org), address="1", organization=org),
+            Pool.objects.create(client=own_client, address="2"),
+            Pool.objects.create(client=shared_client, address="3", organization=other_org),
+            Pool.objects.create(client=Client.objects.create(name="Other client", organization=other_org), address="4", organization=other_org),
+            Pool.objects.create(client=Client.objects.create(name="Hidden", organization=other_org), address="5", organization=other_org),
+        ]
+        PoolAccess.objects.create(user=user, pool=pools[3], role="editor")
+        pools = list(Pool.objects.filter(id__in=[pool.id for pool in pools]).select_related("client").order_by("address"))
+
+        with self.assertNumQueries(3):
+            roles = pool_roles_for_user(user, pools)
+        self.assertEqual([roles[pool.id] for pool in pools], ["service", "admin", "viewer", "editor", None])
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from pool_service.models import Client, Organization, OrganizationAccess, Pool, WaterReading
+
+
+class PoolStatsTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org", trial_started_at=timezone.now())
+        self.tech = User.objects.create_user(username="tech", password="pass")
+        OrganizationAccess.objects.create(user=self.tech, organization=self.org, role="service")
+        client = Client.objects.create(name="Client", organization=self.org)
+        self.pool = Pool.objects.create(client=client, address="Addr", organization=self.org)
+
+    def _stats(self):
+        pool = Pool.objects.get(id=self.pool.id)
+        return pool.readings_count, pool.last_reading_at, pool.last_ph, pool.last_reading_by_id
+
+    def test_stats_follow_reading_changes(self):
+        now = datetime.now().replace(microsecond=0)
+        latest = WaterReading.objects.create(pool=self.pool, date=now, ph=7.2, added_by=self.tech)
+        older = WaterReading.objects.create(pool=self.pool, date=now - timedelta(days=3), ph=7.6)
+        self.assertEqual(self._stats(), (2, now, 7.2, self.tech.id))
+
+        latest.ph = 7.0
+        latest.save()
+        self.assertEqual(self._stats(), (2, now, 7.0, self.tech.id))
+
+        latest.delete()
+        self.assertEqual(self._stats(), (1, older.date, 7.6, None))
+
+        # A pool instance loaded before the readings changed must not reset the statistics.
+        self.pool.address = "New address"
+        self.pool.save()
+        self.assertEqual(self._stats(), (1, older.date, 7.6, None))
+
+        Pool.objects.filter(id=self.pool.id).update(readings_count=0, last_reading_at=None)
+        call_command("rebuild_pool_stats", stdout=StringIO())
+        self.assertEqual(self._stats(), (1, older.date, 7.6, None))
+
+    def test_pool_list_sorts_by_last_reading(self):
+        other = Pool.objects.create(client=self.pool.client, address="Other", organization=self.org)
+        WaterReading.objects.create(pool=other, date=datetime.now(), added_by=self.tech)
+        WaterReading.objects.create(pool=self.pool, date=datetime.now() - timedelta(days=5), added_by=self.tech)
+        self.client.force_login(self.tech)
+
+        response = self.client.get(reverse("pool_list"), {"sort": "recent_desc"})
+        self.assertEqual([pool.id for pool in response.context["pools"]], [other.id, self.pool.id])
+        response = self.client.get(reverse("pool_list"), {"sort": "recent_asc"})
+        self.assertEqual([pool.id for pool in response.context["pools"]], [self.pool.id, other.id])
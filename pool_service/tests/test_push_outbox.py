@@ -0,0 +1,174 @@
+import base64
+import os
+import threading
+from datetime import timedelta
+from unittest import skipUnless
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from pool_service.models import PushOutbox, PushSubscription
+from pool_service.services.notifications import notify_users
+from pool_service.services.push_notifications import deliver_pending, purge_outbox
+from pywebpush import WebPusher
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _public_key():
+    key = ec.generate_private_key(ec.SECP256R1()).public_key()
+    return _b64(key.public_bytes(serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint))
+
+
+def _subscription_keys():
+    return {"p256dh": _public_key(), "auth": _b64(os.urandom(16))}
+
+
+def _webpush_can_encode():
+    # pywebpush 1.14 does not work with cryptography 42 and later.
+    try:
+        WebPusher({"endpoint": "http://localhost/", "keys": _subscription_keys()}).encode(b"probe")
+    except TypeError:
+        return False
+    return True
+
+
+VAPID_PRIVATE_KEY = _b64(ec.generate_private_key(ec.SECP256R1()).private_numbers().private_value.to_bytes(32, "big"))
+
+
+class StubPushService(BaseHTTPRequestHandler):
+    """Answers with the status code that ends the path: ``/201``, ``/410``, ``/500``."""
+
+    received = []
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.received.append((self.path, self.headers.get("TTL")))
+        self.send_response(int(self.path.rsplit("/", 1)[-1]))
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(VAPID_PUBLIC_KEY="public", VAPID_PRIVATE_KEY=VAPID_PRIVATE_KEY)
+class PushOutboxTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", password="pass")
+        self.subscription = PushSubscription.objects.create(
+            user=self.user,
+            endpoint="http://127.0.0.1:9/push",
+            **_subscription_keys(),
+        )
+
+    def test_notifications_queue_one_message_per_subscription(self):
+        notify_users([self.user], title="Title", message="Message", kind="system")
+        outbox = PushOutbox.objects.get(subscription=self.subscription)
+        self.assertEqual((outbox.status, outbox.payload["title"]), (PushOutbox.STATUS_PENDING, "Title"))
+        self.assertAlmostEqual((outbox.expires_at - outbox.created_at).total_seconds(), 3600, delta=5)
+
+    def test_deduplicated_notifications_are_pushed_once(self):
+        for _ in range(2):
+            notify_users([self.user], title="Title", message="Message", kind="limits", dedupe_key="limits:1")
+        self.assertEqual(PushOutbox.objects.count(), 1)
+
+    def test_expired_messages_are_not_sent_and_old_ones_are_purged(self):
+        notify_users([self.user], title="Title", message="Message", kind="system")
+        stats = deliver_pending(now=timezone.now() + timedelta(hours=2))
+        self.assertEqual((stats["claimed"], stats["expired"]), (1, 1))
+        self.assertEqual(PushOutbox.objects.get().status, PushOutbox.STATUS_EXPIRED)
+
+        PushOutbox.objects.update(created_at=timezone.now() - timedelta(days=30))
+        self.assertEqual(purge_outbox(7), 1)
+
+
+@skipUnless(_webpush_can_encode(), "the installed pywebpush cannot encrypt with the installed cryptography")
+@override_settings(
+    VAPID_PUBLIC_KEY="public",
+    VAPID_PRIVATE_KEY=VAPID_PRIVATE_KEY,
+    VAPID_EMAIL="admin@example.com",
+    PUSH_RETRY_BASE_SECONDS=30,
+    PUSH_MAX_ATTEMPTS=3,
+)
+class PushDeliveryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubPushService)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        StubPushService.received.clear()
+        self.user = User.objects.create_user(username="user", password="pass")
+
+    def subscribe(self, status):
+        return PushSubscription.objects.create(
+            user=self.user,
+            endpoint=f"{self.base_url}/push/{status}",
+            **_subscription_keys(),
+        )
+
+    def notify(self):
+        notify_users([self.user], title="Title", message="Message", kind="system")
+
+    def test_requests_only_queue_and_the_worker_sends(self):
+        subscription = self.subscribe(201)
+        self.notify()
+        self.assertEqual(StubPushService.received, [])
+        outbox = PushOutbox.objects.get(subscription=subscription)
+        self.assertEqual(outbox.payload["title"], "Title")
+
+        stats = deliver_pending()
+
+        self.assertEqual((stats["claimed"], stats["sent"]), (1, 1))
+        outbox.refresh_from_db()
+        self.assertEqual(outbox.status, PushOutbox.STATUS_SENT)
+        self.assertIsNotNone(outbox.sent_at)
+        path, ttl = StubPushService.received[0]
+        self.assertEqual(path, "/push/201")
+        self.assertGreater(int(ttl), 3500)
+
+    def test_gone_subscriptions_are_deleted(self):
+        subscription = self.subscribe(410)
+        self.notify()
+        self.assertEqual(deliver_pending()["gone"], 1)
+        self.assertFalse(PushSubscription.objects.filter(id=subscription.id).exists())
+        self.assertFalse(PushOutbox.objects.exists())
+
+    def test_failures_back_off_the_endpoint_until_the_attempts_run_out(self):
+        subscription = self.subscribe(500)
+        self.notify()
+        self.notify()
+        now = timezone.now()
+
+        with self.assertLogs("pool_service.services.push_notifications", "WARNING"):
+            stats = deliver_pending(batch_size=1, now=now)
+            self.assertEqual(stats["retried"], 1)
+            # Both messages of the endpoint wait, not only the one that failed.
+            for outbox in PushOutbox.objects.filter(subscription=subscription):
+                self.assertEqual(outbox.next_attempt_at, now + timedelta(seconds=30))
+            self.assertEqual(deliver_pending(now=now)["claimed"], 0)
+
+            later = now + timedelta(seconds=30)
+            self.assertEqual(deliver_pending(now=later)["retried"], 2)
+            first = PushOutbox.objects.order_by("id").first()
+            self.assertEqual((first.attempts, first.next_attempt_at), (2, later + timedelta(seconds=60)))
+            self.assertIn("500", first.last_error)
+
+            deliver_pending(now=later + timedelta(seconds=60))
+            first.refresh_from_db()
+            self.assertEqual(first.status, PushOutbox.STATUS_FAILED)
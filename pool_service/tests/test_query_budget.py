@@ -0,0 +1,216 @@
+import json
+import os
+import re
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from pool_service import urls as app_urls
+from pool_service.models import CrmItem, Notification, Pool, PoolAccess, ServiceTask, WaterReading
+
+
+# Maximum queries per GET, measured against the seeded data below plus a little headroom.
+# The seed has several clients and pools, so an N+1 pattern blows through these quickly.
+QUERY_BUDGETS = {
+    "home": 5,
+    "index": 7,
+    "pool_list": 8,
+    "pool_detail": 12,
+    "pool_trends": 10,
+    "pool_create": 15,
+    "pool_edit": 19,
+    "water_reading_create": 11,
+    "water_object_visit_create": 6,
+    "water_reading_edit": 9,
+    "readings_all": 15,
+    "readings_feed": 15,
+    "task_create": 9,
+    "task_edit": 14,
+    "profile": 11,
+    "users": 9,
+    "notifications": 8,
+    "notifications_unread": 6,
+    "organization_norms": 10,
+    "readings_import": 6,
+    "readings_export": 6,
+    "organization_trends": 7,
+    "invite_create": 7,
+    "client_staff": 12,
+    "client_invite_create": 9,
+    "billing": 8,
+    "billing_admin": 5,
+    "clients_list": 8,
+    "crm_index": 6,
+    "crm_tasks": 6,
+    "crm_list": 7,
+    "crm_create": 9,
+    "crm_edit": 11,
+    "register": 6,
+    "signup_personal": 5,
+    "signup_company": 5,
+    "client_create": 6,
+    "client_edit": 8,
+}
+
+# Routes the harness does not GET, with the reason.
+SKIPPED_ROUTES = {
+    "pool_issue_create": "POST action",
+    "pool_issue_update": "POST action",
+    "yandex_suggest": "calls an external API",
+    "task_delete": "POST action",
+    "task_move": "POST action",
+    "visit_plan_move": "POST action",
+    "notifications_mark_read": "POST action",
+    "notifications_mark_all": "POST action",
+    "notifications_resolve_all": "POST action",
+    "notification_resolve": "POST action",
+    "staff_toggle_block": "state-changing action",
+    "staff_delete": "state-changing action",
+    "staff_change_role": "state-changing action",
+    "pool_staff_change_role": "state-changing action",
+    "invite_resend": "state-changing action",
+    "invite_delete": "state-changing action",
+    "invite_accept": "needs an invite token",
+    "client_invite_resend": "state-changing action",
+    "client_invite_delete": "state-changing action",
+    "client_staff_toggle_block": "state-changing action",
+    "client_staff_delete": "state-changing action",
+    "client_staff_change_role": "state-changing action",
+    "client_invite_accept": "needs an invite token",
+    "billing_request": "POST action",
+    "confirm_email": "needs a signed token",
+    "resend_email_confirmation": "POST action",
+    "confirm_phone": "needs a verification token",
+    "password_change_inline": "POST action",
+    "smsru_callback": "external callback",
+    "push_subscribe": "POST action",
+    "push_unsubscribe": "POST action",
+    "client_delete": "state-changing action",
+}
+
+# Tables that grow without bound; a query reading all of their rows is a regression.
+FULL_SCAN_GUARDED_TABLES = {
+    WaterReading._meta.db_table,
+    Notification._meta.db_table,
+    PoolAccess._meta.db_table,
+}
+TOP_QUERIES = 5
+
+
+def _table_aliases(sql):
+    aliases = {}
+    for table, alias in re.findall(r'"(\w+)"\s+(?:AS\s+)?"?([A-Z]\d+)"?', sql):
+        aliases[alias] = table
+    return aliases
+
+
+def explain(sql):
+    """Return ``(plan_lines, fully_scanned_tables)`` for a captured query."""
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            lines = [row[-1] for row in cursor.fetchall()]
+        aliases = _table_aliases(sql)
+        scanned = set()
+        for line in lines:
+            match = re.match(r"SCAN (\w+)\b(?! USING (?:COVERING )?INDEX)", line)
+            if match and not line.startswith("SCAN subquery"):
+                scanned.add(aliases.get(match.group(1), match.group(1)))
+        return lines, scanned
+    if connection.vendor == "mysql":
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {sql}")
+            columns = [column[0] for column in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        aliases = _table_aliases(sql)
+        lines = [json.dumps(row, default=str) for row in rows]
+        scanned = {aliases.get(row["table"], row["table"]) for row in rows if row.get("type") == "ALL"}
+        return lines, scanned
+    return [], set()
+
+
+# Budgets are for a deployment with a shared cache, where calendars and access snapshots are cached.
+@override_settings(CACHE_IS_SHARED=True)
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "generate_demo_data",
+            organizations=1,
+            clients=6,
+            pools=2,
+            months=3,
+            tasks=6,
+            crm=6,
+            stdout=StringIO(),
+        )
+        cls.user = User.objects.get(username="demo1_staff1")
+        cls.pool = Pool.objects.filter(organization__isnull=False).order_by("id").first()
+        reading = WaterReading.objects.filter(pool=cls.pool).order_by("-date").first()
+        task = ServiceTask.objects.filter(responsibles=cls.user).first() or ServiceTask.objects.first()
+        task.responsibles.add(cls.user)
+        crm_item = CrmItem.objects.filter(direction=CrmItem.DIRECTION_SERVICE).first()
+        for index in range(5):
+            Notification.objects.create(
+                user=cls.user,
+                organization=cls.pool.organization,
+                pool=cls.pool,
+                kind="limits",
+                title=f"Notification {index}",
+            )
+        cls.url_kwargs = {
+            "pool_uuid": cls.pool.uuid,
+            "reading_uuid": reading.uuid,
+            "task_id": task.id,
+            "item_id": crm_item.id if crm_item else 0,
+            "client_id": cls.pool.client_id,
+            "direction": CrmItem.DIRECTION_SERVICE,
+        }
+
+    def test_every_route_has_a_budget_or_a_reason(self):
+        names = {pattern.name for pattern in app_urls.urlpatterns}
+        self.assertEqual(names - set(QUERY_BUDGETS) - set(SKIPPED_ROUTES), set())
+        self.assertEqual((set(QUERY_BUDGETS) | set(SKIPPED_ROUTES)) - names, set())
+
+    def test_views_stay_within_query_budget_and_avoid_full_scans(self):
+        self.client.force_login(self.user)
+        report = {}
+        for pattern in app_urls.urlpatterns:
+            if pattern.name not in QUERY_BUDGETS:
+                continue
+            kwargs = {key: self.url_kwargs[key] for key in pattern.pattern.converters}
+            url = reverse(pattern.name, kwargs=kwargs)
+            with self.subTest(view=pattern.name):
+                with CaptureQueriesContext(connection) as captured:
+                    response = self.client.get(url)
+                self.assertLess(response.status_code, 500)
+
+                queries = list(captured.captured_queries)
+                plans = []
+                scans = []
+                for query in queries:
+                    if not query["sql"].lstrip().upper().startswith("SELECT"):
+                        continue
+                    lines, scanned = explain(query["sql"])
+                    plans.append({"time": float(query["time"]), "sql": query["sql"], "plan": lines})
+                    for table in scanned & FULL_SCAN_GUARDED_TABLES:
+                        scans.append(f"{table}: {query['sql']}\n  " + "\n  ".join(lines))
+                plans.sort(key=lambda item: item["time"], reverse=True)
+                report[pattern.name] = {"queries": len(queries), "top": plans[:TOP_QUERIES]}
+
+                self.assertLessEqual(
+                    len(queries),
+                    QUERY_BUDGETS[pattern.name],
+                    f"{url} ran {len(queries)} queries:\n" + "\n".join(query["sql"] for query in queries),
+                )
+                self.assertEqual(scans, [], f"{url} fully scans a guarded table")
+
+        report_path = os.getenv("QUERY_PLAN_REPORT")
+        if report_path:
+            with open(report_path, "w", encoding="utf-8") as handle:
+                json.dump(report, handle, ensure_ascii=False, indent=2)
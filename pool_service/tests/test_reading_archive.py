@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from pool_service.models import ArchivedWaterReading, Client, Organization, OrganizationAccess, Pool, WaterReading
+from pool_service.services.pool_stats import refresh_pool_stats
+from pool_service.services.reading_archive import reading_history_page
+from pool_service.services.visit_state import last_visit_dates_before
+
+
+class ReadingArchiveTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org", trial_started_at=timezone.now())
+        self.tech = User.objects.create_user(username="tech", password="pass")
+        OrganizationAccess.objects.create(user=self.tech, organization=self.org, role="service")
+        client = Client.objects.create(name="Client", organization=self.org)
+        self.pool = Pool.objects.create(client=client, address="Addr", organization=self.org)
+        now = datetime.now().replace(microsecond=0)
+        # Two readings a month over three years; the newest first.
+        self.readings = [
+            WaterReading.objects.create(pool=self.pool, date=now - timedelta(days=15 * index), ph=7.0, added_by=self.tech)
+            for index in range(72)
+        ]
+
+    def _archive(self, **options):
+        call_command("archive_readings", older_than_days=800, batch_size=7, stdout=StringIO(), **options)
+
+    def test_old_readings_move_to_the_archive_and_stay_visible(self):
+        self._archive(dry_run=True)
+        self.assertEqual(ArchivedWaterReading.objects.count(), 0)
+
+        self._archive()
+        archived = ArchivedWaterReading.objects.filter(pool=self.pool)
+        self.assertEqual(archived.count(), 18)
+        self.assertEqual(WaterReading.objects.filter(pool=self.pool).count(), 54)
+        self.assertEqual(archived.order_by("-date").first().id, self.readings[54].id)
+
+        pool = Pool.objects.get(id=self.pool.id)
+        self.assertEqual(pool.readings_count, 72)
+        self.assertEqual(pool.archived_readings_until, self.readings[54].date)
+        refresh_pool_stats([pool.id])
+        self.assertEqual(Pool.objects.get(id=pool.id).readings_count, 72)
+
+        seen = []
+        cursor = None
+        while True:
+            page = reading_history_page(pool, cursor=cursor, per_page=20)
+            seen.extend(reading.id for reading in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, [reading.id for reading in self.readings])
+
+        self.client.force_login(self.tech)
+        response = self.client.get(reverse("pool_detail", kwargs={"pool_uuid": pool.uuid}), {"cursor": cursor, "partial": "1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.readings[-1].date.strftime("%d.%m.%Y %H:%M"))
+
+        # Only archived visits remain before this day; they still anchor the schedule.
+        before = self.readings[54].day + timedelta(days=1)
+        self.assertEqual(last_visit_dates_before([pool], before), {pool.id: self.readings[54].day})
+
+    def test_cutoff_inside_the_schedule_horizon_is_refused(self):
+        with self.assertRaises(CommandError):
+            call_command("archive_readings", older_than_days=30, stdout=StringIO())
@@ -0,0 +1,109 @@
+from datetime import date, datetime
+from io import BytesIO, StringIO
+from tempfile import NamedTemporaryFile
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook
+
+from pool_service.models import (
+    Client,
+    Notification,
+    Organization,
+    OrganizationAccess,
+    OrganizationWaterNorms,
+    Pool,
+    ReadingRollup,
+    WaterReading,
+)
+from pool_service.services.reading_import import ImportFormatError, import_readings
+
+
+class ReadingImportTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org", trial_started_at=timezone.now())
+        OrganizationWaterNorms.objects.create(organization=self.org, ph_min=7.0, ph_max=7.6)
+        self.owner = User.objects.create_user(username="owner", password="pass")
+        OrganizationAccess.objects.create(user=self.owner, organization=self.org, role="owner")
+        client = Client.objects.create(name="Client", organization=self.org)
+        self.pool = Pool.objects.create(client=client, address="Addr A", organization=self.org)
+        self.other = Pool.objects.create(client=client, address="Addr B", organization=self.org)
+        WaterReading.objects.create(pool=self.pool, date=datetime(2026, 3, 1, 9), ph=7.3)
+        self.csv = (
+            "pool;address;date;ph;cl_free\n"
+            f"{self.pool.uuid};;2026-03-02 09:00;7,2;1.0\n"
+            ";Addr B;02.03.2026 10:00;7.9;\n"
+            ";Addr B;02.03.2026 10:00;7.9;\n"
+            f"{self.pool.uuid};;2026-03-01 09:00;7.3;\n"
+            ";Nowhere;2026-03-02;7.0;\n"
+            f"{self.pool.uuid};;yesterday;7.0;\n"
+            f"{self.pool.uuid};;2026-03-03;70;\n"
+        ).encode()
+
+    def test_import_skips_bad_rows_and_refreshes_pools(self):
+        report = import_readings(BytesIO(self.csv), "readings.csv", self.org, chunk_size=2)
+
+        self.assertEqual((report.rows, report.created, report.duplicates, report.out_of_norm), (7, 2, 2, 1))
+        self.assertEqual([row for row, _ in report.errors], [6, 7, 8])
+        pool = Pool.objects.get(id=self.pool.id)
+        self.assertEqual((pool.readings_count, pool.last_reading_at), (2, datetime(2026, 3, 2, 9)))
+        self.assertEqual(
+            ReadingRollup.objects.get(pool=self.other, period="day", period_start=date(2026, 3, 2), metric="ph").out_of_norm_count,
+            1,
+        )
+        notification = Notification.objects.get(kind="limits", pool=self.other)
+        self.assertIn("1", notification.message)
+        self.assertFalse(Notification.objects.filter(kind="limits", pool=self.pool).exists())
+
+        # A second run finds every reading already stored.
+        report = import_readings(BytesIO(self.csv), "readings.csv", self.org)
+        self.assertEqual((report.created, report.duplicates), (0, 4))
+
+    def test_xlsx_import(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["Pool", "Address", "Date", "pH", "Cl_free"])
+        sheet.append([str(self.pool.uuid), None, datetime(2026, 3, 2, 9), 7.2, 1])
+        sheet.append([None, "Addr B", "02.03.2026 10:00", "7,4", None])
+        sheet.append([None, None, None, None, None])
+        sheet.append([str(self.pool.uuid), None, "yesterday", 7.0, None])
+        content = BytesIO()
+        workbook.save(content)
+        content.seek(0)
+
+        report = import_readings(content, "readings.xlsx", self.org)
+
+        self.assertEqual((report.rows, report.created), (3, 2))
+        self.assertEqual([row for row, _ in report.errors], [5])
+        reading = WaterReading.objects.get(pool=self.other)
+        self.assertEqual((reading.date, reading.ph), (datetime(2026, 3, 2, 10), 7.4))
+
+    def test_command_and_upload(self):
+        with NamedTemporaryFile(suffix=".csv") as handle:
+            handle.write(self.csv)
+            handle.flush()
+            out = StringIO()
+            call_command("import_readings", handle.name, organization=self.org.id, user="owner", dry_run=True, stdout=out)
+        self.assertIn("Would import 2 of 7 rows", out.getvalue())
+        self.assertEqual(WaterReading.objects.count(), 1)
+
+        self.client.force_login(self.owner)
+        response = self.client.post(
+            reverse("readings_import"),
+            {"file": SimpleUploadedFile("readings.csv", self.csv, content_type="text/csv")},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["report"].created, 2)
+        self.assertEqual(WaterReading.objects.filter(added_by=self.owner).count(), 2)
+        # The importer is staff of the organization: no out-of-norm notification, as for single readings.
+        self.assertFalse(Notification.objects.filter(kind="limits").exists())
+
+    def test_unreadable_file(self):
+        with self.assertRaises(ImportFormatError):
+            import_readings(BytesIO(b"a,b\n1,2\n"), "readings.csv", self.org)
+        with self.assertRaises(ImportFormatError):
+            import_readings(BytesIO(b""), "readings.pdf", self.org)
@@ -0,0 +1,49 @@
+import marshal
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from pool_service.models import RequestProfile
+from pool_service.services.request_profiler import PROFILE_PARAM, profile_token
+
+
+class RequestProfilerTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name, REQUEST_PROFILE_KEEP=2, REQUEST_PROFILE_SAMPLE_MS=1)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.admin = User.objects.create_superuser(username="admin", password="pass")
+        self.user = User.objects.create_user(username="user", password="pass")
+
+    def test_superuser_requests_are_profiled_on_demand(self):
+        self.client.force_login(self.admin)
+        self.client.get(reverse("profile"))
+        self.assertFalse(RequestProfile.objects.exists())
+
+        response = self.client.get(reverse("profile"), headers={"X-Profile-Request": "1"})
+        profile = RequestProfile.objects.get()
+        self.assertEqual(response["X-Request-Profile"], str(profile.id))
+        self.assertEqual((profile.view_name, profile.status_code, profile.user), ("profile", 200, self.admin))
+        self.assertGreater(profile.queries, 0)
+        with profile.stats_file.open("rb") as stats:
+            self.assertTrue(any(name == "profile_view" for _, _, name in marshal.load(stats)))
+
+        self.client.get(reverse("profile"), {PROFILE_PARAM: "forged"})
+        self.assertEqual(RequestProfile.objects.count(), 1)
+        for _ in range(2):
+            self.client.get(reverse("profile"), {PROFILE_PARAM: profile_token(self.admin)})
+        self.assertEqual(RequestProfile.objects.count(), 2)
+        self.assertFalse(RequestProfile.objects.filter(id=profile.id).exists())
+        self.assertFalse(profile.stats_file.storage.exists(profile.stats_file.name))
+
+        response = self.client.get(reverse("admin:pool_service_requestprofile_changelist"))
+        self.assertContains(response, f"?{PROFILE_PARAM}=")
+
+    def test_other_users_cannot_ask_for_profiles(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("profile"), {PROFILE_PARAM: profile_token(self.user)}, headers={"X-Profile-Request": "1"})
+        self.assertFalse(RequestProfile.objects.exists())
@@ -0,0 +1,46 @@
+import json
+
+from django.contrib.auth.models import User
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from pool_service.services.request_timing import RequestTimings, install_template_timer
+
+
+@override_settings(REQUEST_TIMING_ENABLED=True, REQUEST_TIMING_SLOW_MS=0)
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="admin", password="pass")
+        self.user = User.objects.create_user(username="user", password="pass")
+
+    def test_superusers_get_server_timing_and_slow_requests_are_logged(self):
+        self.client.force_login(self.admin)
+        with self.assertLogs("pool_service.slow_requests", "WARNING") as logs:
+            response = self.client.get(reverse("profile"))
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["Server-Timing"], r'^sql;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, view;dur=[\d.]+$')
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual((record["view"], record["status"], record["user_id"]), ("profile", 200, self.admin.id))
+        self.assertGreater(record["queries"], 0)
+        self.assertLessEqual(len(record["top_queries"]), 5)
+        self.assertEqual(record["top_queries"], sorted(record["top_queries"], key=lambda query: -query["ms"]))
+
+    def test_other_users_get_no_header(self):
+        self.client.force_login(self.user)
+        with self.assertLogs("pool_service.slow_requests", "WARNING"):
+            response = self.client.get(reverse("profile"))
+        self.assertNotIn("Server-Timing", response)
+
+    def test_slowest_queries_and_template_renders_are_recorded(self):
+        install_template_timer()
+        timings = RequestTimings(top=2)
+        with timings.capture():
+            User.objects.count()
+            User.objects.exists()
+            User.objects.first()
+            Template("{% for user in users %}{{ user.username }}{% endfor %}").render(Context({"users": User.objects.all()}))
+        self.assertEqual(timings.queries, 4)
+        self.assertEqual(len(timings.top_queries()), 2)
+        self.assertGreater(timings.template_seconds, 0)
@@ -0,0 +1,62 @@
+from datetime import date, datetime
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from pool_service.models import Client, Organization, OrganizationAccess, OrganizationWaterNorms, Pool, ReadingRollup, WaterReading
+
+
+class ReadingRollupTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org", trial_started_at=timezone.now())
+        OrganizationWaterNorms.objects.create(organization=self.org, ph_min=7.0, ph_max=7.6)
+        self.tech = User.objects.create_user(username="tech", password="pass")
+        OrganizationAccess.objects.create(user=self.tech, organization=self.org, role="service")
+        client = Client.objects.create(name="Client", organization=self.org)
+        self.pool = Pool.objects.create(client=client, address="Addr", organization=self.org)
+
+    def _rollup(self, period, period_start, metric="ph"):
+        rollup = ReadingRollup.objects.get(pool=self.pool, period=period, period_start=period_start, metric=metric)
+        return rollup.count, rollup.out_of_norm_count, round(rollup.avg_value, 3), rollup.min_value, rollup.max_value
+
+    def test_rollups_follow_reading_changes(self):
+        WaterReading.objects.create(pool=self.pool, date=datetime(2026, 3, 2, 9), ph=7.2, temperature=27)
+        moved = WaterReading.objects.create(pool=self.pool, date=datetime(2026, 3, 2, 18), ph=7.8)
+        WaterReading.objects.create(pool=self.pool, date=datetime(2026, 3, 20, 10), ph=6.8)
+        self.assertEqual(self._rollup("day", date(2026, 3, 2)), (2, 1, 7.5, 7.2, 7.8))
+        self.assertEqual(self._rollup("month", date(2026, 3, 1)), (3, 2, 7.267, 6.8, 7.8))
+        self.assertEqual(self._rollup("month", date(2026, 3, 1), "temperature")[:2], (1, 0))
+
+        moved = WaterReading.objects.get(id=moved.id)
+        moved.date = datetime(2026, 4, 1, 10)
+        moved.save()
+        self.assertEqual(self._rollup("day", date(2026, 3, 2)), (1, 0, 7.2, 7.2, 7.2))
+        self.assertEqual(self._rollup("month", date(2026, 4, 1)), (1, 1, 7.8, 7.8, 7.8))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            moved.delete()
+        self.assertFalse(ReadingRollup.objects.filter(period_start=date(2026, 4, 1)).exists())
+
+        before = sorted(ReadingRollup.objects.values_list("period", "period_start", "metric", "count", "out_of_norm_count"))
+        ReadingRollup.objects.all().delete()
+        call_command("rebuild_reading_rollups", stdout=StringIO())
+        after = sorted(ReadingRollup.objects.values_list("period", "period_start", "metric", "count", "out_of_norm_count"))
+        self.assertEqual(after, before)
+
+    def test_trend_endpoints_read_rollups(self):
+        WaterReading.objects.create(pool=self.pool, date=datetime(2026, 3, 2, 9), ph=7.2)
+        self.client.force_login(self.tech)
+
+        response = self.client.get(
+            reverse("pool_trends", kwargs={"pool_uuid": self.pool.uuid}),
+            {"metric": "ph", "period": "day", "start": "2026-03-01", "end": "2026-03-31"},
+        )
+        self.assertEqual(response.json()["items"][0]["period_start"], "2026-03-02")
+
+        response = self.client.get(reverse("organization_trends"), {"start": "2026-01-01", "end": "2026-12-31"})
+        self.assertEqual(response.json()["metrics"]["ph"][0]["count"], 1)
+        self.assertEqual(self.client.get(reverse("organization_trends"), {"period": "week"}).status_code, 400)
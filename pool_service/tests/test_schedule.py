@@ -0,0 +1,235 @@
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from pool_service.models import (
+    Client,
+    Organization,
+    OrganizationAccess,
+    Pool,
+    ServiceOccurrence,
+    ServiceTask,
+    ServiceVisitPlan,
+    WaterReading,
+)
+from pool_service.services.calendar_cache import organization_calendar_version
+from pool_service.services.schedule import add_month, month_range, pool_occurrences, shift_from_weekend, visit_items
+from pool_service.services.schedule_store import live_occurrences, stored_occurrences
+
+
+class ScheduleRecurrenceTests(TestCase):
+    def test_month_helpers(self):
+        self.assertEqual(add_month(date(2026, 1, 31), 1), date(2026, 2, 28))
+        self.assertEqual(add_month(date(2026, 1, 15), -2), date(2025, 11, 15))
+        self.assertEqual(shift_from_weekend(date(2026, 3, 8)), date(2026, 3, 6))
+
+    def test_weekly_pool_matches_readings_and_adds_extras(self):
+        pool = Pool(id=1, service_frequency=Pool.SERVICE_FREQ_WEEKLY)
+        readings = [
+            WaterReading(id=10, date=datetime(2026, 3, 10, 9)),
+            WaterReading(id=11, date=datetime(2026, 3, 12, 9)),
+        ]
+        occurrences = pool_occurrences(
+            pool,
+            date(2026, 3, 2),
+            readings,
+            {},
+            date(2026, 3, 2),
+            date(2026, 3, 29),
+            today=date(2026, 3, 20),
+        )
+        base = [item for item in occurrences if not item.is_extra]
+        extra = [item for item in occurrences if item.is_extra]
+        self.assertEqual(base[0].status, "done")
+        self.assertEqual(base[0].actual_date, date(2026, 3, 10))
+        self.assertEqual(base[1].due_date, date(2026, 3, 17))
+        self.assertEqual(base[1].status, "planned")
+        self.assertEqual([item.actual_date for item in extra], [date(2026, 3, 12)])
+
+    def test_visit_items_group_client_pools_per_week(self):
+        client = Client(id=1, name="Client")
+        pools = [
+            Pool(id=pool_id, client=client, address=f"Addr {pool_id}", service_frequency=Pool.SERVICE_FREQ_WEEKLY)
+            for pool_id in (1, 2)
+        ]
+        occurrences = {
+            pool.id: pool_occurrences(pool, date(2026, 3, 2), [], {}, date(2026, 3, 2), date(2026, 3, 15), date(2026, 3, 11))
+            for pool in pools
+        }
+        items, counts = visit_items(pools, occurrences, date(2026, 3, 2), date(2026, 3, 15), date(2026, 3, 11))
+        self.assertEqual([item.pool_ids for item in items], [[1, 2]])
+        self.assertEqual(items[0].display_name, "Client (2)")
+        self.assertEqual((counts.overdue, counts.planned, counts.done), (0, 1, 0))
+
+
+class ScheduleStoreTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org", trial_started_at=timezone.now())
+        self.tech = User.objects.create_user(username="tech", password="pass")
+        OrganizationAccess.objects.create(user=self.tech, organization=self.org, role="service")
+        client = Client.objects.create(name="Client", organization=self.org)
+        self.pool = Pool.objects.create(
+            client=client,
+            address="Addr",
+            organization=self.org,
+            service_frequency=Pool.SERVICE_FREQ_WEEKLY,
+            created_at=timezone.now() - timedelta(days=90),
+        )
+
+    def test_store_regenerates_on_reading_and_plan(self):
+        today = date.today()
+        WaterReading.objects.create(pool=self.pool, date=datetime.now() - timedelta(days=3), added_by=self.tech)
+        self.assertTrue(ServiceOccurrence.objects.filter(pool=self.pool, status="done").exists())
+
+        occurrences, uncovered = stored_occurrences([self.pool], *month_range(add_month(today, 1)))
+        self.assertEqual(uncovered, [])
+        upcoming = [item for item in occurrences[self.pool.id] if item.status == "planned"]
+        self.assertTrue(upcoming)
+
+        target = upcoming[0]
+        ServiceVisitPlan.objects.create(
+            pool=self.pool,
+            week_start=target.source_week_start,
+            planned_date=target.source_week_start + timedelta(days=4),
+        )
+        moved = ServiceOccurrence.objects.filter(pool=self.pool, source_week_start=target.source_week_start)
+        self.assertEqual({item.planned_date for item in moved}, {target.source_week_start + timedelta(days=4)})
+
+    def test_stored_months_match_the_live_replay(self):
+        month = add_month(date.today().replace(day=1), -2)
+        range_start, range_end = month_range(month)
+        # Wednesday visits, then an extra Saturday one right before the month grid starts.
+        for days_before in (26, 19, 12, 5, 2):
+            visit_day = range_start - timedelta(days=days_before)
+            WaterReading.objects.create(pool=self.pool, date=datetime.combine(visit_day, time(9)), added_by=self.tech)
+        WaterReading.objects.create(
+            pool=self.pool, date=datetime.combine(range_start + timedelta(days=9), time(9)), added_by=self.tech
+        )
+
+        def assert_months_match():
+            for target in (add_month(month, -1), month, add_month(month, 1)):
+                stored, uncovered = stored_occurrences([self.pool], *month_range(target))
+                self.assertEqual(uncovered, [])
+                self.assertEqual(stored[self.pool.id], live_occurrences([self.pool], *month_range(target))[self.pool.id])
+
+        assert_months_match()
+        stored, _ = stored_occurrences([self.pool], range_start, range_end)
+        self.assertEqual(stored[self.pool.id][0].due_date, range_start + timedelta(days=5))
+
+        ServiceVisitPlan.objects.create(
+            pool=self.pool,
+            week_start=range_start + timedelta(days=14),
+            planned_date=range_start + timedelta(days=15),
+        )
+        assert_months_match()
+
+    def test_other_ranges_are_replayed_live(self):
+        today = date.today()
+        _, uncovered = stored_occurrences([self.pool], today - timedelta(days=14), today + timedelta(days=14))
+        self.assertEqual(uncovered, [self.pool.id])
+
+    def test_suspension_clears_occurrences(self):
+        self.pool.service_suspended = True
+        self.pool.save()
+        self.assertFalse(ServiceOccurrence.objects.filter(pool=self.pool).exists())
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org", trial_started_at=timezone.now())
+        self.tech = User.objects.create_user(username="tech", password="pass")
+        OrganizationAccess.objects.create(user=self.tech, organization=self.org, role="service")
+        client = Client.objects.create(name="Client", organization=self.org)
+        self.pool = Pool.objects.create(
+            client=client,
+            address="Addr",
+            organization=self.org,
+            service_frequency=Pool.SERVICE_FREQ_WEEKLY,
+            created_at=timezone.now() - timedelta(days=30),
+        )
+        self.client.force_login(self.tech)
+
+    def test_feed_answers_not_modified_until_data_changes(self):
+        url = reverse("readings_feed")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertTrue(any(day["items"] for day in payload["days"]))
+        etag = response["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        WaterReading.objects.create(pool=self.pool, date=datetime.now(), added_by=self.tech)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_feed_etag_follows_names_and_task_responsibles(self):
+        url = reverse("readings_feed")
+        etag = self.client.get(url)["ETag"]
+
+        self.pool.client.name = "Renamed"
+        self.pool.client.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Renamed", response.content.decode())
+        etag = response["ETag"]
+
+        self.tech.first_name = "Ivan"
+        self.tech.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        task = ServiceTask.objects.create(organization=self.org, title="Task", start_date=date.today())
+        etag = self.client.get(url, HTTP_IF_NONE_MATCH=etag)["ETag"]
+        self.tech.service_tasks.add(task)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    @override_settings(CACHE_IS_SHARED=True)
+    def test_renames_and_reassignments_bump_the_calendar_version(self):
+        task = ServiceTask.objects.create(organization=self.org, title="Task", start_date=date.today())
+        version = organization_calendar_version(self.org.id)
+        self.tech.save(update_fields=["last_login"])
+        self.assertEqual(organization_calendar_version(self.org.id), version)
+
+        self.tech.last_name = "Petrov"
+        self.tech.save()
+        self.assertNotEqual(organization_calendar_version(self.org.id), version)
+
+        version = organization_calendar_version(self.org.id)
+        self.tech.service_tasks.add(task)
+        self.assertNotEqual(organization_calendar_version(self.org.id), version)
+
+        version = organization_calendar_version(self.org.id)
+        self.tech.service_tasks.clear()
+        self.assertNotEqual(organization_calendar_version(self.org.id), version)
+
+    def test_feed_rejects_oversized_range(self):
+        response = self.client.get(reverse("readings_feed"), {"start": "2026-01-01", "end": "2026-12-31"})
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(CACHE_IS_SHARED=True)
+    def test_calendar_cache_is_invalidated_by_task_changes(self):
+        url = reverse("readings_all")
+        self.client.get(url)
+        task = ServiceTask.objects.create(
+            organization=self.org,
+            title="Replace pump",
+            start_date=date.today(),
+            created_by=self.tech,
+        )
+        task.responsibles.add(self.tech)
+        response = self.client.get(url)
+        self.assertContains(response, "Replace pump")
+
+    @override_settings(CACHE_IS_SHARED=True)
+    def test_regenerated_schedules_bump_the_calendar_version(self):
+        version = organization_calendar_version(self.org.id)
+        self.tech.is_active = False
+        self.tech.save()
+        self.assertNotEqual(organization_calendar_version(self.org.id), version)
@@ -0,0 +1,70 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from pool_service.models import Client, ClientAccess, CrmItem, Organization, OrganizationAccess, Pool, SearchDocument
+from pool_service.services.search import SubstringBackend, search
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Аквасервис", trial_started_at=timezone.now())
+        other_org = Organization.objects.create(name="Другая", trial_started_at=timezone.now())
+        self.user = User.objects.create_user(username="manager", password="pass")
+        OrganizationAccess.objects.create(user=self.user, organization=self.org, role="manager")
+        self.client_obj = Client.objects.create(name="Иванов Пётр", organization=self.org)
+        self.pool = Pool.objects.create(client=self.client_obj, address="ул. Лесная, 12", organization=self.org)
+        self.other_pool = Pool.objects.create(client=self.client_obj, address="ул. Садовая, 3", organization=self.org)
+        foreign_client = Client.objects.create(name="Иванов Сергей", organization=other_org)
+        Pool.objects.create(client=foreign_client, address="ул. Лесная, 7", organization=other_org)
+
+    def test_pool_search_is_case_insensitive_and_scoped(self):
+        self.assertEqual(search(SearchDocument.KIND_POOL, "ЛЕСН 12", [self.org.id]), [self.pool.id])
+        self.assertEqual(len(search(SearchDocument.KIND_POOL, "лесная")), 2)
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("pool_list"), {"q": "лесная"})
+        self.assertEqual([pool.id for pool in response.context["pools"]], [self.pool.id])
+
+    @override_settings(SEARCH_RESULT_LIMIT=1)
+    def test_result_cap_applies_to_visible_pools_only(self):
+        viewer = User.objects.create_user(username="viewer", password="pass")
+        other_client = Client.objects.create(name="Петров", organization=self.org)
+        own_pool = Pool.objects.create(client=other_client, address="ул. Лесная, 30", organization=self.org)
+        ClientAccess.objects.create(user=viewer, client=other_client, role="viewer")
+        # Better matches the viewer cannot see.
+        for index in range(3):
+            Pool.objects.create(client=Client.objects.create(name="Лесная"), address=f"Лесная {index}")
+        self.client.force_login(viewer)
+        response = self.client.get(reverse("pool_list"), {"q": "лесная"})
+        self.assertEqual([pool.id for pool in response.context["pools"]], [own_pool.id])
+
+    def test_documents_follow_related_changes(self):
+        item = CrmItem.objects.create(
+            organization=self.org,
+            direction=CrmItem.DIRECTION_SERVICE,
+            title="Замена насоса",
+            client=self.client_obj,
+            pool=self.pool,
+        )
+        self.assertEqual(search(SearchDocument.KIND_CRM, "насос", [self.org.id]), [item.id])
+
+        self.client_obj.name = "Сидоров"
+        self.client_obj.save()
+        self.assertEqual(search(SearchDocument.KIND_CRM, "сидоров", [self.org.id]), [item.id])
+        self.assertCountEqual(search(SearchDocument.KIND_POOL, "сидоров", [self.org.id]), [self.pool.id, self.other_pool.id])
+
+        item.delete()
+        self.assertEqual(search(SearchDocument.KIND_CRM, "насос"), [])
+
+        SearchDocument.objects.all().delete()
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(len(search(SearchDocument.KIND_POOL, "сидоров")), 2)
+
+    def test_substring_backend_matches_inside_words(self):
+        backend = SubstringBackend()
+        self.assertEqual(backend.search(SearchDocument.KIND_POOL, "есная, 12", [self.org.id]), [self.pool.id])
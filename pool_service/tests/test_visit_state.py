@@ -0,0 +1,64 @@
+from datetime import date, datetime
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from pool_service.models import Client, Organization, OrganizationAccess, Pool, PoolVisitState, WaterReading
+from pool_service.services.visit_state import last_visit_dates_before
+
+
+class PoolVisitStateTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org", trial_started_at=timezone.now())
+        self.tech = User.objects.create_user(username="tech", password="pass")
+        self.access = OrganizationAccess.objects.create(user=self.tech, organization=self.org, role="service")
+        self.client_user = User.objects.create_user(username="client", password="pass")
+        client = Client.objects.create(user=self.client_user, name="Client", organization=self.org)
+        self.pool = Pool.objects.create(client=client, address="Addr", organization=self.org)
+
+    def _state(self):
+        return PoolVisitState.objects.get(pool=self.pool).last_visit_at
+
+    def test_staff_readings_move_last_visit(self):
+        self.assertIsNone(self._state())
+        WaterReading.objects.create(pool=self.pool, date=datetime(2026, 3, 2, 10), added_by=self.tech)
+        WaterReading.objects.create(pool=self.pool, date=datetime(2026, 3, 9, 10), added_by=self.client_user)
+        self.assertEqual(self._state(), datetime(2026, 3, 2, 10))
+
+    def test_delete_and_membership_change_recompute(self):
+        first = WaterReading.objects.create(pool=self.pool, date=datetime(2026, 3, 2, 10), added_by=self.tech)
+        latest = WaterReading.objects.create(pool=self.pool, date=datetime(2026, 3, 9, 10), added_by=self.tech)
+        with self.captureOnCommitCallbacks(execute=True):
+            latest.delete()
+        self.assertEqual(self._state(), first.date)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.access.delete()
+        self.assertIsNone(self._state())
+
+    def test_anchor_lookup_falls_back_inside_range(self):
+        WaterReading.objects.create(pool=self.pool, date=datetime(2026, 2, 20, 10), added_by=self.tech)
+        WaterReading.objects.create(pool=self.pool, date=datetime(2026, 3, 9, 10), added_by=self.tech)
+        self.assertEqual(last_visit_dates_before([self.pool], date(2026, 4, 1)), {self.pool.id: date(2026, 3, 9)})
+        self.assertEqual(last_visit_dates_before([self.pool], date(2026, 3, 1)), {self.pool.id: date(2026, 2, 20)})
+        self.assertEqual(last_visit_dates_before([self.pool], date(2026, 2, 1)), {})
+
+    def test_only_status_and_membership_changes_refresh_the_organization(self):
+        other_org = Organization.objects.create(name="Other", trial_started_at=timezone.now())
+        tech = User.objects.get(id=self.tech.id)
+        access = OrganizationAccess.objects.get(id=self.access.id)
+        with mock.patch("pool_service.signals._refresh_organizations") as refresh:
+            tech.last_login = timezone.now()
+            tech.save()
+            access.role = "manager"
+            access.save()
+            refresh.assert_not_called()
+
+            tech.is_active = False
+            tech.save()
+            refresh.assert_called_once_with([self.org.id])
+            access.organization = other_org
+            access.save()
+            refresh.assert_called_with({self.org.id, other_org.id})
+
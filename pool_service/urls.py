@@ -3,12 +3,15 @@ from .views import (
     home,
     pool_list,
     pool_detail,
+    pool_trends,
+    organization_trends,
     pool_issue_create,
     pool_issue_update,
     water_reading_create,
     water_object_visit_create,
     water_reading_edit,
     readings_all,
+    readings_feed,
     task_create,
     task_edit,
     task_delete,
@@ -39,11 +42,14 @@ from .views import (
     signup_personal,
     signup_company,
     notifications_list,
+    notifications_unread,
     notification_mark_read,
     notifications_mark_all,
     notifications_resolve_all,
     notification_resolve,
     organization_norms,
+    readings_import,
+    readings_export,
     invite_create,
     invite_resend,
     invite_accept,
@@ -71,6 +77,7 @@ urlpatterns = [
     path('index/', views.index, name='index'),
     path('pools/', pool_list, name='pool_list'),
     path('pools/<uuid:pool_uuid>/', pool_detail, name='pool_detail'),
+    path("pools/<uuid:pool_uuid>/trends/", pool_trends, name="pool_trends"),
     path("pools/<uuid:pool_uuid>/issues/new/", pool_issue_create, name="pool_issue_create"),
     path("pools/<uuid:pool_uuid>/issues/<int:item_id>/status/", pool_issue_update, name="pool_issue_update"),
     path('pools/create/', pool_create, name='pool_create'),
@@ -80,6 +87,7 @@ urlpatterns = [
     path("objects/<uuid:pool_uuid>/new-visit/", water_object_visit_create, name="water_object_visit_create"),
     path("readings/<uuid:reading_uuid>/edit/", water_reading_edit, name="water_reading_edit"),
     path("readings/all", readings_all, name="readings_all"),
+    path("readings/feed/", readings_feed, name="readings_feed"),
     path("tasks/new/", task_create, name="task_create"),
     path("tasks/<int:task_id>/", task_edit, name="task_edit"),
     path("tasks/<int:task_id>/delete/", task_delete, name="task_delete"),
@@ -88,11 +96,15 @@ urlpatterns = [
     path("profile/", profile_view, name="profile"),
     path("users/", users_view, name="users"),
     path("notifications/", notifications_list, name="notifications"),
+    path("notifications/unread/", notifications_unread, name="notifications_unread"),
     path("notifications/<int:notification_id>/read/", notification_mark_read, name="notifications_mark_read"),
     path("notifications/read-all/", notifications_mark_all, name="notifications_mark_all"),
     path("notifications/resolve-all/", notifications_resolve_all, name="notifications_resolve_all"),
     path("notifications/<int:notification_id>/resolve/", notification_resolve, name="notification_resolve"),
     path("organization/norms/", organization_norms, name="organization_norms"),
+    path("organization/readings-import/", readings_import, name="readings_import"),
+    path("readings/export/", readings_export, name="readings_export"),
+    path("organization/trends/", organization_trends, name="organization_trends"),
     path("users/<int:access_id>/block/", staff_toggle_block, name="staff_toggle_block"),
     path("users/<int:access_id>/delete/", staff_delete, name="staff_delete"),
     path("users/<int:access_id>/role/", staff_change_role, name="staff_change_role"),
@@ -28,15 +28,13 @@ from django.views.decorators.csrf import csrf_protect
 
 from django.views.decorators.cache import never_cache
 
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
 
 from django.urls import reverse, reverse_lazy
 
-from django.db import connection
+from django.db.models import Count, Q, Case, When, Value, IntegerField
 
-from django.db.models import Count, Q, Max, Case, When, Value, IntegerField
-
-from django.http import HttpResponse, HttpResponseForbidden, HttpResponseNotFound, JsonResponse
+from django.http import FileResponse, HttpResponse, HttpResponseForbidden, HttpResponseNotFound, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 
 from django.utils import timezone
 
@@ -44,7 +42,9 @@ from django.utils.crypto import get_random_string
 
 from django.utils.encoding import force_bytes, force_str
 
-from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
+from django.utils.cache import patch_cache_control
+
+from django.utils.http import parse_etags, quote_etag, urlsafe_base64_encode, urlsafe_base64_decode
 
 from django.template.loader import render_to_string
 
@@ -67,9 +67,13 @@ from urllib.parse import urlencode
 
 from urllib.request import urlopen, Request
 
+import hashlib
+
 import json
 
 import calendar
+from dataclasses import asdict
+
 from datetime import date, timedelta, time
 
 from calendar import monthrange
@@ -104,6 +108,8 @@ from .forms import (
 
     OrganizationWaterNormsForm,
 
+    ReadingImportForm,
+
     CrmItemForm,
 
     CrmServiceIssueForm,
@@ -118,6 +124,8 @@ from .sitemaps import HomeSitemap
 
 from .seo import is_indexable_host
 
+from .db_router import is_pinned_to_primary, read_from_replica, replica_reads
+
 from .services.phone_verification import (
 
     smsru_callcheck_add,
@@ -129,6 +137,24 @@ from .services.phone_verification import (
 )
 
 from .services.notifications import notify_reading_out_of_range, notify_superusers, notify_task_assignment
+from .services.notification_counters import NOTIFICATION_TABS, mark_notifications, unread_counts
+from .services.schedule import (
+    add_month,
+    is_scheduled,
+    items_by_date,
+    month_range,
+    task_items,
+    visit_items,
+    week_start,
+)
+from .services.calendar_cache import organization_schedule
+from .services.schedule_store import occurrences_for_pools, schedule_fingerprint
+from .services.search import search as search_objects
+from .services.pagination import cursor_page
+from .services.reading_archive import reading_history_page
+from .services.rollups import ROLLUP_METRICS, organization_summary, pool_trend
+from .services.reading_import import ImportFormatError, import_readings
+from .services.reading_export import ExportFormatError, csv_chunks, export_rows, write_xlsx
 
 
 
@@ -288,6 +314,8 @@ from .models import (
 
     PoolAccess,
 
+    ReadingRollup,
+
     WaterReading,
 
     Client,
@@ -320,19 +348,21 @@ from .models import (
 
     ServiceTaskChange,
 
+    SearchDocument,
+
 )
 
 from .services.permissions import (
 
     is_personal_free,
 
-    is_personal_user,
+    personal_pool,
 
-    is_org_access_blocked,
+    pool_roles_for_user,
 
-    personal_pool,
+    request_access,
 
-    organization_for_user,
+    ORG_STAFF_ROLES,
 
 )
 
@@ -342,12 +372,15 @@ from django import forms
 
 PER_PAGE_CHOICES = {20, 50, 100}
 
+NOTIFICATIONS_ORDERING = ("-created_at", "-id")
+
+# ``kind`` of the mark-all / resolve-all forms -> notifications tab.
+NOTIFICATION_KIND_TABS = {"task": "tasks", "service": "limits"}
+
 INVITE_EXPIRY_HOURS = 24
 
 ADMIN_ROLES = ["owner", "admin"]
 
-ORG_STAFF_ROLES = ["owner", "admin", "service", "manager"]
-
 CRM_ALLOWED_ROLES = {"owner", "admin", "service"}
 
 
@@ -429,18 +462,18 @@ def _compress_issue_photo(uploaded_file, max_size=ISSUE_PHOTO_MAX_SIZE, quality=
         return uploaded_file
 
 
-def _can_access_crm(user):
-    if not user or not user.is_authenticated:
+def _can_access_crm(request):
+    access = request_access(request)
+
+    if not access.is_authenticated:
 
         return False
 
-    if user.is_superuser:
+    if request.user.is_superuser:
 
         return True
 
-    roles = OrganizationAccess.objects.filter(user=user).values_list("role", flat=True)
-
-    return any(role in CRM_ALLOWED_ROLES for role in roles)
+    return any(role in CRM_ALLOWED_ROLES for role in access.org_roles)
 
 
 
@@ -500,19 +533,15 @@ def _extend_org_paid_until(org, months):
 
 
 
-def _personal_pool_redirect(user):
-
-    if not is_personal_user(user):
+def _personal_pool_redirect(request):
 
-        return None
-
-    client = Client.objects.filter(user=user, organization__isnull=True).first()
+    access = request_access(request)
 
-    if not client:
+    if not access.is_personal_user:
 
         return None
 
-    pool = Pool.objects.filter(client=client).first()
+    pool = access.personal_pool
 
     if not pool:
 
@@ -524,77 +553,9 @@ def _personal_pool_redirect(user):
 
 
 
-def _client_access_for_user(user):
-
-    if not user or not getattr(user, "is_authenticated", False):
-
-        return None
-
-    return ClientAccess.objects.filter(user=user).select_related("client").first()
-
-
-
-
-
-def _pool_role_for_user(user, pool):
-
-    if user.is_superuser:
-
-        return "admin"
-
-
-
-    pool_access = PoolAccess.objects.filter(user=user, pool=pool).first()
-
-    client_access = ClientAccess.objects.filter(user=user, client=pool.client).first()
-
-    org_roles = list(
-
-        OrganizationAccess.objects.filter(user=user, organization=pool.organization).values_list("role", flat=True)
-
-    )
-
-
-
-    pool_role = pool_access.role if pool_access else None
-
-    client_role = None
-
-    if client_access:
-
-        client_role = client_access.role or "viewer"
-
-        if client_role == "staff":
-
-            client_role = "editor"
-
-
-
-    org_role = None
-
-    if org_roles:
-
-        if any(role in ADMIN_ROLES for role in org_roles):
-
-            org_role = "admin"
-
-        elif "service" in org_roles:
-
-            org_role = "service"
-
-        elif "manager" in org_roles:
-
-            org_role = "manager"
-
-
-
-    role = org_role or client_role or pool_role
+def _pool_role_for_user(user, pool, access=None):
 
-    if pool.client and pool.client.user_id == user.id:
-
-        role = "admin"
-
-    return role
+    return pool_roles_for_user(user, [pool], access).get(pool.id)
 
 
 
@@ -816,7 +777,7 @@ def _verify_phone_sms(profile, code):
 
 def _redirect_if_access_blocked(request):
 
-    if not is_org_access_blocked(request.user):
+    if not request_access(request).is_access_blocked():
 
         return None
 
@@ -854,7 +815,9 @@ def _deny_client_staff_write(request):
 
         return None
 
-    if _client_access_for_user(request.user) and not OrganizationAccess.objects.filter(user=request.user).exists():
+    access = request_access(request)
+
+    if access.client_access and not access.is_org_staff:
 
         return HttpResponseForbidden()
 
@@ -868,7 +831,7 @@ def index(request):
 
     if request.user.is_authenticated:
 
-        redirect_url = _personal_pool_redirect(request.user) or reverse("pool_list")
+        redirect_url = _personal_pool_redirect(request) or reverse("pool_list")
 
         return redirect(redirect_url)
 
@@ -912,13 +875,15 @@ def _reading_edit_allowed(reading, user):
 
 @login_required
 
+@read_from_replica
+
 def pool_list(request):
 
     """Список объектов обслуживания."""
 
-    if is_personal_user(request.user):
+    if request_access(request).is_personal_user:
 
-        redirect_url = _personal_pool_redirect(request.user)
+        redirect_url = _personal_pool_redirect(request)
 
         if redirect_url:
 
@@ -933,11 +898,7 @@ def pool_list(request):
 
     else:
 
-        org_access = (
-            OrganizationAccess.objects.filter(user=request.user)
-            .select_related("organization")
-            .first()
-        )
+        org_access = request_access(request).org_access
 
         if org_access:
 
@@ -949,7 +910,7 @@ def pool_list(request):
 
         else:
 
-            client_access = _client_access_for_user(request.user)
+            client_access = request_access(request).client_access
 
             if client_access:
 
@@ -963,19 +924,13 @@ def pool_list(request):
 
     search_query = request.GET.get("q", "").strip()
 
-    use_python_search = bool(search_query) and connection.vendor == "sqlite"
-
-    if search_query and not use_python_search:
-
-        pools = pools.filter(
-
-            Q(client__name__icontains=search_query)
+    if search_query:
 
-            | Q(address__icontains=search_query)
+        # Superusers see every pool; everyone else is searched within their visible pools before the result cap.
 
-            | Q(organization__name__icontains=search_query)
+        visible_ids = None if request.user.is_superuser else pools.values("id")
 
-        )
+        pools = pools.filter(id__in=search_objects(SearchDocument.KIND_POOL, search_query, object_ids=visible_ids))
 
 
 
@@ -1003,23 +958,17 @@ def pool_list(request):
 
 
 
-    pools = pools.annotate(
-
-        num_readings=Count("waterreading"),
-
-        last_reading=Max("waterreading__date"),
-
-    ).select_related("client")
+    pools = pools.select_related("client")
 
 
 
     if sort == "recent_desc":
 
-        pools = pools.order_by("service_suspended", "-last_reading", "client__name", "address")
+        pools = pools.order_by("service_suspended", "-last_reading_at", "client__name", "address")
 
     elif sort == "recent_asc":
 
-        pools = pools.order_by("service_suspended", "last_reading", "client__name", "address")
+        pools = pools.order_by("service_suspended", "last_reading_at", "client__name", "address")
 
     elif sort == "client_desc":
 
@@ -1039,41 +988,13 @@ def pool_list(request):
 
 
 
-    if use_python_search:
-
-        query_cf = search_query.casefold()
-
-        filtered = []
-
-        for pool in pools:
-
-            parts = [
-
-                getattr(pool.client, "name", ""),
-
-                getattr(pool, "address", ""),
-
-                getattr(getattr(pool, "organization", None), "name", ""),
-
-            ]
-
-            haystack = " ".join(part for part in parts if part).casefold()
-
-            if query_cf in haystack:
-
-                filtered.append(pool)
-
-        pools = filtered
-
-
-
-    personal_user = is_personal_user(request.user)
+    personal_user = request_access(request).is_personal_user
 
     personal_pool_count = 0
 
     if personal_user:
 
-        personal_client = Client.objects.filter(user=request.user, organization__isnull=True).first()
+        personal_client = request_access(request).personal_client
 
         if personal_client:
 
@@ -3087,11 +3008,13 @@ def pool_staff_change_role(request, access_id):
 
 @login_required
 
+@read_from_replica
+
 def users_view(request):
 
     """Список пользователей для суперюзеров/админов, сервисники видят только персонал объектов."""
 
-    roles = list(OrganizationAccess.objects.filter(user=request.user).values_list("role", flat=True))
+    roles = request_access(request).org_roles
 
     is_org_owner = "owner" in roles
 
@@ -3115,7 +3038,7 @@ def users_view(request):
 
         org_ids = list(
 
-            OrganizationAccess.objects.filter(user=request.user).values_list("organization_id", flat=True)
+            {access.organization_id for access in request_access(request).organization_accesses}
 
         )
 
@@ -3279,15 +3202,13 @@ def users_view(request):
 
 @login_required
 
+@read_from_replica
+
 def clients_list(request):
 
     allowed_roles = ORG_STAFF_ROLES
 
-    is_allowed = request.user.is_superuser or OrganizationAccess.objects.filter(
-
-        user=request.user, role__in=allowed_roles
-
-    ).exists()
+    is_allowed = request.user.is_superuser or request_access(request).has_org_role(allowed_roles)
 
     if not is_allowed:
 
@@ -3303,13 +3224,7 @@ def clients_list(request):
 
     else:
 
-        org_ids = OrganizationAccess.objects.filter(user=request.user).values_list(
-
-            "organization_id",
-
-            flat=True,
-
-        )
+        org_ids = [access.organization_id for access in request_access(request).organization_accesses]
 
         clients_qs = Client.objects.filter(organization_id__in=org_ids).distinct()
 
@@ -3429,7 +3344,7 @@ def clients_list(request):
 
 def crm_index(request):
 
-    if not _can_access_crm(request.user):
+    if not _can_access_crm(request):
 
         return HttpResponseForbidden()
 
@@ -3525,7 +3440,7 @@ def crm_index(request):
 
 def crm_tasks(request):
 
-    if not _can_access_crm(request.user):
+    if not _can_access_crm(request):
 
         return HttpResponseForbidden()
 
@@ -3561,7 +3476,7 @@ def crm_tasks(request):
 
 def _crm_get_org_for_request(request):
 
-    org = organization_for_user(request.user)
+    org = request_access(request).organization
 
     if org:
 
@@ -3585,9 +3500,11 @@ def _crm_get_org_for_request(request):
 
 @login_required
 
+@read_from_replica
+
 def crm_list(request, direction):
 
-    if not _can_access_crm(request.user):
+    if not _can_access_crm(request):
 
         return HttpResponseForbidden()
 
@@ -3615,43 +3532,15 @@ def crm_list(request, direction):
 
     search_query = (request.GET.get("q") or "").strip()
 
-    if search_query:
-
-        search_filter = (
-
-            Q(title__icontains=search_query)
-
-            | Q(client__name__icontains=search_query)
-
-            | Q(client__company_name__icontains=search_query)
-
-            | Q(pool__address__icontains=search_query)
-
-            | Q(description__icontains=search_query)
+    search_ranks = None
 
-            | Q(service_works__icontains=search_query)
-
-            | Q(equipment_replacement__icontains=search_query)
-
-            | Q(photo_url__icontains=search_query)
-
-            | Q(stage__icontains=search_query)
-
-            | Q(urgency__icontains=search_query)
-
-            | Q(responsible__first_name__icontains=search_query)
-
-            | Q(responsible__last_name__icontains=search_query)
-
-            | Q(responsible__username__icontains=search_query)
-
-        )
+    if search_query:
 
-        if request.user.is_superuser:
+        search_ids = search_objects(SearchDocument.KIND_CRM, search_query, [org.id] if org else None)
 
-            search_filter |= Q(organization__name__icontains=search_query)
+        search_ranks = {item_id: rank for rank, item_id in enumerate(search_ids)}
 
-        items = items.filter(search_filter)
+        items = items.filter(id__in=search_ids)
 
 
 
@@ -3739,6 +3628,12 @@ def crm_list(request, direction):
 
     items = items.order_by(*order_fields)
 
+    if search_ranks is not None and not sort_field_list:
+
+        # Without an explicit sort, search results come best match first (done service items still last).
+
+        items = sorted(items, key=lambda item: (getattr(item, "is_done", 0), search_ranks.get(item.id, 0)))
+
     for item in items:
 
         item.stage_label = CRM_STAGE_LABELS.get(item.stage, item.stage)
@@ -3838,7 +3733,7 @@ def crm_create(request, direction):
 
         return blocked
 
-    if not _can_access_crm(request.user):
+    if not _can_access_crm(request):
 
         return HttpResponseForbidden()
 
@@ -3932,7 +3827,7 @@ def crm_edit(request, direction, item_id):
 
         return blocked
 
-    if not _can_access_crm(request.user):
+    if not _can_access_crm(request):
 
         return HttpResponseForbidden()
 
@@ -3946,7 +3841,7 @@ def crm_edit(request, direction, item_id):
 
     if not request.user.is_superuser:
 
-        org = organization_for_user(request.user)
+        org = request_access(request).organization
 
         if not org or item.organization_id != org.id:
 
@@ -4056,7 +3951,7 @@ def pool_create(request):
 
 
 
-    if is_personal_user(request.user):
+    if request_access(request).is_personal_user:
 
         client = Client.objects.filter(user=request.user, organization__isnull=True).first()
 
@@ -4189,7 +4084,7 @@ def pool_edit(request, pool_uuid):
     pool = get_object_or_404(Pool, uuid=pool_uuid)
     is_water_object = pool.object_type == Pool.OBJECT_TYPE_WATER
 
-    role = _pool_role_for_user(request.user, pool)
+    role = _pool_role_for_user(request.user, pool, request_access(request))
 
     if role not in {"admin", "service"}:
 
@@ -4279,7 +4174,7 @@ def client_create_inline(request):
 
 
 
-    roles = list(OrganizationAccess.objects.filter(user=request.user).values_list("role", flat=True))
+    roles = request_access(request).org_roles
 
     if not request.user.is_superuser and not any(r in ORG_STAFF_ROLES for r in roles):
 
@@ -4329,7 +4224,7 @@ def client_create(request):
 
 
 
-    roles = list(OrganizationAccess.objects.filter(user=request.user).values_list("role", flat=True))
+    roles = request_access(request).org_roles
 
     if not request.user.is_superuser and not any(r in ORG_STAFF_ROLES for r in roles):
 
@@ -4614,7 +4509,7 @@ def home(request):
 
             )
 
-            redirect_url = _personal_pool_redirect(user) or reverse("pool_list")
+            redirect_url = _personal_pool_redirect(request) or reverse("pool_list")
 
             return redirect(redirect_url)
 
@@ -5178,7 +5073,7 @@ def confirm_email(request, uidb64, token):
 
         login(request, user)
 
-        personal_url = _personal_pool_redirect(user)
+        personal_url = _personal_pool_redirect(request)
 
         return redirect(personal_url or "pool_list")
 
@@ -5444,11 +5339,11 @@ def pool_detail(request, pool_uuid):
 
     """Детальная страница объекта с показателями и доступами."""
 
-    pool = get_object_or_404(Pool, uuid=pool_uuid)
+    pool = get_object_or_404(Pool.objects.select_related("client"), uuid=pool_uuid)
 
 
 
-    role = _pool_role_for_user(request.user, pool)
+    role = _pool_role_for_user(request.user, pool, request_access(request))
 
     if not role:
 
@@ -5462,23 +5357,17 @@ def pool_detail(request, pool_uuid):
 
 
 
-    readings_list = WaterReading.objects.filter(pool=pool).select_related("added_by").order_by("-date")
-
-
-
     per_page = _parse_per_page(request.GET.get("per_page"), 20)
 
 
 
-    paginator = Paginator(readings_list, per_page)
-
-    page_number = request.GET.get("page")
-
-    readings = paginator.get_page(page_number)
+    readings = reading_history_page(pool, cursor=request.GET.get("cursor"), per_page=per_page)
 
     query_params = request.GET.copy()
 
-    query_params.pop("page", None)
+    query_params.pop("cursor", None)
+
+    query_params.pop("partial", None)
 
 
 
@@ -5488,10 +5377,38 @@ def pool_detail(request, pool_uuid):
 
         for reading in readings:
 
-            if _reading_edit_allowed(reading, request.user):
+            if isinstance(reading, WaterReading) and _reading_edit_allowed(reading, request.user):
 
                 editable_reading_ids.append(reading.id)
 
+    if request.GET.get("partial") == "1":
+
+        response = render(
+
+            request,
+
+            "pool_service/partials/pool_reading_rows.html",
+
+            {
+
+                "pool": pool,
+
+                "is_water_object": pool.object_type == Pool.OBJECT_TYPE_WATER,
+
+                "readings": readings,
+
+                "editable_reading_ids": editable_reading_ids,
+
+            },
+
+        )
+
+        if readings.next_cursor:
+
+            response["X-Next-Cursor"] = readings.next_cursor
+
+        return response
+
 
 
     show_service_issues = False
@@ -5506,14 +5423,7 @@ def pool_detail(request, pool_uuid):
 
     if pool.organization_id:
 
-        org_staff_access = OrganizationAccess.objects.filter(
-
-            user=request.user,
-
-            organization=pool.organization,
-
-
-        ).exists()
+        org_staff_access = request_access(request).has_org_role(ORG_STAFF_ROLES, pool.organization_id)
 
         show_service_issues = org_staff_access or request.user.is_superuser
 
@@ -5924,7 +5834,7 @@ def task_create(request):
 
     is_modal = _is_modal_request(request)
 
-    org = organization_for_user(request.user)
+    org = request_access(request).organization
     if not org:
         return HttpResponseForbidden()
     is_staff = OrganizationAccess.objects.filter(
@@ -6302,43 +6212,140 @@ def task_move(request):
     )
 
 
-@login_required
-def readings_all(request):
-
-    """Service visit calendar."""
-
-    if request.user.is_superuser:
+def _calendar_pools(request):
+    user = request.user
+    access = request_access(request)
+    if user.is_superuser:
         pools = Pool.objects.all()
-    elif OrganizationAccess.objects.filter(user=request.user).exists():
-        org_ids = OrganizationAccess.objects.filter(user=request.user).values_list("organization_id", flat=True)
+    elif access.is_org_staff:
+        org_ids = {org_access.organization_id for org_access in access.organization_accesses}
         pools = Pool.objects.filter(organization_id__in=org_ids)
-    elif ClientAccess.objects.filter(user=request.user).exists():
-        client_access = _client_access_for_user(request.user)
-        pools = Pool.objects.filter(client=client_access.client) if client_access else Pool.objects.none()
+    elif access.client_access:
+        pools = Pool.objects.filter(client=access.client_access.client)
     else:
-        pools = Pool.objects.filter(accesses__user=request.user)
+        pools = Pool.objects.filter(accesses__user=user)
+    return pools.select_related("client", "organization").order_by("client__name", "address")
 
-    pools = pools.select_related("client", "organization").order_by("client__name", "address")
-    pool_list = list(pools)
 
-    today = timezone.localdate() if settings.USE_TZ else date.today()
+def _calendar_responsible_options(task_org):
+    if not task_org:
+        return []
+    task_staff = (
+        User.objects.filter(
+            organizationaccess__organization=task_org,
+            organizationaccess__role__in=ORG_STAFF_ROLES,
+            is_active=True,
+        )
+        .distinct()
+        .order_by("last_name", "first_name", "username")
+    )
+    return [{"id": user.id, "name": _task_user_label(user)} for user in task_staff]
+
+
+def _calendar_selected_responsibles(request, responsible_options):
+    selected_responsible_ids = []
+    for raw_id in request.GET.getlist("responsible"):
+        try:
+            selected_responsible_ids.append(int(raw_id))
+        except (TypeError, ValueError):
+            continue
+    active_responsible_ids = {option["id"] for option in responsible_options}
+    if active_responsible_ids:
+        selected_responsible_ids = [rid for rid in selected_responsible_ids if rid in active_responsible_ids]
+    return selected_responsible_ids
+
+
+def _parse_calendar_month(value):
+    if not value:
+        return None
+    try:
+        year_str, month_str = value.split("-")
+        return date(int(year_str), int(month_str), 1)
+    except (TypeError, ValueError):
+        return None
+
+
+def _calendar_schedule(user, pool_list, task_org, range_start, range_end, today, responsible_filter_set, return_url):
+    """Calendar items for the pools and the organization tasks visible to ``user``.
+
+    Only the responsible filter and task visibility are applied per viewer; the
+    rest comes from the shared per-organization cache.
+    """
+
+    unscheduled_pools = []
+    paused_pools = []
+    scheduled_pools = []
+    for pool in pool_list:
+        if getattr(pool, "service_suspended", False):
+            paused_pools.append(pool)
+        elif not is_scheduled(pool):
+            unscheduled_pools.append(pool)
+        else:
+            scheduled_pools.append(pool)
+
+    occurrences_by_pool = {}
+    responsible_by_pool = {}
+    org_ids = {pool.organization_id for pool in scheduled_pools if pool.organization_id}
+    org_schedules = {
+        org_id: organization_schedule(org_id, range_start, range_end, today)
+        for org_id in org_ids | ({task_org.id} if task_org else set())
+    }
+    for org_id in org_ids:
+        occurrences_by_pool.update(org_schedules[org_id]["occurrences"])
+        responsible_by_pool.update(org_schedules[org_id]["responsibles"])
+    personal_pools = [pool for pool in scheduled_pools if not pool.organization_id]
+    if personal_pools:
+        occurrences_by_pool.update(occurrences_for_pools(personal_pools, range_start, range_end, today=today))
+
+    calendar_items, status_counts = visit_items(
+        scheduled_pools,
+        occurrences_by_pool,
+        range_start,
+        range_end,
+        today,
+        responsible_by_pool=responsible_by_pool,
+        responsible_filter=responsible_filter_set,
+    )
+
+    task_search_index = []
+    if task_org:
+        visible_tasks = []
+        for task in org_schedules[task_org.id]["tasks"]:
+            task_responsible_ids = {responsible.id for responsible in task.responsibles.all()}
+            if not user.is_superuser and user.id not in task_responsible_ids:
+                continue
+            if responsible_filter_set and not task_responsible_ids & responsible_filter_set:
+                continue
+            visible_tasks.append(task)
+        calendar_tasks, task_search_index, task_counts = task_items(
+            visible_tasks,
+            range_start,
+            range_end,
+            today,
+            viewer=user,
+            return_url=return_url,
+        )
+        calendar_items.extend(calendar_tasks)
+        status_counts += task_counts
+
+    return {
+        "items": calendar_items,
+        "counts": status_counts,
+        "task_search_index": task_search_index,
+        "unscheduled_pools": unscheduled_pools,
+        "paused_pools": paused_pools,
+    }
+
+
+@login_required
+@read_from_replica
+def readings_all(request):
 
-    def _add_month(d, months):
-        month_index = d.month - 1 + months
-        year = d.year + (month_index // 12)
-        month = (month_index % 12) + 1
-        day = min(d.day, calendar.monthrange(year, month)[1])
-        return date(year, month, day)
+    """Service visit calendar."""
 
-    def _week_start(d):
-        return d - timedelta(days=d.weekday())
+    pool_list = list(_calendar_pools(request))
 
-    def _shift_from_weekend(d):
-        if d.weekday() == 5:
-            return d - timedelta(days=1)
-        if d.weekday() == 6:
-            return d - timedelta(days=2)
-        return d
+    today = timezone.localdate() if settings.USE_TZ else date.today()
 
     month_labels = {
         1: "\u042f\u043d\u0432\u0430\u0440\u044c",
@@ -6355,43 +6362,28 @@ def readings_all(request):
         12: "\u0414\u0435\u043a\u0430\u0431\u0440\u044c",
     }
 
-    month_param = request.GET.get("month")
-    target_month = None
-    if month_param:
-        try:
-            year_str, month_str = month_param.split("-")
-            target_month = date(int(year_str), int(month_str), 1)
-        except (TypeError, ValueError):
-            target_month = None
-    if not target_month:
-        target_month = today.replace(day=1)
+    target_month = _parse_calendar_month(request.GET.get("month")) or today.replace(day=1)
 
-    selected_responsible_ids = []
-    for raw_id in request.GET.getlist("responsible"):
-        try:
-            selected_responsible_ids.append(int(raw_id))
-        except (TypeError, ValueError):
-            continue
+    task_org = request_access(request).organization
+    responsible_options = _calendar_responsible_options(task_org)
+    selected_responsible_ids = _calendar_selected_responsibles(request, responsible_options)
+    responsible_filter_set = set(selected_responsible_ids)
 
     month_label = f"{month_labels.get(target_month.month, target_month.month)} {target_month.year}"
-    prev_month_date = _add_month(target_month, -1)
-    next_month_date = _add_month(target_month, 1)
+    prev_month_date = add_month(target_month, -1)
+    next_month_date = add_month(target_month, 1)
     target_month_value = f"{target_month.year}-{target_month.month:02d}"
     prev_month_value = f"{prev_month_date.year}-{prev_month_date.month:02d}"
     next_month_value = f"{next_month_date.year}-{next_month_date.month:02d}"
     today_month_value = f"{today.year}-{today.month:02d}"
 
     responsible_params = [("responsible", str(rid)) for rid in selected_responsible_ids]
-    responsible_filter_set = set(selected_responsible_ids)
     prev_month_query = urlencode([("month", prev_month_value), *responsible_params])
     next_month_query = urlencode([("month", next_month_value), *responsible_params])
     today_month_query = urlencode([("month", today_month_value), *responsible_params])
     current_query = urlencode([("month", target_month_value), *responsible_params])
 
-    first_day = target_month
-    last_day = date(target_month.year, target_month.month, calendar.monthrange(target_month.year, target_month.month)[1])
-    range_start = _week_start(first_day)
-    range_end = last_day + timedelta(days=(6 - last_day.weekday()))
+    range_start, range_end = month_range(target_month)
 
     calendar_days = []
     cursor = range_start
@@ -6402,46 +6394,15 @@ def readings_all(request):
                 "day": cursor.day,
                 "is_current_month": cursor.month == target_month.month,
                 "is_today": cursor == today,
-                "week_start": _week_start(cursor),
+                "week_start": week_start(cursor),
             }
         )
         cursor += timedelta(days=1)
 
-    schedule_by_date = {}
-    unscheduled_pools = []
-    paused_pools = []
-
-    pool_ids = [pool.id for pool in pool_list]
-    org_ids = {pool.organization_id for pool in pool_list if pool.organization_id}
-
-    task_org = organization_for_user(request.user)
-    responsible_options = []
     can_create_tasks = False
     selected_responsible_label = None
     if task_org:
-        task_staff = (
-            User.objects.filter(
-                organizationaccess__organization=task_org,
-                organizationaccess__role__in=ORG_STAFF_ROLES,
-                is_active=True,
-            )
-            .distinct()
-            .order_by("last_name", "first_name", "username")
-        )
-        responsible_options = [
-            {"id": user.id, "name": _task_user_label(user)} for user in task_staff
-        ]
-        active_responsible_ids = {user["id"] for user in responsible_options}
-        if active_responsible_ids:
-            selected_responsible_ids = [
-                rid for rid in selected_responsible_ids if rid in active_responsible_ids
-            ]
-            responsible_filter_set = set(selected_responsible_ids)
-        can_create_tasks = OrganizationAccess.objects.filter(
-            user=request.user,
-            organization=task_org,
-            role__in=ORG_STAFF_ROLES,
-        ).exists()
+        can_create_tasks = request_access(request).has_org_role(ORG_STAFF_ROLES, task_org)
         if selected_responsible_ids:
             if len(selected_responsible_ids) == 1:
                 selected_id = selected_responsible_ids[0]
@@ -6452,622 +6413,390 @@ def readings_all(request):
             else:
                 selected_responsible_label = "\u041d\u0435\u0441\u043a\u043e\u043b\u044c\u043a\u043e"
 
-    org_user_ids = set(
-        OrganizationAccess.objects.filter(organization_id__in=org_ids, user__is_active=True)
-        .values_list("user_id", flat=True)
-    )
-
-    base_readings = WaterReading.objects.filter(pool_id__in=pool_ids)
-    if org_user_ids:
-        base_readings = base_readings.filter(added_by_id__in=org_user_ids)
-    else:
-        base_readings = base_readings.none()
-
-    last_reading_before_range = {}
-    for reading in (
-        base_readings.filter(date__date__lt=range_start)
-        .select_related("added_by")
-        .order_by("pool_id", "-date", "-id")
-    ):
-        if reading.pool_id not in last_reading_before_range:
-            last_reading_before_range[reading.pool_id] = reading
-
-    readings_in_range = list(
-        base_readings.filter(date__date__gte=range_start, date__date__lte=range_end)
-        .select_related("added_by")
-        .order_by("date", "id")
+    calendar_return_url = f"{reverse('readings_all')}?{current_query}" if current_query else reverse("readings_all")
+    schedule = _calendar_schedule(
+        request.user,
+        pool_list,
+        task_org,
+        range_start,
+        range_end,
+        today,
+        responsible_filter_set,
+        calendar_return_url,
     )
+    status_counts = schedule["counts"]
 
-    readings_by_pool_week = {}
-    readings_by_pool_month = {}
-    for reading in readings_in_range:
-        if not reading.date:
-            continue
-        reading_date = reading.date.date()
-        reading._calendar_date = reading_date
-        week_key = _week_start(reading_date)
-        month_key = f"{reading_date.year}-{reading_date.month:02d}"
-        readings_by_pool_week.setdefault(reading.pool_id, {}).setdefault(week_key, []).append(reading)
-        readings_by_pool_month.setdefault(reading.pool_id, {}).setdefault(month_key, []).append(reading)
-
-    responsible_by_pool = {}
-    org_staff_ids = set(
-        OrganizationAccess.objects.filter(
-            organization_id__in=org_ids,
-            role__in=ORG_STAFF_ROLES,
-            user__is_active=True,
-        )
-        .values_list("user_id", flat=True)
-    )
-    if org_staff_ids:
-        for access in (
-            PoolAccess.objects.filter(pool_id__in=pool_ids, user_id__in=org_staff_ids, user__is_active=True)
-            .select_related("user")
-            .order_by("pool_id", "user__last_name", "user__first_name")
-        ):
-            if access.pool_id not in responsible_by_pool:
-                responsible_by_pool[access.pool_id] = access.user
-
-    plan_by_pool_week = {}
-    for plan in ServiceVisitPlan.objects.filter(
-        pool_id__in=pool_ids,
-        week_start__gte=range_start,
-        week_start__lte=range_end,
-    ):
-        plan_by_pool_week[(plan.pool_id, plan.week_start)] = plan
-
-    def _frequency_days(pool):
-        if pool.service_interval_days:
-            return int(pool.service_interval_days)
-        mapping = {
-            Pool.SERVICE_FREQ_WEEKLY: 7,
-            Pool.SERVICE_FREQ_TWICE_MONTHLY: 14,
-        }
-        return mapping.get(pool.service_frequency)
-
-    def _frequency_months(pool):
-        mapping = {
-            Pool.SERVICE_FREQ_MONTHLY: 1,
-            Pool.SERVICE_FREQ_BIMONTHLY: 2,
-            Pool.SERVICE_FREQ_QUARTERLY: 3,
-            Pool.SERVICE_FREQ_TWICE_YEARLY: 6,
-            Pool.SERVICE_FREQ_YEARLY: 12,
-        }
-        return mapping.get(pool.service_frequency)
+    schedule_by_date = items_by_date(schedule["items"])
+    for day in calendar_days:
+        day["items"] = schedule_by_date.get(day["date"], [])
 
-    def _frequency_label(pool):
-        if pool.service_interval_days:
-            return f"\u041a\u0430\u0436\u0434\u044b\u0435 {pool.service_interval_days} \u0434\u043d\u0435\u0439"
-        if pool.service_frequency:
-            return pool.get_service_frequency_display()
-        return "\u041d\u0435 \u0437\u0430\u0434\u0430\u043d\u0430"
+    return render(
+        request,
+        "pool_service/readings_all.html",
+        {
+            "calendar_days": calendar_days,
+            "month_label": month_label,
+            "prev_month_query": prev_month_query,
+            "next_month_query": next_month_query,
+            "today_month_query": today_month_query,
+            "current_month": target_month_value,
+            "calendar_return_url": calendar_return_url,
+            "page_title": "\u041a\u0430\u043b\u0435\u043d\u0434\u0430\u0440\u044c \u0437\u0430\u0434\u0430\u0447",
+            "page_subtitle": "\u0412\u044b\u0435\u0437\u0434\u044b \u0438 \u0440\u0443\u0447\u043d\u044b\u0435 \u0437\u0430\u0434\u0430\u0447\u0438 \u043a\u043e\u043c\u0430\u043d\u0434\u044b",
+            "active_tab": "readings",
+            "overdue_count": status_counts.overdue,
+            "planned_count": status_counts.planned,
+            "done_count": status_counts.done,
+            "unscheduled_pools": schedule["unscheduled_pools"],
+            "paused_pools": schedule["paused_pools"],
+            "responsible_options": responsible_options,
+            "selected_responsibles": [str(rid) for rid in selected_responsible_ids],
+            "selected_responsible_label": selected_responsible_label,
+            "can_create_tasks": can_create_tasks,
+            "task_search_index": schedule["task_search_index"],
+        },
+    )
 
-    used_reading_ids = set()
 
-    def _period_kind(pool):
-        if pool.service_interval_days:
-            return "week" if int(pool.service_interval_days) <= 14 else "month"
-        if pool.service_frequency in {Pool.SERVICE_FREQ_WEEKLY, Pool.SERVICE_FREQ_TWICE_MONTHLY}:
-            return "week"
-        return "month"
-
-    def _period_key(kind, d):
-        return _week_start(d) if kind == "week" else f"{d.year}-{d.month:02d}"
-
-    def _select_reading(pool, expected_date):
-        kind = _period_kind(pool)
-        key = _period_key(kind, expected_date)
-        if kind == "week":
-            readings = readings_by_pool_week.get(pool.id, {}).get(key, [])
-        else:
-            readings = readings_by_pool_month.get(pool.id, {}).get(key, [])
-        available = [reading for reading in readings if reading.id not in used_reading_ids]
-        if not available:
+CALENDAR_FEED_MAX_DAYS = 93
+
+
+def _calendar_feed_item(item):
+    payload = {}
+    for key, value in asdict(item).items():
+        if isinstance(value, time):
+            value = value.strftime("%H:%M")
+        elif isinstance(value, date):
+            value = value.isoformat()
+        payload[key] = value
+    return payload
+
+
+TREND_DEFAULT_RANGE_DAYS = {ReadingRollup.PERIOD_DAY: 90, ReadingRollup.PERIOD_MONTH: 365}
+
+
+def _trend_params(request):
+
+    """``(period, start, end)`` from ``?period=day|month&start=&end=``, or None if invalid."""
+
+    period = request.GET.get("period") or ReadingRollup.PERIOD_MONTH
+
+    if period not in TREND_DEFAULT_RANGE_DAYS:
+
+        return None
+
+    today = timezone.localdate() if settings.USE_TZ else date.today()
+
+    try:
+
+        end = date.fromisoformat(request.GET["end"]) if request.GET.get("end") else today
+
+        start = date.fromisoformat(request.GET["start"]) if request.GET.get("start") else end - timedelta(days=TREND_DEFAULT_RANGE_DAYS[period])
+
+    except ValueError:
+
+        return None
+
+    if start > end:
+
+        return None
+
+    if period == ReadingRollup.PERIOD_MONTH:
+
+        start = start.replace(day=1)
+
+    return period, start, end
+
+
+@login_required
+@require_GET
+@read_from_replica
+def pool_trends(request, pool_uuid):
+
+    """JSON series of one water-chemistry metric of a pool, read from the rollups."""
+
+    pool = get_object_or_404(Pool, uuid=pool_uuid)
+
+    if not _pool_role_for_user(request.user, pool, request_access(request)):
+
+        return JsonResponse({"error": "forbidden"}, status=403)
+
+    metric = request.GET.get("metric") or "ph"
+
+    params = _trend_params(request)
+
+    if metric not in ROLLUP_METRICS or params is None:
+
+        return JsonResponse({"error": "bad request"}, status=400)
+
+    period, start, end = params
+
+    return JsonResponse(
+
+        {
+
+            "metric": metric,
+
+            "period": period,
+
+            "start": start.isoformat(),
+
+            "end": end.isoformat(),
+
+            "items": pool_trend(pool, metric, period, start, end),
+
+        }
+
+    )
+
+
+@login_required
+@require_GET
+@read_from_replica
+def organization_trends(request):
+
+    """JSON per-period totals of every metric across the organization's pools."""
+
+    org_access = request_access(request).org_access
+
+    if not org_access:
+
+        return JsonResponse({"error": "forbidden"}, status=403)
+
+    params = _trend_params(request)
+
+    if params is None:
+
+        return JsonResponse({"error": "bad request"}, status=400)
+
+    period, start, end = params
+
+    return JsonResponse(
+
+        {
+
+            "period": period,
+
+            "start": start.isoformat(),
+
+            "end": end.isoformat(),
+
+            "metrics": organization_summary(org_access.organization_id, period, start, end),
+
+        }
+
+    )
+
+
+def _export_scope(request, params):
+
+    """``(pools, file name stem)`` the user may export for ``?pool=`` / ``?client=`` / the organization, or None."""
+
+    user = request.user
+
+    access = request_access(request)
+
+    if params.get("pool"):
+
+        pool = Pool.objects.filter(uuid=params["pool"]).select_related("client", "organization").first()
+
+        if not pool or not _pool_role_for_user(user, pool, access):
+
             return None
-        chosen = min(
-            available,
-            key=lambda reading: (
-                abs((reading._calendar_date - expected_date).days),
-                reading._calendar_date,
-                reading.id,
-            ),
-        )
-        used_reading_ids.add(chosen.id)
-        return chosen
 
-    pool_events = []
+        return Pool.objects.filter(id=pool.id), f"pool-{pool.uuid}"
 
-    def _allow_month_move(pool):
-        return _period_kind(pool) == "month"
-
-    def _record_pool_event(
-        pool,
-        source_week_start,
-        due_date,
-        planned_date,
-        plan_id,
-        status,
-        actual_date,
-        group_key=None,
-        is_extra=False,
-    ):
-        responsible = responsible_by_pool.get(pool.id)
-        responsible_name = None
-        if responsible:
-            responsible_name = responsible.get_full_name() or responsible.username
-        if responsible_filter_set:
-            if not responsible or responsible.id not in responsible_filter_set:
-                return
-
-        display_date = actual_date or planned_date or due_date
-        display_week_start = _week_start(display_date)
-        display_week_end = display_week_start + timedelta(days=6)
-        if group_key is None:
-            group_key = display_week_start
-        group_token = ("extra", group_key) if is_extra else ("base", group_key)
+    if params.get("client"):
 
-        pool_events.append(
-            {
-                "pool": pool,
-                "client_id": pool.client_id,
-                "client_name": pool.client.name,
-                "pool_address": pool.address,
-                "object_type": pool.object_type or Pool.OBJECT_TYPE_POOL,
-                "source_week_start": source_week_start,
-                "display_week_start": display_week_start,
-                "display_week_end": display_week_end,
-                "group_key": group_token,
-                "is_extra": is_extra,
-                "due_date": due_date,
-                "plan_date": planned_date,
-                "plan_id": plan_id,
-                "status": status,
-                "actual_date": actual_date,
-                "frequency_label": _frequency_label(pool),
-                "responsible_name": responsible_name,
-                "allow_month_move": _allow_month_move(pool),
-            }
-        )
+        client = Client.objects.filter(id=params["client"]).first()
 
-    for pool in pool_list:
-        if getattr(pool, "service_suspended", False):
-            paused_pools.append(pool)
-            continue
+        if not client:
 
-        interval_days = _frequency_days(pool)
-        interval_months = _frequency_months(pool)
+            return None
 
-        if not interval_days and not interval_months:
-            unscheduled_pools.append(pool)
-            continue
+        pools = Pool.objects.filter(client=client)
 
-        last_reading = last_reading_before_range.get(pool.id)
-        last_visit_date = last_reading.date.date() if last_reading else None
-        anchor_date = last_visit_date or (pool.created_at.date() if pool.created_at else None)
-        if not anchor_date:
-            continue
+        if not (
 
-        if interval_days:
-            due_date = anchor_date + timedelta(days=interval_days)
-            if due_date < range_start:
-                delta_days = (range_start - due_date).days
-                steps = delta_days // interval_days
-                if due_date + timedelta(days=steps * interval_days) < range_start:
-                    steps += 1
-                due_date = due_date + timedelta(days=steps * interval_days)
-
-            while due_date <= range_end:
-                week_key = _week_start(due_date)
-                plan = plan_by_pool_week.get((pool.id, week_key))
-                planned_date = plan.planned_date if plan else due_date
-                actual_reading = _select_reading(pool, planned_date)
-
-                if actual_reading:
-                    event_date = actual_reading._calendar_date
-                    _record_pool_event(
-                        pool,
-                        week_key,
-                        due_date,
-                        planned_date,
-                        plan.id if plan else None,
-                        "done",
-                        event_date,
-                    )
-                    anchor_date = event_date
-                    due_date = anchor_date + timedelta(days=interval_days)
-                    continue
-
-                status = "overdue" if (week_key + timedelta(days=6)) < today else "planned"
-                _record_pool_event(
-                    pool,
-                    week_key,
-                    due_date,
-                    planned_date,
-                    plan.id if plan else None,
-                    status,
-                    None,
-                )
-                due_date = due_date + timedelta(days=interval_days)
-        else:
-            step = 1
-            due_date = _shift_from_weekend(_add_month(anchor_date, interval_months * step))
-            if due_date < range_start:
-                delta_months = (range_start.year - anchor_date.year) * 12 + (range_start.month - anchor_date.month)
-                step = max(1, delta_months // interval_months)
-                while _shift_from_weekend(_add_month(anchor_date, interval_months * step)) < range_start:
-                    step += 1
-                due_date = _shift_from_weekend(_add_month(anchor_date, interval_months * step))
-
-            while due_date <= range_end:
-                week_key = _week_start(due_date)
-                plan = plan_by_pool_week.get((pool.id, week_key))
-                planned_date = plan.planned_date if plan else due_date
-                actual_reading = _select_reading(pool, planned_date)
-
-                if actual_reading:
-                    event_date = actual_reading._calendar_date
-                    _record_pool_event(
-                        pool,
-                        week_key,
-                        due_date,
-                        planned_date,
-                        plan.id if plan else None,
-                        "done",
-                        event_date,
-                    )
-                    anchor_date = event_date
-                    step = 1
-                    due_date = _shift_from_weekend(_add_month(anchor_date, interval_months * step))
-                    continue
-
-                status = "overdue" if (week_key + timedelta(days=6)) < today else "planned"
-                _record_pool_event(
-                    pool,
-                    week_key,
-                    due_date,
-                    planned_date,
-                    plan.id if plan else None,
-                    status,
-                    None,
-                )
-                step += 1
-                due_date = _shift_from_weekend(_add_month(anchor_date, interval_months * step))
+            user.is_superuser
 
-    unscheduled_ids = {pool.id for pool in unscheduled_pools}
-    paused_ids = {pool.id for pool in paused_pools}
-    extra_seen = set()
-    for pool in pool_list:
-        if pool.id in unscheduled_ids or pool.id in paused_ids:
-            continue
-        period_kind = _period_kind(pool)
-        if period_kind == "week":
-            period_map = readings_by_pool_week.get(pool.id, {})
-        else:
-            period_map = readings_by_pool_month.get(pool.id, {})
-        for readings in period_map.values():
-            for reading in readings:
-                if reading.id in used_reading_ids:
-                    continue
-                actual_date = reading._calendar_date
-                extra_key = (pool.id, actual_date)
-                if extra_key in extra_seen:
-                    continue
-                extra_seen.add(extra_key)
-                _record_pool_event(
-                    pool,
-                    _week_start(actual_date),
-                    actual_date,
-                    None,
-                    None,
-                    "done",
-                    actual_date,
-                    group_key=actual_date,
-                    is_extra=True,
-                )
-                used_reading_ids.add(reading.id)
+            or client.user_id == user.id
 
-    grouped = {}
-    for event in pool_events:
-        key = (event["client_id"], event["group_key"], event["object_type"])
-        group = grouped.setdefault(
-            key,
-            {
-                "client_id": event["client_id"],
-                "client_name": event["client_name"],
-                "week_start": event["display_week_start"],
-                "week_end": event["display_week_end"],
-                "pool_ids": [],
-                "pool_addresses": [],
-                "plan_dates": [],
-                "due_dates": [],
-                "actual_dates": [],
-                "frequency_labels": set(),
-                "responsibles": set(),
-                "allow_month_move": True,
-                "source_weeks": {},
-                "is_extra": event["is_extra"],
-                "object_type": event["object_type"],
-            },
-        )
-        group["pool_ids"].append(event["pool"].id)
-        group["pool_addresses"].append(event["pool_address"])
-        group["due_dates"].append(event["due_date"])
-        group["source_weeks"][event["pool"].id] = event["source_week_start"]
-        if event["plan_date"]:
-            group["plan_dates"].append(event["plan_date"])
-        if event["actual_date"]:
-            group["actual_dates"].append(event["actual_date"])
-        if event["frequency_label"]:
-            group["frequency_labels"].add(event["frequency_label"])
-        if event["responsible_name"]:
-            group["responsibles"].add(event["responsible_name"])
-        group["allow_month_move"] = group["allow_month_move"] and event["allow_month_move"]
-
-    overdue_count = 0
-    planned_count = 0
-    done_count = 0
-
-    for group in grouped.values():
-        is_extra = group.get("is_extra", False)
-        if group["actual_dates"]:
-            event_date = min(group["actual_dates"])
-            status = "done"
-            draggable = False
-        else:
-            status = "overdue" if group["week_end"] < today else "planned"
-            planned_date = min(group["plan_dates"]) if group["plan_dates"] else min(group["due_dates"])
-            event_date = planned_date
-            draggable = status == "planned"
+            or ClientAccess.objects.filter(user=user, client=client).exists()
 
-        if event_date < range_start or event_date > range_end:
-            continue
+            or (client.organization_id and access.has_org_role(ORG_STAFF_ROLES, client.organization_id))
 
-        if not is_extra:
-            if status == "overdue":
-                overdue_count += 1
-            elif status == "planned":
-                planned_count += 1
-            else:
-                done_count += 1
-
-        pool_count = len(group["pool_ids"])
-        display_name = group["client_name"]
-        if pool_count > 1:
-            display_name = f"{display_name} ({pool_count})"
-
-        addresses = group["pool_addresses"]
-        addresses_display = ", ".join(addresses[:3])
-        if len(addresses) > 3:
-            addresses_display = f"{addresses_display} \u0438 \u0435\u0449\u0435 {len(addresses) - 3}"
-
-        frequency_label = None
-        if len(group["frequency_labels"]) == 1:
-            frequency_label = next(iter(group["frequency_labels"]))
-        elif len(group["frequency_labels"]) > 1:
-            frequency_label = "\u041d\u0435\u0441\u043a\u043e\u043b\u044c\u043a\u043e \u0447\u0430\u0441\u0442\u043e\u0442"
-
-        responsible_label = None
-        if len(group["responsibles"]) == 1:
-            responsible_label = next(iter(group["responsibles"]))
-        elif len(group["responsibles"]) > 1:
-            responsible_label = "\u041d\u0435\u0441\u043a\u043e\u043b\u044c\u043a\u043e"
-
-        title_parts = [f"\u0411\u0430\u0441\u0441\u0435\u0439\u043d\u043e\u0432: {pool_count}"]
-        if addresses_display:
-            title_parts.append(f"\u0410\u0434\u0440\u0435\u0441\u0430: {addresses_display}")
-        if responsible_label:
-            title_parts.append(f"\u041e\u0442\u0432\u0435\u0442\u0441\u0442\u0432\u0435\u043d\u043d\u044b\u0439: {responsible_label}")
-        if status == "done":
-            title_parts.append(f"\u0412\u044b\u0435\u0437\u0434: {event_date:%d.%m.%Y}")
-        else:
-            title_parts.append(f"\u041f\u043b\u0430\u043d: {event_date:%d.%m.%Y}")
-        if is_extra:
-            title_parts.append("\u0414\u043e\u043f\u043e\u043b\u043d\u0438\u0442\u0435\u043b\u044c\u043d\u044b\u0439 \u0432\u044b\u0435\u0437\u0434")
-        if frequency_label:
-            title_parts.append(f"\u0427\u0430\u0441\u0442\u043e\u0442\u0430: {frequency_label}")
-        if status == "overdue":
-            title_parts.append("\u041f\u0440\u043e\u0441\u0440\u043e\u0447\u0435\u043d\u043e")
-
-        source_weeks = {str(pid): week.isoformat() for pid, week in group["source_weeks"].items()}
-        source_weeks_json = json.dumps(source_weeks)
-        source_week_values = list({week.isoformat() for week in group["source_weeks"].values()})
-        source_week_start = source_week_values[0] if len(source_week_values) == 1 else ""
-
-        schedule_by_date.setdefault(event_date, []).append(
-            {
-                "client_name": group["client_name"],
-                "display_name": display_name,
-                "pool_ids": group["pool_ids"],
-                "status": status,
-                "date": event_date,
-                "week_start": group["week_start"],
-                "source_week_start": source_week_start,
-                "source_weeks": source_weeks_json,
-                "source_month": event_date.strftime("%Y-%m"),
-                "allow_month_move": group["allow_month_move"],
-                "is_draggable": draggable,
-                "title": " | ".join(title_parts),
-                "object_type": group["object_type"],
-                "item_type": "auto",
-                "kind_order": 0,
-            }
-        )
+        ):
 
-    calendar_return_url = f"{reverse('readings_all')}?{current_query}" if current_query else reverse("readings_all")
-    task_search_index = []
+            # Same rule as _pool_role_for_user: without client or organization access only pools shared with the user.
 
-    if task_org:
-        task_qs = ServiceTask.objects.filter(organization=task_org)
-        if not request.user.is_superuser:
-            task_qs = task_qs.filter(responsibles=request.user)
-        if responsible_filter_set:
-            task_qs = task_qs.filter(responsibles__in=responsible_filter_set)
-
-        task_qs = task_qs.filter(
-            Q(end_date__isnull=True, start_date__lte=range_end, start_date__gte=range_start)
-            | Q(end_date__isnull=False, start_date__lte=range_end, end_date__gte=range_start)
-        )
+            pools = pools.filter(accesses__user=user)
 
-        task_qs = task_qs.select_related("created_by").prefetch_related("responsibles").distinct()
-        for task in task_qs:
-            task_start = task.start_date
-            task_end = task.end_date or task.start_date
-            if task_end < range_start or task_start > range_end:
-                continue
+            if not pools.exists():
 
-            is_completed = bool(task.completed_at)
-            if is_completed:
-                status = "done"
-            elif task_end < today:
-                status = "overdue"
-            else:
-                status = "planned"
+                return None
 
-            if status == "overdue":
-                overdue_count += 1
-            elif status == "planned":
-                planned_count += 1
-            else:
-                done_count += 1
-
-            task_responsibles = list(task.responsibles.all())
-            responsible_names = [_task_user_label(user) for user in task_responsibles]
-            responsible_names = [name for name in responsible_names if name]
-            responsible_label = ", ".join(responsible_names) if responsible_names else ""
-
-            title_parts = []
-            if responsible_label:
-                title_parts.append(f"Участники: {responsible_label}")
-            if task.priority == ServiceTask.PRIORITY_HIGH:
-                title_parts.append("Важная задача")
-            if task_start == task_end:
-                title_parts.append(f"Дата: {task_start:%d.%m.%Y}")
-            else:
-                title_parts.append(f"Период: {task_start:%d.%m.%Y} — {task_end:%d.%m.%Y}")
-            if task.start_time or task.end_time:
-                if task.start_time and task.end_time:
-                    title_parts.append(f"Время: {task.start_time:%H:%M} — {task.end_time:%H:%M}")
-                elif task.start_time:
-                    title_parts.append(f"Время начала: {task.start_time:%H:%M}")
-                elif task.end_time:
-                    title_parts.append(f"Время окончания: {task.end_time:%H:%M}")
-            if is_completed and task.completed_at:
-                title_parts.append(f"Выполнено: {task.completed_at:%d.%m.%Y}")
-            if status == "overdue":
-                title_parts.append("Просрочено")
-
-            responsible_ids = {user.id for user in task_responsibles}
-            can_edit = request.user.is_superuser or request.user.id in responsible_ids
-            is_draggable = can_edit and not is_completed
-            edit_url = reverse("task_edit", kwargs={"task_id": task.id})
-            if calendar_return_url:
-                edit_url = f"{edit_url}?{urlencode({'next': calendar_return_url})}"
-
-            display_start = max(task_start, range_start)
-            display_end = min(task_end, range_end)
-            span_days = (task_end - task_start).days + 1
-            start_time_label = task.start_time.strftime("%H:%M") if task.start_time else ""
-            date_label = (
-                f"{task_start:%d.%m.%Y}"
-                if task_start == task_end
-                else f"{task_start:%d.%m.%Y} \u2014 {task_end:%d.%m.%Y}"
-            )
+        return pools, f"client-{client.id}"
 
-            schedule_by_date.setdefault(display_start, []).append(
-                {
-                    "client_name": task.title,
-                    "display_name": task.title,
-                    "status": status,
-                    "date": display_start,
-                    "priority": task.priority,
-                    "visibility": task.visibility,
-                    "is_completed": is_completed,
-                    "is_multi": span_days > 1,
-                    "span_days": span_days,
-                    "is_continued": task_start < range_start,
-                    "title": " | ".join(title_parts),
-                    "task_id": task.id,
-                    "start_date": task_start,
-                    "end_date": task_end,
-                    "start_time": task.start_time,
-                    "start_time_label": start_time_label,
-                    "is_draggable": is_draggable,
-                    "item_type": "task",
-                    "edit_url": edit_url if can_edit else "",
-                    "kind_order": 1,
-                }
-            )
-            task_search_index.append(
-                {
-                    "id": task.id,
-                    "title": task.title,
-                    "date": task_start.isoformat(),
-                    "date_label": date_label,
-                    "time_label": start_time_label,
-                    "edit_url": edit_url if can_edit else "",
-                    "priority": task.priority,
-                    "status": status,
-                }
-            )
+    org_access = access.org_access
 
-            if span_days > 1:
-                cursor = display_start + timedelta(days=1)
-                while cursor <= display_end:
-                    schedule_by_date.setdefault(cursor, []).append(
-                        {
-                            "client_name": task.title,
-                            "display_name": task.title,
-                            "status": status,
-                            "date": cursor,
-                            "priority": task.priority,
-                            "visibility": task.visibility,
-                            "is_completed": is_completed,
-                            "title": " | ".join(title_parts),
-                            "item_type": "task_continuation",
-                            "kind_order": 2,
-                        }
-                    )
-                    cursor += timedelta(days=1)
+    if not org_access:
 
-    status_order = {"overdue": 0, "planned": 1, "done": 2}
-    for day in calendar_days:
-        items = schedule_by_date.get(day["date"], [])
-        items.sort(
-            key=lambda item: (
-                status_order.get(item["status"], 9),
-                item.get("kind_order", 0),
-                item.get("start_time") or time.max,
-                item.get("client_name") or "",
-            )
+        return None
+
+    return Pool.objects.filter(organization_id=org_access.organization_id), f"organization-{org_access.organization_id}"
+
+
+@login_required
+@require_GET
+@read_from_replica
+def readings_export(request):
+
+    """Stream the readings of a pool, a client or the organization as CSV (or XLSX) for ``?start=&end=``."""
+
+    try:
+
+        scope = _export_scope(request, request.GET)
+
+    except (ValueError, forms.ValidationError):
+
+        return HttpResponseNotFound()
+
+    if scope is None:
+
+        return HttpResponseForbidden()
+
+    pools, stem = scope
+
+    try:
+
+        start = date.fromisoformat(request.GET["start"]) if request.GET.get("start") else None
+
+        end = date.fromisoformat(request.GET["end"]) if request.GET.get("end") else None
+
+    except ValueError:
+
+        return HttpResponse(status=400)
+
+    rows = export_rows(pools, start, end)
+
+    if request.GET.get("format") == "xlsx":
+
+        try:
+
+            output = write_xlsx(rows)
+
+        except ExportFormatError as exc:
+
+            return HttpResponse(str(exc), status=400, content_type="text/plain; charset=utf-8")
+
+        return FileResponse(output, as_attachment=True, filename=f"readings-{stem}.xlsx")
+
+    if not is_pinned_to_primary(request):
+
+        # The body is produced after the view returns, outside read_from_replica.
+
+        rows = _replica_stream(rows)
+
+    response = StreamingHttpResponse(csv_chunks(rows), content_type="text/csv; charset=utf-8")
+
+    response["Content-Disposition"] = f'attachment; filename="readings-{stem}.csv"'
+
+    return response
+
+
+def _replica_stream(rows):
+
+    with replica_reads():
+
+        yield from rows
+
+
+@login_required
+@require_GET
+@read_from_replica
+def readings_feed(request):
+    """JSON day items of the service calendar for ``?month=YYYY-MM`` or ``?start=&end=``.
+
+    Answers 304 while the schedule fingerprint of the visible pools is unchanged.
+    """
+
+    today = timezone.localdate() if settings.USE_TZ else date.today()
+    target_month = _parse_calendar_month(request.GET.get("month"))
+    if request.GET.get("start") or request.GET.get("end"):
+        try:
+            range_start = date.fromisoformat(request.GET.get("start", ""))
+            range_end = date.fromisoformat(request.GET.get("end", ""))
+        except ValueError:
+            return JsonResponse({"ok": False, "error": "invalid_range"}, status=400)
+        if range_end < range_start or (range_end - range_start).days >= CALENDAR_FEED_MAX_DAYS:
+            return JsonResponse({"ok": False, "error": "invalid_range"}, status=400)
+    else:
+        range_start, range_end = month_range(target_month or today.replace(day=1))
+
+    pool_list = list(_calendar_pools(request))
+    task_org = request_access(request).organization
+    selected_responsible_ids = _calendar_selected_responsibles(request, _calendar_responsible_options(task_org))
+
+    fingerprint = schedule_fingerprint([pool.id for pool in pool_list], task_org.id if task_org else None)
+    version_source = "|".join(
+        [
+            str(request.user.id),
+            ",".join(str(pool.id) for pool in pool_list),
+            ",".join(str(rid) for rid in selected_responsible_ids),
+            range_start.isoformat(),
+            range_end.isoformat(),
+            today.isoformat(),
+            fingerprint,
+        ]
+    )
+    etag = quote_etag(hashlib.sha1(version_source.encode("utf-8")).hexdigest())
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    responsible_params = [("responsible", str(rid)) for rid in selected_responsible_ids]
+    return_month = target_month or range_start
+    return_query = urlencode([("month", f"{return_month.year}-{return_month.month:02d}"), *responsible_params])
+    schedule = _calendar_schedule(
+        request.user,
+        pool_list,
+        task_org,
+        range_start,
+        range_end,
+        today,
+        set(selected_responsible_ids),
+        f"{reverse('readings_all')}?{return_query}",
+    )
+    schedule_by_date = items_by_date(schedule["items"])
+    days = []
+    cursor = range_start
+    while cursor <= range_end:
+        days.append(
+            {
+                "date": cursor.isoformat(),
+                "items": [_calendar_feed_item(item) for item in schedule_by_date.get(cursor, [])],
+            }
         )
-        day["items"] = items
+        cursor += timedelta(days=1)
 
-    return render(
-        request,
-        "pool_service/readings_all.html",
+    counts = schedule["counts"]
+    response = JsonResponse(
         {
-            "calendar_days": calendar_days,
-            "month_label": month_label,
-            "prev_month_query": prev_month_query,
-            "next_month_query": next_month_query,
-            "today_month_query": today_month_query,
-            "current_month": target_month_value,
-            "calendar_return_url": calendar_return_url,
-            "page_title": "\u041a\u0430\u043b\u0435\u043d\u0434\u0430\u0440\u044c \u0437\u0430\u0434\u0430\u0447",
-            "page_subtitle": "\u0412\u044b\u0435\u0437\u0434\u044b \u0438 \u0440\u0443\u0447\u043d\u044b\u0435 \u0437\u0430\u0434\u0430\u0447\u0438 \u043a\u043e\u043c\u0430\u043d\u0434\u044b",
-            "active_tab": "readings",
-            "overdue_count": overdue_count,
-            "planned_count": planned_count,
-            "done_count": done_count,
-            "unscheduled_pools": unscheduled_pools,
-            "paused_pools": paused_pools,
-            "responsible_options": responsible_options,
-            "selected_responsibles": [str(rid) for rid in selected_responsible_ids],
-            "selected_responsible_label": selected_responsible_label,
-            "can_create_tasks": can_create_tasks,
-            "task_search_index": task_search_index,
-        },
+            "ok": True,
+            "start": range_start.isoformat(),
+            "end": range_end.isoformat(),
+            "today": today.isoformat(),
+            "counts": {"overdue": counts.overdue, "planned": counts.planned, "done": counts.done},
+            "days": days,
+            "task_search_index": schedule["task_search_index"],
+        }
     )
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
 @csrf_protect
@@ -7197,8 +6926,8 @@ def visit_plan_move(request):
         has_actual = WaterReading.objects.filter(
             pool_id__in=pool_ids,
             added_by_id__in=org_user_ids,
-            date__date__gte=target_week_start,
-            date__date__lte=target_week_end,
+            day__gte=target_week_start,
+            day__lte=target_week_end,
         ).exists()
         if has_actual:
             return JsonResponse({"ok": False, "error": "already_completed"}, status=409)
@@ -7243,7 +6972,7 @@ def water_reading_create(request, pool_uuid):
     pool = get_object_or_404(Pool, uuid=pool_uuid)
     is_water_object = pool.object_type == Pool.OBJECT_TYPE_WATER
 
-    role = _pool_role_for_user(request.user, pool)
+    role = _pool_role_for_user(request.user, pool, request_access(request))
 
     if role not in {"editor", "service", "admin"}:
 
@@ -7327,7 +7056,7 @@ def water_reading_edit(request, reading_uuid):
 
 
 
-    role = _pool_role_for_user(request.user, reading.pool)
+    role = _pool_role_for_user(request.user, reading.pool, request_access(request))
 
     if role not in {"editor", "service", "admin"}:
 
@@ -7557,7 +7286,7 @@ def profile_view(request):
 
 def organization_norms(request):
 
-    org_access = OrganizationAccess.objects.filter(user=request.user).select_related("organization").first()
+    org_access = request_access(request).org_access
 
     if not org_access:
 
@@ -7628,112 +7357,359 @@ def organization_norms(request):
 
 
 @login_required
-def notifications_list(request):
-    qs = Notification.objects.filter(user=request.user, is_resolved=False).order_by("-created_at")
-    notifications = list(qs)
+
+def readings_import(request):
+
+    org_access = request_access(request).org_access
+
+    if not org_access:
+
+        return render(request, "403.html")
+
+
+
+    if not request.user.is_superuser and org_access.role not in {"owner", "admin"}:
+
+        return render(request, "403.html")
+
+
+
+    organization = org_access.organization
+
+    report = None
+
+
+
+    if request.method == "POST":
+
+        form = ReadingImportForm(request.POST, request.FILES)
+
+        if form.is_valid():
+
+            upload = form.cleaned_data["file"]
+
+            try:
+
+                report = import_readings(
+
+                    upload,
+
+                    upload.name,
+
+                    organization,
+
+                    added_by=request.user,
+
+                    dry_run=form.cleaned_data["dry_run"],
+
+                )
+
+            except ImportFormatError as exc:
+
+                form.add_error("file", str(exc))
+
+    else:
+
+        form = ReadingImportForm()
+
+
+
+    return render(
+
+        request,
+
+        "pool_service/readings_import.html",
+
+        {
+
+            "form": form,
+
+            "report": report,
+
+            "page_title": "\u0418\u043c\u043f\u043e\u0440\u0442 \u043f\u043e\u043a\u0430\u0437\u0430\u043d\u0438\u0439",
+
+            "page_subtitle": "\u0417\u0430\u0433\u0440\u0443\u0437\u043a\u0430 \u043f\u043e\u043a\u0430\u0437\u0430\u043d\u0438\u0439 \u0432\u043e\u0434\u044b \u0438\u0437 CSV \u0438\u043b\u0438 XLSX",
+
+            "active_tab": "norms",
+
+            "show_search": False,
+
+            "show_add_button": False,
+
+            "add_url": None,
+
+        },
+
+    )
+
+
+
+
+
+def _notification_timezone(request):
 
     current_tz = timezone.get_current_timezone()
-    default_tz = timezone.get_default_timezone()
+
     if not settings.USE_TZ and request.user.is_authenticated:
+
         tz_name = None
+
         try:
+
             tz_name = request.user.profile.timezone
+
         except Profile.DoesNotExist:
+
             tz_name = None
+
         if tz_name:
+
             try:
+
                 current_tz = ZoneInfo(tz_name)
+
             except Exception:
+
                 current_tz = timezone.get_current_timezone()
 
+    return current_tz
+
+
+
+def _parse_task_message(message):
+
+    if not message:
+
+        return "", ""
+
+    base = message
+
+    details = ""
+
+    if message.endswith(")") and " (" in message:
+
+        head, _, tail = message.rpartition(" (")
+
+        if head and tail.endswith(")"):
+
+            base = head
+
+            details = tail[:-1]
+
+    return base, details
+
+
+
+def _parse_limits_message(message):
+
+    if not message:
+
+        return "", ""
+
+    object_name = ""
+
+    details = message
+
+    if ":" in message:
+
+        object_name, _, details = message.partition(":")
+
+        object_name = object_name.strip()
+
+        details = details.strip()
+
+    parts = [part.strip() for part in details.split(";") if part.strip()]
+
+    converted = []
+
+    for part in parts:
+
+        if ":" not in part:
+
+            converted.append(part)
+
+            continue
+
+        label, _, expr = part.partition(":")
+
+        label = label.strip()
+
+        expr = expr.strip()
+
+        if "<" in expr:
+
+            converted.append(f"низкий уровень {label} ({expr})")
+
+        elif ">" in expr:
+
+            converted.append(f"высокий уровень {label} ({expr})")
+
+        else:
+
+            converted.append(f"{label}: {expr}")
+
+    detail_text = "; ".join(converted) if converted else details
+
+    return object_name, detail_text
+
+
+
+def _decorate_notifications(notifications, current_tz):
+
+    default_tz = timezone.get_default_timezone()
+
+    object_kinds = {"limits", "missed_visit", "daily_missing"}
+
     for note in notifications:
+
         created_at = note.created_at
+
         if timezone.is_naive(created_at):
+
             created_at = timezone.make_aware(created_at, default_tz)
-        note.display_time = created_at.astimezone(current_tz)
 
-    def _parse_task_message(message):
-        if not message:
-            return "", ""
-        base = message
-        details = ""
-        if message.endswith(")") and " (" in message:
-            head, _, tail = message.rpartition(" (")
-            if head and tail.endswith(")"):
-                base = head
-                details = tail[:-1]
-        return base, details
-
-    def _parse_limits_message(message):
-        if not message:
-            return "", ""
-        object_name = ""
-        details = message
-        if ":" in message:
-            object_name, _, details = message.partition(":")
-            object_name = object_name.strip()
-            details = details.strip()
-        parts = [part.strip() for part in details.split(";") if part.strip()]
-        converted = []
-        for part in parts:
-            if ":" not in part:
-                converted.append(part)
-                continue
-            label, _, expr = part.partition(":")
-            label = label.strip()
-            expr = expr.strip()
-            if "<" in expr:
-                converted.append(f"низкий уровень {label} ({expr})")
-            elif ">" in expr:
-                converted.append(f"высокий уровень {label} ({expr})")
-            else:
-                converted.append(f"{label}: {expr}")
-        detail_text = "; ".join(converted) if converted else details
-        return object_name, detail_text
+        note.display_time = created_at.astimezone(current_tz)
 
-    object_kinds = {"limits", "missed_visit", "daily_missing"}
-    task_notifications = []
-    deviation_notifications = []
-    for note in notifications:
         if note.kind == "task_assignment":
+
             title, details = _parse_task_message(note.message or note.title)
+
             note.task_title = title or note.title or ""
+
             note.task_details = details
-            task_notifications.append(note)
+
+        elif note.kind in object_kinds:
+
+            obj_name, detail_text = _parse_limits_message(note.message)
+
+            note.deviation_prefix = "\u041d\u0430 \u043e\u0431\u044a\u0435\u043a\u0442\u0435"
+
+            note.object_name = obj_name or note.title or ""
+
+            note.deviation_details = detail_text
+
         else:
-            if note.kind in object_kinds:
-                obj_name, detail_text = _parse_limits_message(note.message)
-                note.deviation_prefix = "\u041d\u0430 \u043e\u0431\u044a\u0435\u043a\u0442\u0435"
-                note.object_name = obj_name or note.title or ""
-                note.deviation_details = detail_text
-            else:
-                note.deviation_prefix = ""
-                note.object_name = note.title or ""
-                note.deviation_details = note.message or ""
-            deviation_notifications.append(note)
 
-    task_unread_count = sum(1 for note in task_notifications if not note.is_read)
-    deviation_unread_count = sum(1 for note in deviation_notifications if not note.is_read)
+            note.deviation_prefix = ""
+
+            note.object_name = note.title or ""
+
+            note.deviation_details = note.message or ""
+
+
+@login_required
+
+def notifications_list(request):
+
+    qs = Notification.objects.filter(user=request.user, is_resolved=False)
+
+    active_tab = request.GET.get("tab")
+
+    if active_tab not in NOTIFICATION_TABS:
+
+        active_tab = "tasks"
+
+    cursor = request.GET.get("cursor")
+
+    current_tz = _notification_timezone(request)
+
+    per_page = settings.NOTIFICATIONS_PER_PAGE
+
+    if request.GET.get("partial") == "1":
+
+        page = cursor_page(qs.filter(NOTIFICATION_TABS[active_tab]), NOTIFICATIONS_ORDERING, cursor, per_page)
+
+        _decorate_notifications(page, current_tz)
+
+        response = render(
+
+            request,
+
+            f"pool_service/partials/notification_{active_tab}_items.html",
+
+            {"notes": page},
+
+        )
+
+        if page.next_cursor:
+
+            response["X-Next-Cursor"] = page.next_cursor
+
+        return response
+
+    # Unread counts come from the per-user counters; the page shows no overall total, so none is counted.
+
+    unread = unread_counts(request.user)
+
+    pages = {}
+
+    for tab, tab_filter in NOTIFICATION_TABS.items():
+
+        pages[tab] = cursor_page(
+
+            qs.filter(tab_filter),
+
+            NOTIFICATIONS_ORDERING,
+
+            cursor if tab == active_tab else None,
+
+            per_page,
+
+        )
+
+        _decorate_notifications(pages[tab], current_tz)
 
     return render(
+
         request,
+
         "pool_service/notifications.html",
+
         {
-            "notifications": notifications,
-            "task_notifications": task_notifications,
-            "deviation_notifications": deviation_notifications,
-            "task_unread_count": task_unread_count,
-            "deviation_unread_count": deviation_unread_count,
+
+            "task_notifications": pages["tasks"],
+
+            "deviation_notifications": pages["limits"],
+
+            "task_unread_count": unread["tasks"],
+
+            "deviation_unread_count": unread["limits"],
+
+            "active_notifications_tab": active_tab,
+
             "page_title": None,
+
             "page_subtitle": None,
+
             "active_tab": "notifications",
+
             "show_search": False,
+
             "show_add_button": False,
+
             "add_url": None,
+
         },
+
     )
 
 
+
+
+
+@login_required
+@require_GET
+def notifications_unread(request):
+
+    """Unread notification counts for the header badge, read from the per-user counters."""
+
+    response = JsonResponse(unread_counts(request.user))
+
+    response["Cache-Control"] = "no-store"
+
+    return response
+
+
 @login_required
 def notification_mark_read(request, notification_id):
 
@@ -7762,12 +7738,7 @@ def notifications_mark_all(request):
     if request.method == "POST":
 
         kind = (request.POST.get("kind") or "").strip()
-        qs = Notification.objects.filter(user=request.user, is_read=False)
-        if kind == "task":
-            qs = qs.filter(kind="task_assignment")
-        elif kind == "service":
-            qs = qs.exclude(kind="task_assignment")
-        qs.update(is_read=True)
+        mark_notifications(request.user, tab=NOTIFICATION_KIND_TABS.get(kind))
 
     return redirect("notifications")
 
@@ -7781,18 +7752,8 @@ def notifications_resolve_all(request):
     if request.method != "POST":
         return redirect("notifications")
 
-    now = timezone.now()
     kind = (request.POST.get("kind") or "").strip()
-    qs = Notification.objects.filter(user=request.user, is_resolved=False)
-    if kind == "task":
-        qs = qs.filter(kind="task_assignment")
-    elif kind == "service":
-        qs = qs.exclude(kind="task_assignment")
-    qs.update(
-        is_resolved=True,
-        is_read=True,
-        resolved_at=now,
-    )
+    mark_notifications(request.user, tab=NOTIFICATION_KIND_TABS.get(kind), resolve=True)
     return redirect("notifications")
 
 
@@ -7931,7 +7892,7 @@ class CustomLoginView(LoginView):
 
     def get_success_url(self):
 
-        personal_url = _personal_pool_redirect(self.request.user)
+        personal_url = _personal_pool_redirect(self.request)
 
         if personal_url:
 
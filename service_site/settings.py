@@ -45,6 +45,28 @@ VAPID_PRIVATE_KEY = os.getenv("VAPID_PRIVATE_KEY", "")
 PHONE_VERIFY_TTL_MINUTES = int(os.getenv("PHONE_VERIFY_TTL_MINUTES", "5"))
 PHONE_VERIFY_MAX_ATTEMPTS = int(os.getenv("PHONE_VERIFY_MAX_ATTEMPTS", "3"))
 NOTIFICATIONS_PER_PAGE = int(os.getenv("NOTIFICATIONS_PER_PAGE", "20"))
+SERVICE_SCHEDULE_PAST_MONTHS = int(os.getenv("SERVICE_SCHEDULE_PAST_MONTHS", "12"))
+SERVICE_SCHEDULE_FUTURE_MONTHS = int(os.getenv("SERVICE_SCHEDULE_FUTURE_MONTHS", "12"))
+READING_ARCHIVE_AFTER_DAYS = int(os.getenv("READING_ARCHIVE_AFTER_DAYS", "730"))
+SERVICE_CALENDAR_CACHE_TIMEOUT = int(os.getenv("SERVICE_CALENDAR_CACHE_TIMEOUT", "600"))
+# Per-user access snapshots are dropped by signals on change; the timeout only bounds stale entries.
+ACCESS_CACHE_TIMEOUT = int(os.getenv("ACCESS_CACHE_TIMEOUT", "3600"))
+SEARCH_RESULT_LIMIT = int(os.getenv("SEARCH_RESULT_LIMIT", "2000"))
+# RequestTimingMiddleware: Server-Timing for superusers and a JSON-lines log of slow requests.
+REQUEST_TIMING_ENABLED = _env_bool("REQUEST_TIMING_ENABLED", False)
+REQUEST_TIMING_SLOW_MS = int(os.getenv("REQUEST_TIMING_SLOW_MS", "500"))
+SLOW_REQUEST_LOG = os.getenv("SLOW_REQUEST_LOG", "")
+# RequestProfileMiddleware: superuser-requested profiles stored under MEDIA_ROOT/profiles/.
+REQUEST_PROFILE_TOKEN_MAX_AGE = int(os.getenv("REQUEST_PROFILE_TOKEN_MAX_AGE", "86400"))
+REQUEST_PROFILE_SAMPLE_MS = int(os.getenv("REQUEST_PROFILE_SAMPLE_MS", "5"))
+REQUEST_PROFILE_KEEP = int(os.getenv("REQUEST_PROFILE_KEEP", "100"))
+# Web push outbox, sent by the deliver_push worker.
+PUSH_TTL_SECONDS = int(os.getenv("PUSH_TTL_SECONDS", "3600"))
+PUSH_MAX_ATTEMPTS = int(os.getenv("PUSH_MAX_ATTEMPTS", "6"))
+PUSH_RETRY_BASE_SECONDS = int(os.getenv("PUSH_RETRY_BASE_SECONDS", "30"))
+PUSH_WORKERS = int(os.getenv("PUSH_WORKERS", "8"))
+PUSH_TIMEOUT = int(os.getenv("PUSH_TIMEOUT", "10"))
+PUSH_OUTBOX_KEEP_DAYS = int(os.getenv("PUSH_OUTBOX_KEEP_DAYS", "7"))
 WATER_READING_LIMITS = {
     "ph": {"min": 7.2, "max": 7.8},
     "cl_free": {"min": 0.3, "max": 1.0},
@@ -74,15 +96,19 @@ LOGIN_REDIRECT_URL = '/pools/'
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'pool_service.middleware.RequestTimingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'pool_service.middleware.RobotsTagMiddleware',
+    'pool_service.middleware.ReplicaPinMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'pool_service.middleware.AccessContextMiddleware',
     'pool_service.middleware.TimezoneMiddleware',
     'pool_service.middleware.AuthRedirectMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'pool_service.middleware.RequestProfileMiddleware',
 ]
 
 ROOT_URLCONF = 'service_site.urls'
@@ -114,17 +140,64 @@ WSGI_APPLICATION = 'service_site.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# The MySQL and SQLite backends are wrapped by pool_service.db_backends, which keeps warm
+# connections per worker process. Set DB_POOL_SIZE=0 to use the stock backends.
+POOLED_DB_ENGINES = {
+    'django.db.backends.mysql': 'pool_service.db_backends.mysql',
+    'django.db.backends.sqlite3': 'pool_service.db_backends.sqlite3',
+}
+DB_ENGINE = os.getenv('DB_ENGINE', 'django.db.backends.mysql')
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '4'))
+
 DATABASES = {
     'default': {
-        'ENGINE': os.getenv('DB_ENGINE', 'django.db.backends.mysql'),
+        'ENGINE': POOLED_DB_ENGINES.get(DB_ENGINE, DB_ENGINE) if DB_POOL_SIZE > 0 else DB_ENGINE,
         'NAME': os.getenv('DB_NAME'),
         'USER': os.getenv('DB_USER'),
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT': os.getenv('DB_PORT'),
+        'POOL': {
+            'MAX_SIZE': DB_POOL_SIZE,
+            'MAX_LIFETIME': int(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+            'HEALTH_CHECK_INTERVAL': int(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', '30')),
+        },
     }
 }
 
+# Optional read replica for the calendar, list views and reports (see pool_service.db_router).
+# Unset fields are taken from the primary, so two SQLite files only need DB_REPLICA_NAME.
+if os.getenv('DB_REPLICA_HOST') or os.getenv('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME') or DATABASES['default']['NAME'],
+        'USER': os.getenv('DB_REPLICA_USER') or DATABASES['default']['USER'],
+        'PASSWORD': os.getenv('DB_REPLICA_PASSWORD') or DATABASES['default']['PASSWORD'],
+        'HOST': os.getenv('DB_REPLICA_HOST') or DATABASES['default']['HOST'],
+        'PORT': os.getenv('DB_REPLICA_PORT') or DATABASES['default']['PORT'],
+    }
+
+DATABASE_ROUTERS = ['pool_service.db_router.ReplicaRouter']
+# Seconds a browser keeps reading from the primary after a write.
+DB_REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', '5'))
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Use a shared backend (redis/memcached) in production so all workers see the same calendar versions
+# and access snapshots. With a per-process backend (the LocMem default) neither is cached across
+# requests; `manage.py check --deploy` warns about it.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'rovikpool'),
+    }
+}
+CACHE_IS_SHARED = _env_bool(
+    'CACHE_IS_SHARED',
+    CACHES['default']['BACKEND'].rsplit('.', 1)[-1] not in ('LocMemCache', 'DummyCache'),
+)
+
 
 
 
@@ -193,6 +266,21 @@ LOGGING = {
     },
 }
 
+if SLOW_REQUEST_LOG:
+    LOGGING["formatters"] = {"message": {"format": "%(message)s"}}
+    LOGGING["handlers"]["slow_requests"] = {
+        "class": "logging.handlers.RotatingFileHandler",
+        "filename": SLOW_REQUEST_LOG,
+        "maxBytes": int(os.getenv("SLOW_REQUEST_LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+        "backupCount": int(os.getenv("SLOW_REQUEST_LOG_BACKUPS", "5")),
+        "formatter": "message",
+    }
+    LOGGING["loggers"]["pool_service.slow_requests"] = {
+        "handlers": ["slow_requests"],
+        "level": "WARNING",
+        "propagate": False,
+    }
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 